@@ -29,11 +29,32 @@ def create_app(config_name="production"):
     # Import config classes
     from app.config import config
     app.config.from_object(config.get(config_name, config['development']))
+    from app.database import configure_engines, instrument_engines
+    configure_engines(app)
+    from sqlalchemy.engine import make_url
+    app.logger.info(
+        "Database: %s",
+        make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True),
+    )
     
     # Initialize extensions
     db.init_app(app)
+    instrument_engines(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
+
+    # gzip/brotli for large responses. Registered first so that its
+    # after_request hook runs last, on the final body and headers.
+    from app.compression import setup_compression
+    setup_compression(app)
+
+    # Per-request query counts / N+1 warnings (QUERY_PROFILER_ENABLED or admin header)
+    from app.query_profiler import setup_query_profiler
+    setup_query_profiler(app)
+
+    # Request/email/job metrics, served at /metrics
+    from app.metrics import setup_metrics
+    setup_metrics(app)
     
     # Initialize Flask-Mail if configured
     if mail:
@@ -52,6 +73,10 @@ def create_app(config_name="production"):
         from app.models import User
         return User.query.get(int(user_id))
     
+    # {% cache %} tag for expensive template sections
+    from app.fragment_cache import setup_fragment_cache
+    setup_fragment_cache(app)
+
     # Add template functions
     @app.template_global()
     def safe_url_for(endpoint, **values):
@@ -72,7 +97,8 @@ def create_app(config_name="production"):
             'In Progress': 'primary',
             'Completed': 'success',
             'Needs Assistance': 'danger',
-            'On Hold': 'warning'
+            'On Hold': 'warning',
+            'Blocked': 'dark'
         }
         return status_map.get(status, 'secondary')
     
@@ -81,29 +107,37 @@ def create_app(config_name="production"):
     from app.routes.admin_routes import admin_bp
     from app.routes.company_routes import company_bp
     from app.routes.main_routes import main_bp
+    from app.routes.health_routes import health_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(company_bp)
     app.register_blueprint(main_bp)
     
-    # Register health check blueprint
-    try:
-        from health_check import health_bp
-        app.register_blueprint(health_bp)
-    except ImportError:
-        # Health check blueprint is optional
-        pass
+    # /livez, /readyz (and /health) probes
+    app.register_blueprint(health_bp)
+
+    # Fingerprinted, immutable static URLs (url_for('static', ...))
+    from app.http_cache import setup_http_cache
+    setup_http_cache(app)
     
     # Setup session protection middleware
     setup_session_protection(app)
+
+    # Server-side session storage when SESSION_BACKEND is database/filesystem
+    from app.sessions import setup_sessions
+    setup_sessions(app)
+    
+    # Custom Flask CLI commands (flask notify-due, flask onboard-companies, ...)
+    register_cli(app)
     
     # Add cache control headers to prevent stale data
     @app.after_request
     def add_cache_control_headers(response):
         """Add cache control headers to prevent browser caching of dynamic content"""
-        # Don't cache HTML pages (especially admin pages)
-        if response.content_type and 'text/html' in response.content_type:
+        # Don't cache HTML pages (especially admin pages), except those that
+        # revalidate with an ETag (@conditional_page)
+        if response.content_type and 'text/html' in response.content_type and 'ETag' not in response.headers:
             response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
             response.headers['Pragma'] = 'no-cache'
             response.headers['Expires'] = '0'
@@ -117,6 +151,8 @@ def register_cli(app: Flask) -> None:
     import click
     from werkzeug.security import generate_password_hash
 
+    from app.metrics import track_job
+
     @click.option("--email", default="admin@ptsa.com")
     @click.option("--password", default="Admin123!")
     @app.cli.command("seed-admin")
@@ -139,6 +175,66 @@ def register_cli(app: Flask) -> None:
             db.session.commit()
             click.echo(f"Created admin: {email}")
 
+    @click.argument("file", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--dry-run", is_flag=True,
+                  help="Validate and report; roll back instead of committing.")
+    @app.cli.command("onboard-companies")
+    def onboard_companies_command(file: str, dry_run: bool):
+        """
+        Onboard a cohort of member companies from a CSV or XLSX spreadsheet.
+        Columns: name, login_email, login_password, region, industry_category,
+        tech_resources, human_resources, membership, phone, measures (';'-separated ids or names).
+        """
+        from app.utils.assignments import onboard_companies, read_onboarding_file
+
+        rows = read_onboarding_file(file)
+        result = onboard_companies(rows)
+
+        for err in result["errors"]:
+            click.echo(f"Row {err['row'] + 2}: {err['name'] or '(no name)'} — {err['error']}")
+        for entry in result["created"]:
+            skipped = f" (unknown measures: {', '.join(entry['skipped_measures'])})" if entry["skipped_measures"] else ""
+            click.echo(
+                f"{'[DRY-RUN] ' if dry_run else ''}Created company #{entry['company_id']} {entry['name']}, "
+                f"user #{entry['user_id']}, {len(entry['assignment_ids'])} assignment(s){skipped}"
+            )
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        click.echo(
+            f"{'(DRY-RUN) ' if dry_run else ''}"
+            f"Companies created: {len(result['created'])}. Rows rejected: {len(result['errors'])}."
+        )
+
+    @click.option("--dry-run", is_flag=True,
+                  help="Report drifted assignments; roll back instead of committing.")
+    @app.cli.command("rebuild-step-counters")
+    @track_job("rebuild-step-counters")
+    def rebuild_step_counters_command(dry_run: bool):
+        """Recount steps_total / steps_completed on every assignment from its step rows."""
+        from app.utils.assignments import rebuild_step_counters
+
+        fixed = rebuild_step_counters()
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        click.echo(f"{'(DRY-RUN) ' if dry_run else ''}Assignments with drifted step counters: {fixed}")
+
+    @app.cli.command("purge-sessions")
+    @track_job("purge-sessions")
+    def purge_sessions():
+        """Delete expired server-side sessions (SESSION_BACKEND=database/filesystem)."""
+        from app.sessions import make_store
+
+        store = make_store(app)
+        if store is None:
+            click.echo("SESSION_BACKEND is 'cookie'; nothing stored server-side.")
+            return
+        click.echo(f"Expired sessions removed: {store.purge()}")
+
     # Put @click.option ABOVE @app.cli.command so options are recognized
     @click.option("--days", type=int, default=None,
                   help="Override lead days (defaults to DB setting).")
@@ -149,21 +245,19 @@ def register_cli(app: Flask) -> None:
     @click.option("--ignore-config-time", is_flag=True,
                   help="Ignore configured send time (send immediately).")
     @app.cli.command("notify-due")
+    @track_job("notify-due")
     def notify_due(days: int | None, dry_run: bool, no_email: bool, ignore_config_time: bool):
         """
         Create 'due soon' notifications and optionally email company users.
         Respects NotificationConfig (lead days + daily send time in UTC) by default.
         """
-        from app.models import MeasureAssignment, Notification, User, NotificationConfig
+        from app.models import MeasureAssignment, Notification, User
+        from app.reference_data import notification_config_snapshot
 
         now = datetime.utcnow()
 
-        # Load or seed config
-        cfg = NotificationConfig.query.get(1)
-        if not cfg:
-            cfg = NotificationConfig(id=1)  # defaults: lead_days=7, 07:00Z
-            db.session.add(cfg)
-            db.session.commit()
+        # Load or seed config (defaults: lead_days=7, 07:00Z)
+        cfg = notification_config_snapshot()
 
         # Enforce scheduled send time unless overridden
         if not ignore_config_time:
@@ -183,6 +277,7 @@ def register_cli(app: Flask) -> None:
         q = (
             MeasureAssignment.query
             .filter(MeasureAssignment.company_id.isnot(None))
+            .filter(MeasureAssignment.status != "Completed")
             .filter(MeasureAssignment.due_at.isnot(None))
             .filter(MeasureAssignment.due_at >= now)
             .filter(MeasureAssignment.due_at < horizon)
@@ -192,9 +287,6 @@ def register_cli(app: Flask) -> None:
         email_jobs: list[tuple[str, str, str]] = []
 
         for a in q.all():
-            if (a.status or "").lower() == "completed":
-                continue
-
             exists = Notification.query.filter_by(assignment_id=a.id, kind=kind).first()
             if exists:
                 continue
@@ -1,6 +1,8 @@
 import click
 from flask import current_app
 from flask.cli import with_appcontext
+
+from app.metrics import track_job
 from app.extensions import db
 from app.models import User, Company, Measure, MeasureAssignment, AssignmentStep
 from werkzeug.security import generate_password_hash
@@ -276,6 +278,7 @@ def seed_assignments():
 
 @click.command('send-benchmarking-reminders')
 @with_appcontext
+@track_job('send-benchmarking-reminders')
 def send_benchmarking_reminders():
     """Send benchmarking reminder emails to companies that are due for updates."""
     from datetime import datetime, timedelta
@@ -0,0 +1,198 @@
+"""
+Response compression and precompressed static files
+
+Dynamic responses
+    setup_compression() registers an after_request hook. It gzips a response,
+    or brotli-compresses it when the ``brotli`` package is installed and the
+    client prefers it, if all of these hold:
+
+    - the client accepts the encoding;
+    - the content type is on COMPRESS_MIMETYPES;
+    - the body is at least COMPRESS_MIN_SIZE bytes.
+
+    Streamed and file responses, such as CSV exports, are compressed as they
+    are produced. Output is sync-flushed once COMPRESS_STREAM_BUFFER bytes of
+    input (default 16 KiB) have accumulated, or when a chunk arrives more
+    than COMPRESS_STREAM_FLUSH_SECONDS after the last flush. A flush per
+    small chunk (one CSV row, say) would cost more bytes than it saves,
+    while slow streams still reach the client promptly.
+
+Static files
+    ``python compress_static.py`` (run by render-build.sh and the Dockerfile)
+    writes ``.gz`` and ``.br`` files next to each compressible file in
+    app/static, at maximum compression. send_precompressed() serves those to
+    clients that accept them, so static files are never compressed per
+    request.
+"""
+import gzip
+import mimetypes
+import os
+import time
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+)
+STATIC_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+
+
+def _choose_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br'] and accepted['br'] >= accepted['gzip']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=current_app.config.get('COMPRESS_BR_QUALITY', 4))
+    return gzip.compress(data, compresslevel=current_app.config.get('COMPRESS_GZIP_LEVEL', 6))
+
+
+def _as_bytes(chunks: Iterable) -> Iterator[bytes]:
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if chunk:
+            yield chunk
+
+
+def _compress_stream(chunks: Iterable, encoding: str, level: int, quality: int,
+                     buffer_size: int = 16384, flush_seconds: float = 1.0) -> Iterator[bytes]:
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=quality)
+        compress, sync_flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+        compress, finish = compressor.compress, compressor.flush
+        sync_flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+    try:
+        pending = 0  # input bytes since the last flush
+        last_flush = time.monotonic()
+        for chunk in _as_bytes(chunks):
+            out = compress(chunk)
+            pending += len(chunk)
+            if pending >= buffer_size or time.monotonic() - last_flush >= flush_seconds:
+                out += sync_flush()
+                pending = 0
+                last_flush = time.monotonic()
+            if out:
+                yield out
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+def setup_compression(app: Flask) -> None:
+    """Compress eligible responses (COMPRESS_ENABLED, default on)"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    mimetypes_allowed = set(app.config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES))
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+
+    @app.after_request
+    def compress_response(response: Response):
+        if (
+            request.method == 'HEAD'
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in mimetypes_allowed
+        ):
+            return response
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        streamed = response.is_streamed or response.direct_passthrough
+        if streamed:
+            body = response.response
+            response.direct_passthrough = False
+            response.response = _compress_stream(
+                body, encoding,
+                app.config.get('COMPRESS_GZIP_LEVEL', 6), app.config.get('COMPRESS_BR_QUALITY', 4),
+                app.config.get('COMPRESS_STREAM_BUFFER', 16384),
+                app.config.get('COMPRESS_STREAM_FLUSH_SECONDS', 1.0),
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(_compress_bytes(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Accept-Ranges', None)  # ranges would address the compressed bytes
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def _is_fresh(path: str, suffix: str) -> bool:
+    """The sibling exists and was written after the file was last edited"""
+    try:
+        return os.path.getmtime(path + suffix) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+
+def send_precompressed(directory: str, filename: str, **kwargs) -> Response:
+    """send_from_directory(), using a .br/.gz sibling when the client accepts it"""
+    encoding = None
+    accepted = request.accept_encodings
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[candidate] and _is_fresh(os.path.join(directory, filename), suffix):
+            encoding = candidate
+            break
+
+    if encoding is None:
+        response = send_from_directory(directory, filename, **kwargs)
+    else:
+        suffix = '.br' if encoding == 'br' else '.gz'
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(directory, filename + suffix, mimetype=mimetype, **kwargs)
+        # The sibling file's own ETag already differs from the original's,
+        # and send_from_directory() has answered If-None-Match with it
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def precompress_static(static_folder: str, verbose: bool = False) -> int:
+    """Write .gz (and .br when brotli is installed) next to compressible static files"""
+    written = 0
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if not name.endswith(STATIC_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', brotli.compress(data, quality=11)))
+            for suffix, compressed in variants:
+                if len(compressed) >= len(data):
+                    continue  # not worth serving
+                with open(path + suffix, 'wb') as fh:
+                    fh.write(compressed)
+                written += 1
+                if verbose:
+                    rel = os.path.relpath(path, static_folder)
+                    print(f"   {rel}{suffix}: {len(data)} -> {len(compressed)} bytes")
+    return written
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -11,11 +12,21 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # Most measures taken from one uploaded document; pattern matching stops
+    # reading the document once it has found them (0 = no limit)
+    PARSER_MAX_MEASURES = int(os.environ.get('PARSER_MAX_MEASURES', 100))
     
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=4)
-    SESSION_REFRESH_EACH_REQUEST = True
+    # The cookie is only re-sent when the session changes; activity is
+    # recorded at most every SESSION_ACTIVITY_REFRESH_MINUTES, which also
+    # extends the cookie's expiry (app/middleware.py)
+    SESSION_REFRESH_EACH_REQUEST = False
+    SESSION_ACTIVITY_REFRESH_MINUTES = int(os.environ.get('SESSION_ACTIVITY_REFRESH_MINUTES', 5))
     MAX_SESSION_IDLE_MINUTES = 240  # 4 hours
+    # 'cookie' (signed client-side, default), 'database' or 'filesystem' (app/sessions.py)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cookie').lower()
+    SESSION_FILE_DIR = os.environ.get('SESSION_FILE_DIR') or os.path.join(basedir, 'instance', 'sessions')
     
     # Flask-Login settings
     REMEMBER_COOKIE_DURATION = timedelta(days=7)
@@ -33,32 +44,64 @@ class Config:
     MAIL_TIMEOUT = 30  # 30 second timeout to prevent Gunicorn worker timeout
 
     # Database configuration with PostgreSQL support for production
+    # (create_app logs the resolved URL once, with the password masked; pool
+    # and SQLite connection settings live in app/database.py)
     database_url_raw = os.environ.get('DATABASE_URL')
-    print(f"🔍 DATABASE_URL from environment: {database_url_raw}")
     
     if database_url_raw:
         # Production database (PostgreSQL on Render)
         SQLALCHEMY_DATABASE_URI = database_url_raw.replace('postgres://', 'postgresql://')
-        print(f"🔗 Using PostgreSQL database: {SQLALCHEMY_DATABASE_URI}")
     else:
         # Development database (SQLite)
         SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, 'instance', 'ptsa.db')}"
-        print(f"📁 Using SQLite database: {SQLALCHEMY_DATABASE_URI}")
-    
-    # Ensure PostgreSQL connection is properly configured
-    if SQLALCHEMY_DATABASE_URI.startswith('postgresql://'):
-        SQLALCHEMY_ENGINE_OPTIONS = {
-            'pool_size': 10,
-            'pool_recycle': 60,
-            'pool_pre_ping': True
-        }
+
+    # Optional read replica for exports and reports (the 'read' bind)
+    DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL')
+    # Users who just saved something read from the primary for this long
+    READ_REPLICA_LAG_SECONDS = int(os.environ.get('READ_REPLICA_LAG_SECONDS', 10))
+
+    # Query profiler (app/query_profiler.py); admins can also opt in per
+    # request with the X-Profile-Queries header
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', 'false').lower() in ['true', 'on', '1']
+    QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5))
+
+    # Bearer token for GET /metrics (app/metrics.py). Without one the endpoint
+    # answers 403 outside debug mode, unless METRICS_PUBLIC opts out (e.g. when
+    # only a private network can reach it)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() in ['true', 'on', '1']
+    # Where every process, web workers and CLI jobs alike, writes its metrics
+    # snapshot; the same default as gunicorn.conf.py
+    PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR') or \
+        os.path.join(tempfile.gettempdir(), 'ptsa-metrics')
+    # /readyz re-runs its SELECT 1 at most this often per process
+    READINESS_CACHE_SECONDS = int(os.environ.get('READINESS_CACHE_SECONDS', 5))
+
+    # Response compression (app/compression.py). Bodies under COMPRESS_MIN_SIZE
+    # bytes are sent as-is; streamed responses are always compressed.
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BR_QUALITY = int(os.environ.get('COMPRESS_BR_QUALITY', 4))
+    # Streamed responses are flushed to the client every COMPRESS_STREAM_BUFFER
+    # input bytes, or on the next chunk once COMPRESS_STREAM_FLUSH_SECONDS passed
+    COMPRESS_STREAM_BUFFER = int(os.environ.get('COMPRESS_STREAM_BUFFER', 16384))
+    COMPRESS_STREAM_FLUSH_SECONDS = float(os.environ.get('COMPRESS_STREAM_FLUSH_SECONDS', 1.0))
+
+    # {% cache %} template fragments (app/fragment_cache.py): memory, sqlite,
+    # redis or none
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    FRAGMENT_CACHE_PATH = os.environ.get('FRAGMENT_CACHE_PATH') or \
+        os.path.join(tempfile.gettempdir(), 'ptsa-fragments.db')
+    FRAGMENT_CACHE_URL = os.environ.get('FRAGMENT_CACHE_URL') or os.environ.get('REDIS_URL')
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 600))
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 512))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     # Use SQLite database in instance folder
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{basedir}/instance/ptsa_dev.db'
-    print(f"📁 Development config using: {SQLALCHEMY_DATABASE_URI}")
     REMEMBER_COOKIE_SECURE = False
 
 class TestingConfig(Config):
@@ -73,7 +116,6 @@ class ProductionConfig(Config):
     DEBUG = False
     # Use SQLite database in instance folder for production
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{basedir}/instance/ptsa.db'
-    print(f"🏭 Production config using: {SQLALCHEMY_DATABASE_URI}")
     
     # Production security settings
     REMEMBER_COOKIE_SECURE = False  # Set to False for HTTP in container
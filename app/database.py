@@ -0,0 +1,297 @@
+"""
+Engine configuration for the primary database and the optional read replica
+
+configure_engines() runs before db.init_app() and fills in
+SQLALCHEMY_ENGINE_OPTIONS and SQLALCHEMY_BINDS from the environment;
+instrument_engines() runs after it and attaches connect/pool listeners.
+
+PostgreSQL pools are sized per process. gunicorn.conf.py exports
+DB_POOL_SIZE to match its worker profile (1 for sync workers, one per thread
+for gthread) so that workers x (pool + overflow) stays within
+DB_MAX_CONNECTIONS. Connections are recycled every DB_POOL_RECYCLE seconds
+(default 30 minutes) and pinged on checkout, rather than reconnecting every
+minute.
+
+SQLite connections are switched to WAL with synchronous=NORMAL, a busy
+timeout and memory-mapped reads, so concurrent workers read while one writes
+instead of failing with "database is locked".
+
+Environment:
+    DB_POOL_SIZE            Connections kept per process (default 10)
+    DB_MAX_OVERFLOW         Extra connections allowed under burst (default 2)
+    DB_POOL_TIMEOUT         Seconds to wait for a free connection (default 10)
+    DB_POOL_RECYCLE         Reconnect connections older than this (default 1800)
+    SQLITE_BUSY_TIMEOUT_MS  Wait this long for a write lock (default 5000)
+    SQLITE_MMAP_SIZE        Bytes of the database file to mmap (default 256 MiB)
+    DATABASE_READ_URL       Read replica, registered as the 'read' bind
+    READ_REPLICA_LAG_SECONDS  Keep a user on the primary this long after
+                            they write (default 10)
+
+Routing to the replica is opt-in: wrap code in ``db.bind_for('read')`` or
+decorate a view with ``@reads_from_replica``. Flushes and INSERT/UPDATE/
+DELETE statements always go to the primary, and once a session has written
+it reads from the primary too. Without DATABASE_READ_URL everything runs
+on the primary, so two SQLite files (copy ptsa.db to a replica path) are
+enough to try it locally.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from flask import Flask, current_app, has_request_context, session
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as _FlaskSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+READ_BIND = 'read'
+
+# Bind that queries in the current context are routed to (None = default)
+_bind_override: ContextVar[Optional[str]] = ContextVar('bind_override', default=None)
+
+_metrics: Dict[str, Dict[str, Any]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _normalize_url(url: str) -> str:
+    # Heroku/Render still hand out postgres:// URLs, which SQLAlchemy 1.4+ rejects
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Engine keyword arguments appropriate for the given database URL"""
+    backend = make_url(url).get_backend_name()
+
+    if backend == 'sqlite':
+        # pysqlite's timeout is its busy handler; the PRAGMA in _sqlite_on_connect
+        # sets the same value for connections opened by other drivers
+        return {'connect_args': {'timeout': _sqlite_busy_timeout_ms() / 1000}}
+
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+
+
+def configure_engines(app: Flask) -> None:
+    """Fill in engine options and the read-replica bind before db.init_app()"""
+    uri = _normalize_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+
+    # Explicit options from the config class win over the computed defaults
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(uri),
+        **(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}),
+    }
+
+    read_url = app.config.get('DATABASE_READ_URL') or os.environ.get('DATABASE_READ_URL')
+    if read_url:
+        read_url = _normalize_url(read_url)
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(READ_BIND, {'url': read_url, **engine_options(read_url)})
+        app.config['SQLALCHEMY_BINDS'] = binds
+        app.logger.info(
+            "Read replica: %s", make_url(read_url).render_as_string(hide_password=True)
+        )
+
+
+def instrument_engines(app: Flask) -> None:
+    """Attach SQLite tuning and pool metrics to every engine after db.init_app()"""
+    from app.extensions import db
+
+    with app.app_context():
+        engines = dict(db.engines)
+
+    for key, engine in engines.items():
+        name = key or 'primary'
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _sqlite_on_connect)
+        _track_pool(name, engine)
+
+
+def _sqlite_busy_timeout_ms() -> int:
+    return int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+
+def _sqlite_on_connect(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {_sqlite_busy_timeout_ms()}")
+        # WAL is persistent in the database file; in-memory databases ignore it
+        cursor.execute("PRAGMA journal_mode = WAL")
+        # Safe with WAL: a crash can lose the last commits but never corrupts
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute(f"PRAGMA mmap_size = {int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}")
+    finally:
+        cursor.close()
+
+
+def _track_pool(name: str, engine: Engine) -> None:
+    """Count connects, checkouts and hold times for pool_metrics()"""
+    stats = {
+        'connects': 0,
+        'checkouts': 0,
+        'checked_out': 0,
+        'peak_checked_out': 0,
+        'invalidations': 0,
+        'hold_seconds_total': 0.0,
+        'hold_seconds_max': 0.0,
+    }
+    with _metrics_lock:
+        _metrics[name] = {'engine': engine, 'stats': stats}
+
+    capacity = None
+    if hasattr(engine.pool, 'size') and hasattr(engine.pool, '_max_overflow'):
+        capacity = engine.pool.size() + max(0, engine.pool._max_overflow)
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        with _metrics_lock:
+            stats['connects'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+        with _metrics_lock:
+            stats['checkouts'] += 1
+            stats['checked_out'] += 1
+            stats['peak_checked_out'] = max(stats['peak_checked_out'], stats['checked_out'])
+            exhausted = capacity is not None and stats['checked_out'] >= capacity
+        if exhausted:
+            logger.warning(
+                f"Database pool '{name}' fully checked out ({capacity} connections); "
+                f"further requests wait up to the pool timeout"
+            )
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop('checked_out_at', None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        with _metrics_lock:
+            stats['checked_out'] = max(0, stats['checked_out'] - 1)
+            stats['hold_seconds_total'] += held
+            stats['hold_seconds_max'] = max(stats['hold_seconds_max'], held)
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with _metrics_lock:
+            stats['invalidations'] += 1
+
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Snapshot of pool usage for this process, keyed by bind ('primary', 'read')
+
+    Counters are cumulative since the process started; ``status`` is the
+    pool's own one-line summary (size, checked in/out, overflow).
+    """
+    with _metrics_lock:
+        snapshot = {}
+        for name, entry in _metrics.items():
+            stats = dict(entry['stats'])
+            checkouts = stats['checkouts'] or 1
+            stats['hold_ms_avg'] = round(stats['hold_seconds_total'] / checkouts * 1000, 2)
+            stats['hold_ms_max'] = round(stats.pop('hold_seconds_max') * 1000, 2)
+            stats.pop('hold_seconds_total')
+            stats['status'] = entry['engine'].pool.status()
+            snapshot[name] = stats
+        return snapshot
+
+
+def read_engine() -> Optional[Engine]:
+    """The replica engine, or None when DATABASE_READ_URL is not configured"""
+    from app.extensions import db
+
+    return db.engines.get(READ_BIND)
+
+
+class RoutingSession(_FlaskSession):
+    """Session that sends reads to the bind chosen by db.bind_for()"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if getattr(clause, 'is_dml', False):
+            # update()/delete() statements bypass the flush
+            self.info['wrote'] = True
+        name = _bind_override.get()
+        if name and bind is None and not self._flushing and not self.info.get('wrote'):
+            engine = self._db.engines.get(name)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session_, flush_context):
+    session_.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_user_write(session_):
+    # Remembered in the user's cookie so their next requests skip the replica
+    # until it has had time to catch up with what they just saved
+    if session_.info.get('wrote') and has_request_context() and read_engine() is not None:
+        session['_db_wrote_at'] = time.time()
+
+
+def _recently_wrote() -> bool:
+    wrote_at = session.get('_db_wrote_at') if has_request_context() else None
+    if not wrote_at:
+        return False
+    lag = current_app.config.get('READ_REPLICA_LAG_SECONDS', 10)
+    return time.time() - wrote_at < lag
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy extension with per-context read routing"""
+
+    def __init__(self, *args, **kwargs):
+        session_options = kwargs.setdefault('session_options', {})
+        session_options.setdefault('class_', RoutingSession)
+        super().__init__(*args, **kwargs)
+
+    @contextmanager
+    def bind_for(self, name: str):
+        """
+        Route reads inside the block to the named bind
+
+        Falls back to the primary when the bind is not configured, so callers
+        need not check for a replica first.
+        """
+        token = _bind_override.set(name)
+        try:
+            yield
+        finally:
+            _bind_override.reset(token)
+
+
+def reads_from_replica(view):
+    """
+    Run a read-only view against the replica
+
+    Users who wrote within READ_REPLICA_LAG_SECONDS stay on the primary so
+    they see their own changes.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if _recently_wrote():
+            return view(*args, **kwargs)
+        from app.extensions import db
+
+        with db.bind_for(READ_BIND):
+            return view(*args, **kwargs)
+
+    return wrapper
@@ -1,10 +1,11 @@
 # app/extensions.py
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 
-# Initialize extensions
-db = SQLAlchemy()
+from app.database import RoutingSQLAlchemy
+
+# Initialize extensions (db.bind_for('read') routes reads to the replica)
+db = RoutingSQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 
@@ -15,6 +16,16 @@ login_manager.login_message_category = "warning"
 # Mail is optional; we don't require flask_mail at import time
 try:
     from flask_mail import Mail
-    mail = Mail()
+
+    class InstrumentedMail(Mail):
+        """Flask-Mail with send latency/failure metrics"""
+
+        def send(self, message):
+            from app.metrics import track_email
+
+            with track_email('smtp'):
+                return super().send(message)
+
+    mail = InstrumentedMail()
 except Exception:
     mail = None  # not installed / not used
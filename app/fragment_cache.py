@@ -0,0 +1,350 @@
+"""
+Jinja fragment cache
+
+Wrap an expensive template section in ``{% cache key, ttl %}``:
+
+    {% cache ['dashboard-summary', company_version(company.id), today], 600 %}
+      ... progress bars, status tallies, step lists ...
+    {% endcache %}
+
+The key can be any value or list of values. ORM objects in it stand for
+``(table, id, updated_at)``. A change to the row therefore gives a new key,
+and the old entry simply ages out; nothing is ever deleted explicitly. The
+template location and the release id are part of every key, so a deploy never
+serves fragments rendered by older templates. ``ttl`` is in seconds and
+defaults to FRAGMENT_CACHE_TTL.
+
+Keys are usually built from one of two helpers, both available in templates:
+
+- ``company_version(company_id)``: changes whenever the company, its
+  assignments (including soft deletes), their steps or any measure changes.
+- ``table_version('measures', ...)``: row count and latest ``updated_at``
+  for whole tables, for pages such as the measures list.
+
+Each runs one aggregate query, at most once per request and again after a
+commit.
+
+Stores (FRAGMENT_CACHE_BACKEND):
+
+    memory  per-process LRU of FRAGMENT_CACHE_MAX_ENTRIES entries (default)
+    sqlite  shared by all workers on one machine through the SQLite file at
+            FRAGMENT_CACHE_PATH; the local stand-in for Redis, with nothing
+            else to install or run
+    redis   shared by all workers; FRAGMENT_CACHE_URL points at Redis or any
+            server speaking its protocol (Valkey, KeyDB). Needs the optional
+            ``redis`` package.
+    none    caching disabled; also the case in debug mode, where templates
+            change under a running server
+
+A store error is logged and treated as a miss; it never breaks a page.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional
+
+from flask import Flask, current_app, g, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+except ImportError:  # optional; only needed for FRAGMENT_CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStore:
+    """Thread-safe LRU with per-entry expiry, private to one process"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteStore:
+    """Entries in a local SQLite file, shared by every process that opens it
+
+    The same get/set(ttl) interface as RedisStore. Each thread keeps its own
+    connection (per process, so forked workers never share one). The file is
+    in WAL mode, so readers do not block the occasional writer. Expired rows
+    are deleted every PRUNE_EVERY writes, and the oldest rows go once there
+    are more than ``max_entries``.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 512):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fragments "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; a short busy timeout so a locked file is a miss, not a stall
+        return sqlite3.connect(self.path, timeout=0.5, isolation_level=None, check_same_thread=False)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn = self._connect()
+            local.pid = os.getpid()
+        return local.conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value FROM fragments WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        conn = self._conn
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO fragments (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, now + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM fragments WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM fragments WHERE key IN "
+                "(SELECT key FROM fragments ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+class RedisStore:
+    """Entries in Redis (or a compatible server), shared by all workers"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisStore':
+        if redis is None:
+            raise RuntimeError("FRAGMENT_CACHE_BACKEND=redis needs the 'redis' package")
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self.client.set(key, value, ex=ttl)
+
+
+def _key_part(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(v) for v in value)
+    table = getattr(value, '__tablename__', None)
+    if table is not None:
+        from sqlalchemy import inspect
+        identity = inspect(value).identity
+        return (table, identity, getattr(value, 'updated_at', None))
+    return value
+
+
+def fragment_key(location: str, key) -> str:
+    release = current_app.config.get('RELEASE_ID', '')
+    digest = hashlib.sha1(repr((location, _key_part(key))).encode('utf-8')).hexdigest()
+    return f"fragment:{release}:{digest}"
+
+
+def bypass_fragment_cache() -> None:
+    """Render every fragment from scratch for the rest of this request
+
+    For fallback renders after an error, whose fragments must not be stored
+    under the normal keys.
+    """
+    g._fragment_cache_bypass = True
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache key[, ttl] %} ... {% endcache %}``"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        location = nodes.Const(f"{parser.name}:{lineno}")
+        key = parser.parse_expression()
+        ttl = parser.parse_expression() if parser.stream.skip_if('comma') else nodes.Const(None)
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render', [location, key, ttl]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, location, key, ttl, caller):
+        store = current_app.extensions.get('fragment_cache')
+        if store is None or g.get('_fragment_cache_bypass'):
+            return caller()
+        from app.metrics import inc
+
+        cache_key = fragment_key(location, key)
+        try:
+            cached = store.get(cache_key)
+        except Exception as e:
+            logger.warning("Fragment cache read failed: %s", e)
+            cached = None
+        if cached is not None:
+            inc('ptsa_fragment_cache_requests_total', result='hit')
+            return Markup(cached)
+
+        inc('ptsa_fragment_cache_requests_total', result='miss')
+        rendered = caller()
+        try:
+            store.set(cache_key, str(rendered), int(ttl or current_app.config.get('FRAGMENT_CACHE_TTL', 600)))
+        except Exception as e:
+            logger.warning("Fragment cache write failed: %s", e)
+        return rendered
+
+
+def _memoized(name: str, args: tuple, compute):
+    """Once per request; CLI jobs and other long-lived contexts always recompute"""
+    if not has_request_context():
+        return compute()
+    versions = g.setdefault('_fragment_versions', {})
+    key = (name, args)
+    if key not in versions:
+        versions[key] = compute()
+    return versions[key]
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_versions(session):
+    # A request that commits and then renders must see its own changes
+    if has_request_context():
+        g.pop('_fragment_versions', None)
+
+
+def company_version(company_id: int) -> tuple:
+    """Changes whenever anything a company's pages show about it changes"""
+    from sqlalchemy import func, select
+
+    from app.extensions import db
+    from app.models import AssignmentStep, Company, Measure, MeasureAssignment
+
+    def compute():
+        assignments = select(MeasureAssignment.id).where(MeasureAssignment.company_id == company_id)
+        statement = select(
+            select(Company.updated_at).where(Company.id == company_id).scalar_subquery(),
+            select(func.count(MeasureAssignment.id))
+            .where(MeasureAssignment.company_id == company_id).scalar_subquery(),
+            select(func.max(MeasureAssignment.updated_at))
+            .where(MeasureAssignment.company_id == company_id).scalar_subquery(),
+            select(func.max(AssignmentStep.updated_at))
+            .where(AssignmentStep.assignment_id.in_(assignments)).scalar_subquery(),
+            select(func.max(Measure.updated_at)).scalar_subquery(),
+        ).execution_options(include_deleted=True)
+        return tuple(db.session.execute(statement).one())
+
+    return _memoized('company', (company_id,), compute)
+
+
+def table_version(*tables) -> tuple:
+    """(row count, latest updated_at) for whole tables, given as models or table names"""
+    from sqlalchemy import func, select
+
+    from app.extensions import db
+
+    resolved = [db.metadata.tables[t] if isinstance(t, str) else t.__table__ for t in tables]
+
+    def compute():
+        columns = []
+        for table in resolved:
+            columns.append(select(func.count()).select_from(table).scalar_subquery())
+            columns.append(select(func.max(table.c.updated_at)).scalar_subquery())
+        return tuple(db.session.execute(select(*columns)).one())
+
+    return _memoized('tables', tuple(t.name for t in resolved), compute)
+
+
+class Deferred:
+    """A list computed on first use
+
+    Lets a view hand a query to a template without running it when the
+    template serves the only section that reads it from the fragment cache.
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._items = None
+
+    def _get(self) -> list:
+        if self._items is None:
+            self._items = list(self._load())
+        return self._items
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __bool__(self):
+        return bool(self._get())
+
+    def __getitem__(self, index):
+        return self._get()[index]
+
+
+def make_store(app: Flask):
+    backend = 'none' if app.debug else app.config.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    if backend == 'memory':
+        return MemoryStore(app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 512))
+    if backend == 'sqlite':
+        return SQLiteStore(app.config['FRAGMENT_CACHE_PATH'], app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 512))
+    if backend == 'redis':
+        return RedisStore.from_url(app.config['FRAGMENT_CACHE_URL'])
+    if backend == 'none':
+        return None
+    raise ValueError(f"Unknown FRAGMENT_CACHE_BACKEND {backend!r}; use memory, sqlite, redis or none")
+
+
+def setup_fragment_cache(app: Flask) -> None:
+    """Register the {% cache %} tag and the key helpers"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.add_template_global(company_version)
+    app.add_template_global(table_version)
+
+    store = make_store(app)
+    if store is not None:
+        app.extensions['fragment_cache'] = store
+        app.logger.info("Fragment cache: %s", type(store).__name__)
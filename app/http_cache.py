@@ -0,0 +1,130 @@
+"""
+HTTP caching: fingerprinted static assets and conditional GETs
+
+Static assets
+    At startup every file under app/static is hashed. ``url_for('static',
+    filename='css/app.css')`` then produces ``/static/css/app.<hash>.css``. A
+    fingerprinted URL never changes content, so it is served with
+    ``Cache-Control: public, max-age=31536000, immutable``. Unhashed URLs are
+    still served, revalidated by ETag as before. Fingerprinting is off in
+    debug mode, where files change under a running server. Both kinds are
+    served from precompressed .br/.gz siblings when present (see
+    app/compression.py).
+
+Conditional GETs
+    ``@conditional_page(version_func)`` computes an ETag from a few cheap
+    queries (``version_func`` gets the view's arguments) before the view runs.
+    When it matches the browser's If-None-Match, the response is a bodiless
+    304 and the template is never rendered. The release id, the current user
+    and the page's data versions all go into the ETag. Pages with pending
+    flash messages are always rendered.
+"""
+import hashlib
+import os
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from flask import Flask, current_app, make_response, request, session
+from flask_login import current_user
+
+from app.compression import send_precompressed
+
+ONE_YEAR = 365 * 24 * 3600
+PRECOMPRESSED_SUFFIXES = ('.gz', '.br')  # written by compress_static.py
+
+
+def _fingerprint(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def build_manifest(static_folder: str) -> Dict[str, str]:
+    """Map 'css/app.css' -> 'css/app.<hash>.css' for every static file"""
+    manifest = {}
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(PRECOMPRESSED_SUFFIXES):
+                continue
+            full = os.path.join(root, name)
+            rel = os.path.relpath(full, static_folder).replace(os.sep, '/')
+            stem, ext = os.path.splitext(rel)
+            manifest[rel] = f"{stem}.{_fingerprint(full)}{ext}"
+    return manifest
+
+
+def _release_id(app: Flask, manifest: Dict[str, str]) -> str:
+    """Changes whenever deployed code, templates or assets may have changed"""
+    commit = os.environ.get('RENDER_GIT_COMMIT') or os.environ.get('SOURCE_VERSION')
+    if commit:
+        return commit[:12]
+    digest = hashlib.sha256(repr(sorted(manifest.items())).encode())
+    template_root = os.path.join(app.root_path, app.template_folder or 'templates')
+    for root, _, files in os.walk(template_root):
+        for name in files:
+            digest.update(f"{name}:{os.path.getmtime(os.path.join(root, name))}".encode())
+    return digest.hexdigest()[:12]
+
+
+def setup_http_cache(app: Flask) -> None:
+    """Fingerprint static URLs and serve fingerprinted files as immutable"""
+    manifest = {} if app.debug or not app.static_folder else build_manifest(app.static_folder)
+    originals = {hashed: rel for rel, hashed in manifest.items()}
+    app.extensions['static_manifest'] = manifest
+    app.config.setdefault('RELEASE_ID', _release_id(app, manifest))
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.get(values['filename'], values['filename'])
+
+    def static(filename):
+        original = originals.get(filename)
+        if original is None:
+            return send_precompressed(app.static_folder, filename,
+                                      max_age=app.get_send_file_max_age(filename))
+        response = send_precompressed(app.static_folder, original, max_age=ONE_YEAR)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
+
+
+def conditional_page(version_func: Callable[..., Optional[tuple]]):
+    """
+    Answer GETs with 304 Not Modified while the page's data is unchanged
+
+    ``version_func`` receives the view's arguments and returns a tuple of
+    values that change whenever the rendered page would (typically counts
+    and ``max(updated_at)``), or None to skip caching for this request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            parts = version_func(*args, **kwargs)
+            if parts is None:
+                return view(*args, **kwargs)
+
+            user = current_user.get_id() if current_user.is_authenticated else None
+            key = repr((current_app.config.get('RELEASE_ID'), request.full_path, user, parts))
+            etag = hashlib.sha256(key.encode()).hexdigest()[:24]
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Stored, but revalidated on every use (see add_cache_control_headers)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,357 @@
+"""
+Prometheus-style metrics without an external client library
+
+Counters and histograms live in a small in-process registry; recording one
+sample is a dict update under a lock. ``GET /metrics`` renders them in the
+Prometheus text format, together with database pool usage and the
+notification outbox depth sampled at scrape time.
+
+Gunicorn runs several worker processes and a scrape reaches only one of
+them. When PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py and the app
+config default it to <tmp>/ptsa-metrics, so CLI jobs share the web workers'
+directory), every process writes a JSON snapshot of its registry there within
+METRICS_FLUSH_SECONDS of recording a sample (from a timer thread, not the
+request) and when it exits. The worker serving the scrape sums
+all snapshots. Counters from processes that have exited, including CLI jobs
+such as ``flask notify-due``, are still counted. Gauges are only taken from
+processes that are still alive.
+
+Set METRICS_TOKEN to require ``Authorization: Bearer <token>`` on /metrics;
+the token is not accepted in the query string, where it would end up in
+access logs. Without a token /metrics is only served in debug mode or when
+METRICS_PUBLIC is set; otherwise it answers 403.
+"""
+import atexit
+import contextlib
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from flask import Flask, Response, abort, current_app, g, request
+
+# Seconds; covers fast page loads through slow exports and SMTP sends
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# name -> (type, help)
+METRICS = {
+    'ptsa_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status'),
+    'ptsa_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint'),
+    'ptsa_email_send_duration_seconds': ('histogram', 'Time to hand one email to the mail transport'),
+    'ptsa_email_send_failures_total': ('counter', 'Emails the mail transport rejected or timed out on'),
+    'ptsa_job_duration_seconds': ('histogram', 'Background and scheduled job run time'),
+    'ptsa_job_runs_total': ('counter', 'Background and scheduled job runs by outcome'),
+    'ptsa_db_pool_checkouts_total': ('counter', 'Connections checked out of the pool'),
+    'ptsa_db_pool_connects_total': ('counter', 'New database connections opened'),
+    'ptsa_db_pool_invalidations_total': ('counter', 'Pooled connections discarded after errors'),
+    'ptsa_db_pool_checked_out': ('gauge', 'Connections currently checked out'),
+    'ptsa_db_pool_peak_checked_out': ('gauge', 'Most connections checked out at once since start'),
+    'ptsa_notification_outbox_depth': ('gauge', 'Due notifications that have not been emailed or read'),
+    'ptsa_fragment_cache_requests_total': ('counter', 'Template fragment cache lookups by result'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_histograms: Dict[Tuple[str, Labels], List[float]] = {}  # bucket counts..., sum, count
+_started = time.time()
+_flush_pending = False
+_atexit_registered = False
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, amount: float = 1.0, **labels) -> None:
+    """Increase a counter"""
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + amount
+    _schedule_flush()
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record one histogram sample (seconds)"""
+    key = (name, _labels(labels))
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0.0] * (len(DEFAULT_BUCKETS) + 2)
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+    _schedule_flush()
+
+
+class track_email(contextlib.ContextDecorator):
+    """Time one email send; failures are counted and re-raised"""
+
+    def __init__(self, transport: str):
+        self.transport = transport
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe('ptsa_email_send_duration_seconds', time.perf_counter() - self.started,
+                transport=self.transport)
+        if exc_type is not None:
+            inc('ptsa_email_send_failures_total', transport=self.transport)
+        return False
+
+
+class track_job(contextlib.ContextDecorator):
+    """Time a scheduled job and count its runs by outcome"""
+
+    def __init__(self, job: str):
+        self.job = job
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe('ptsa_job_duration_seconds', time.perf_counter() - self.started, job=self.job)
+        inc('ptsa_job_runs_total', job=self.job, outcome='error' if exc_type else 'success')
+        return False
+
+
+def reset() -> None:
+    """Forget samples inherited from the gunicorn master after a fork"""
+    global _started, _flush_pending
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started = time.time()
+        _flush_pending = False
+
+
+# ---------------------------------------------------------------------------
+# Multiprocess snapshots
+# ---------------------------------------------------------------------------
+def _multiproc_dir():
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def _snapshot_path(directory: str) -> str:
+    # Start time in the name so a recycled pid never overwrites a dead worker
+    return os.path.join(directory, f"{os.getpid()}-{int(_started)}.json")
+
+
+def _live_samples() -> Dict:
+    """This process's registry plus pool stats, in snapshot form"""
+    from app.database import pool_metrics
+
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(series) for key, series in _histograms.items()}
+    gauges = {}
+    for bind, stats in pool_metrics().items():
+        labels = (('bind', bind),)
+        counters[('ptsa_db_pool_checkouts_total', labels)] = stats['checkouts']
+        counters[('ptsa_db_pool_connects_total', labels)] = stats['connects']
+        counters[('ptsa_db_pool_invalidations_total', labels)] = stats['invalidations']
+        gauges[('ptsa_db_pool_checked_out', labels)] = stats['checked_out']
+        gauges[('ptsa_db_pool_peak_checked_out', labels)] = stats['peak_checked_out']
+    return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+
+def _encode(samples: Dict) -> Dict:
+    return {
+        kind: [[name, list(labels), value] for (name, labels), value in series.items()]
+        for kind, series in samples.items()
+    }
+
+
+def _decode(data: Dict) -> Dict:
+    return {
+        kind: {(name, tuple(tuple(pair) for pair in labels)): value for name, labels, value in series}
+        for kind, series in data.items()
+    }
+
+
+def flush() -> None:
+    """Write this process's snapshot if multiprocess mode is on"""
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = _snapshot_path(directory)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(_encode(_live_samples()), fh)
+        os.replace(tmp, path)
+    except Exception:
+        pass  # metrics must never break a request
+
+
+def _timed_flush() -> None:
+    global _flush_pending
+    with _lock:
+        _flush_pending = False
+    flush()
+
+
+def _schedule_flush() -> None:
+    """Flush once, METRICS_FLUSH_SECONDS after the first unflushed sample"""
+    global _flush_pending, _atexit_registered
+    if not _multiproc_dir():
+        return
+    with _lock:
+        if _flush_pending:
+            return
+        _flush_pending = True
+        if not _atexit_registered:
+            _atexit_registered = True
+            atexit.register(flush)
+    timer = threading.Timer(float(os.environ.get('METRICS_FLUSH_SECONDS', 5)), _timed_flush)
+    timer.daemon = True
+    timer.start()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect() -> Dict:
+    """Samples summed over every process that has written a snapshot"""
+    own = _live_samples()
+    directory = _multiproc_dir()
+    if not directory or not os.path.isdir(directory):
+        return own
+
+    own_file = os.path.basename(_snapshot_path(directory))
+    merged = {'counters': dict(own['counters']), 'gauges': dict(own['gauges']),
+              'histograms': {k: list(v) for k, v in own['histograms'].items()}}
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json') or filename == own_file:
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as fh:
+                samples = _decode(json.load(fh))
+        except (OSError, ValueError):
+            continue
+        for key, value in samples.get('counters', {}).items():
+            merged['counters'][key] = merged['counters'].get(key, 0) + value
+        if _pid_alive(int(filename.split('-', 1)[0])):
+            for key, value in samples.get('gauges', {}).items():
+                merged['gauges'][key] = merged['gauges'].get(key, 0) + value
+        for key, series in samples.get('histograms', {}).items():
+            target = merged['histograms'].setdefault(key, [0.0] * len(series))
+            for i, value in enumerate(series):
+                target[i] += value
+    return merged
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(samples: Dict) -> str:
+    """Prometheus text exposition format 0.0.4"""
+    by_name: Dict[str, List[Tuple[str, Labels, object]]] = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for (name, labels), value in samples[kind].items():
+            by_name.setdefault(name, []).append((kind, labels, value))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        series = by_name.get(name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for _, labels, value in sorted(series, key=lambda s: s[1]):
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip(DEFAULT_BUCKETS, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} "
+                             f"{_format_number(cumulative)}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {_format_number(value[-1])}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(value[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_number(value[-1])}")
+    return '\n'.join(lines) + '\n'
+
+
+def _outbox_depth():
+    from datetime import datetime
+
+    from app.models import Notification
+
+    return Notification.query.filter(
+        Notification.email_sent_at.is_(None),
+        Notification.read_at.is_(None),
+        Notification.notify_at <= datetime.utcnow(),
+    ).count()
+
+
+def setup_metrics(app: Flask) -> None:
+    """Record request metrics and serve GET /metrics"""
+    # An explicit environment variable (e.g. from gunicorn.conf.py) wins
+    if app.config.get('PROMETHEUS_MULTIPROC_DIR'):
+        os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', app.config['PROMETHEUS_MULTIPROC_DIR'])
+
+    @app.before_request
+    def start_request_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            # Unmatched URLs share one label so 404 scans cannot blow up cardinality
+            endpoint = request.endpoint or 'unmatched'
+            observe('ptsa_http_request_duration_seconds', time.perf_counter() - started,
+                    endpoint=endpoint, method=request.method)
+            inc('ptsa_http_requests_total', endpoint=endpoint, method=request.method,
+                status=str(response.status_code))
+        return response
+
+    def metrics_view():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token:
+            scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() != 'bearer' or \
+                    not hmac.compare_digest(supplied.strip().encode(), token.encode()):
+                abort(403)
+        elif not (current_app.debug or current_app.config.get('METRICS_PUBLIC')):
+            abort(403)  # deny by default: set METRICS_TOKEN (or METRICS_PUBLIC)
+
+        samples = collect()
+        try:
+            samples['gauges'][('ptsa_notification_outbox_depth', ())] = _outbox_depth()
+        except Exception:
+            current_app.logger.warning("metrics: could not count the notification outbox", exc_info=True)
+        return Response(render(samples), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
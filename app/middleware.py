@@ -6,10 +6,10 @@ def setup_session_protection(app):
     @app.before_request
     def check_session_expiration():
         try:
-            # Skip for static files, auth endpoints, and health checks
+            # Skip for static files, auth endpoints, probes and metrics
             if (request.path.startswith('/static') or 
                 request.path.startswith('/auth/') or
-                request.path.startswith('/health')):
+                request.path.startswith(('/health', '/livez', '/readyz', '/metrics'))):
                 return None
                 
             # Check if user is logged in but session might be stale
@@ -43,9 +43,12 @@ def setup_session_protection(app):
                     session.clear()
                     return redirect(url_for('auth.login', next=request.url))
                     
-                # Update the timestamp for active users
-                session['last_activity'] = datetime.utcnow().isoformat()
-                session.modified = True
+                # Refresh the timestamp only every few minutes: each write
+                # re-signs the session and re-sends its cookie (and with a
+                # server-side session, rewrites the stored record)
+                refresh = timedelta(minutes=app.config.get('SESSION_ACTIVITY_REFRESH_MINUTES', 5))
+                if idle_duration >= refresh:
+                    session['last_activity'] = datetime.utcnow().isoformat()
             except Exception as e:
                 # If timestamp is invalid, reset it and allow access
                 user_email = getattr(current_user, 'email', 'unknown')
@@ -3,7 +3,12 @@ from __future__ import annotations
 from datetime import datetime, date
 
 from flask_login import UserMixin
+from sqlalchemy import and_, case, event, func, inspect
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, validates, with_loader_criteria
+
 from app.extensions import db
+from app.utils.ordering import order_at_end
 
 
 # ---------- Mixins ----------
@@ -63,12 +68,20 @@ class Company(TimestampMixin, db.Model):
     next_benchmarking_due = db.Column(db.DateTime)  # When next update is due
 
     users = db.relationship("User", back_populates="company", lazy="select")
+    # All rows, including soft-deleted ones, so cascades reach every row
     assignments = db.relationship(
         "MeasureAssignment",
         back_populates="company",
         cascade="all, delete-orphan",
         lazy="select",
     )
+    # What pages should show: assignments that have not been unassigned
+    active_assignments = db.relationship(
+        "MeasureAssignment",
+        primaryjoin="and_(Company.id == MeasureAssignment.company_id, MeasureAssignment.deleted_at.is_(None))",
+        viewonly=True,
+        lazy="select",
+    )
     
     # Historical benchmarking data relationship
     benchmarks = db.relationship(
@@ -147,15 +160,22 @@ class Measure(TimestampMixin, db.Model):
     measure_detail = db.Column(db.Text)  # renamed from description
 
     target = db.Column(db.Text)
-    order = db.Column(db.Integer, default=0)
+    order = db.Column(db.Integer, default=order_at_end("measures"))
 
-    # Ensure cascades are properly set
+    # Ensure cascades are properly set (all rows, including soft-deleted ones)
     assignments = db.relationship(
         "MeasureAssignment",
         back_populates="measure",
         cascade="all, delete-orphan",
         lazy="select",
     )
+    # What pages should show: assignments that have not been unassigned
+    active_assignments = db.relationship(
+        "MeasureAssignment",
+        primaryjoin="and_(Measure.id == MeasureAssignment.measure_id, MeasureAssignment.deleted_at.is_(None))",
+        viewonly=True,
+        lazy="select",
+    )
     steps = db.relationship(
         "MeasureStep",
         back_populates="measure",
@@ -188,9 +208,41 @@ class MeasureStep(TimestampMixin, db.Model):
 
 
 # ---------- MeasureAssignment ----------
+# Canonical spellings; enforced by ck_measure_assignments_status
+ASSIGNMENT_STATUSES = ("Not Started", "In Progress", "Completed", "Needs Assistance", "On Hold", "Blocked")
+# States that step progress never overrides; they persist until an admin resolves them
+PRESERVED_STATUSES = ("Needs Assistance", "On Hold", "Blocked")
+_STATUS_BY_KEY = {s.lower(): s for s in ASSIGNMENT_STATUSES}
+
+
+def normalize_status(value: str | None) -> str:
+    """Return the canonical spelling of a status; raises ValueError if unknown"""
+    key = " ".join((value or "").replace("_", " ").split()).lower()
+    try:
+        return _STATUS_BY_KEY[key]
+    except KeyError:
+        raise ValueError(f"Unknown assignment status: {value!r}") from None
+
+
+class SoftDeleteQuery(db.Query):
+    """Query class for soft-deletable models; see _exclude_soft_deleted below"""
+
+    def with_deleted(self):
+        """Include soft-deleted rows (history, restore and audit views)"""
+        return self.execution_options(include_deleted=True)
+
+
 class MeasureAssignment(TimestampMixin, db.Model):
     __tablename__ = "measure_assignments"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.CheckConstraint(
+            "status IN (%s)" % ", ".join(f"'{s}'" for s in ASSIGNMENT_STATUSES),
+            name="ck_measure_assignments_status",
+        ),
+        db.Index("ix_measure_assignments_status_due_at", "status", "due_at"),
+        {'extend_existing': True},
+    )
+    query_class = SoftDeleteQuery
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -199,7 +251,7 @@ class MeasureAssignment(TimestampMixin, db.Model):
 
     status = db.Column(db.String(32), nullable=False, default="In Progress")
     urgency = db.Column(db.Integer, default=1)  # 1=Low, 2=Medium, 3=High
-    order = db.Column(db.Integer, default=0)  # For ordering assignments within a company
+    order = db.Column(db.Integer, default=order_at_end("measure_assignments", "company_id"))  # Within a company
     
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
@@ -208,6 +260,11 @@ class MeasureAssignment(TimestampMixin, db.Model):
     # Soft delete tracking
     deleted_at = db.Column(db.DateTime, nullable=True)  # When assignment was unassigned/deleted
     deleted_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)  # Admin who deleted it
+
+    # Denormalized step progress; kept in sync by the AssignmentStep listeners
+    # below and by atomic UPDATEs in toggle_step (flask rebuild-step-counters fixes drift)
+    steps_total = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    steps_completed = db.Column(db.Integer, default=0, server_default="0", nullable=False)
     
     # snapshot of measure meta at assignment time
     target = db.Column(db.Text)
@@ -244,20 +301,105 @@ class MeasureAssignment(TimestampMixin, db.Model):
         lazy="select",
     )
 
+    @property
+    def progress_pct(self) -> int:
+        """Completed steps as a whole percentage, from the counters"""
+        if not self.steps_total:
+            return 0
+        return min(100, (self.steps_completed or 0) * 100 // self.steps_total)
+
+    @validates("status")
+    def _validate_status(self, key, value):
+        return normalize_status(value)
+
+    @classmethod
+    def status_counts(cls, *criteria) -> dict:
+        """{status: count} for assignments matching ``criteria`` in one grouped query"""
+        counts = dict.fromkeys(ASSIGNMENT_STATUSES, 0)
+        rows = db.session.query(cls.status, func.count(cls.id)).filter(*criteria).group_by(cls.status)
+        counts.update(dict(rows.all()))
+        return counts
+
+    @hybrid_property
+    def effective_due_at(self):
+        """Deadline date: end_date is primary, falling back to due_at's date"""
+        if self.end_date:
+            return self.end_date
+        return self.due_at.date() if self.due_at else None
+
+    @effective_due_at.expression
+    def effective_due_at(cls):
+        # Must match ix_measure_assignments_open_effective_due exactly
+        return func.coalesce(cls.end_date, func.date(cls.due_at), type_=db.Date)
+
+    @classmethod
+    def overdue_filter(cls, today: date | None = None):
+        """SQL criterion for open assignments past their effective deadline"""
+        today = today or datetime.utcnow().date()
+        return and_(cls.status != "Completed", cls.effective_due_at < today)
+
     @property
     def is_overdue(self):
-        from datetime import datetime
         if self.status == "Completed":
             return False
-        # Use end_date as primary deadline, fallback to due_at
-        if self.end_date:
-            return self.end_date < datetime.utcnow().date()
-        elif self.due_at:
-            return self.due_at < datetime.utcnow()
-        return False
+        deadline = self.effective_due_at
+        return deadline is not None and deadline < datetime.utcnow().date()
 
     def __repr__(self) -> str:
         return f"<Assignment c={self.company_id} m={self.measure_id} status={self.status}>"
+
+
+# Overdue lookups filter and sort on the effective deadline of open assignments
+db.Index(
+    "ix_measure_assignments_open_effective_due",
+    MeasureAssignment.effective_due_at,
+    postgresql_where=MeasureAssignment.status != "Completed",
+    sqlite_where=MeasureAssignment.status != "Completed",
+)
+
+# Hot lookups only ever read live rows, so keep dead rows out of their indexes
+db.Index(
+    "ix_measure_assignments_live_company_status",
+    MeasureAssignment.company_id,
+    MeasureAssignment.status,
+    postgresql_where=MeasureAssignment.deleted_at.is_(None),
+    sqlite_where=MeasureAssignment.deleted_at.is_(None),
+)
+db.Index(
+    "ix_measure_assignments_live_due_at",
+    MeasureAssignment.due_at,
+    postgresql_where=MeasureAssignment.deleted_at.is_(None),
+    sqlite_where=MeasureAssignment.deleted_at.is_(None),
+)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_soft_deleted(state):
+    """
+    Hide soft-deleted assignments from every ORM SELECT (Model.query,
+    db.session.query and select()), including joins and eager loads.
+
+    Opt out with ``MeasureAssignment.query.with_deleted()`` or
+    ``.execution_options(include_deleted=True)``. Lazy relationship loads
+    are left alone so a step can still reach its (deleted) assignment and
+    cascades still reach every row; ``company.assignments`` and
+    ``measure.assignments`` therefore include unassigned rows. Use
+    ``active_assignments`` to list what is currently assigned.
+    """
+    if (
+        state.is_select
+        and not state.is_column_load
+        and not state.is_relationship_load
+        and not state.execution_options.get("include_deleted", False)
+    ):
+        state.statement = state.statement.options(
+            with_loader_criteria(
+                MeasureAssignment,
+                lambda cls: cls.deleted_at.is_(None),
+                include_aliases=True,
+            )
+        )
+
 # ---------- AssignmentStep (actual steps for an assignment) ----------
 class AssignmentStep(TimestampMixin, db.Model):
     __tablename__ = "assignment_steps"
@@ -293,6 +435,79 @@ class AssignmentStep(TimestampMixin, db.Model):
         return f"<Step {self.id} a={self.assignment_id} {self.title!r}>"
 
 
+def status_from_counts(total: int, done: int) -> str:
+    if not total or done <= 0:
+        return "Not Started"
+    if done < total:
+        return "In Progress"
+    return "Completed"
+
+
+def status_from_counts_sql(total, done):
+    """SQL twin of status_from_counts() for use inside UPDATE statements"""
+    table = MeasureAssignment.__table__
+    return case(
+        (table.c.status.in_(PRESERVED_STATUSES), table.c.status),
+        ((total == 0) | (done <= 0), "Not Started"),
+        (done < total, "In Progress"),
+        else_="Completed",
+    )
+
+
+def _bump_step_counters(connection, target, total_delta: int, completed_delta: int) -> None:
+    table = MeasureAssignment.__table__
+    assignment_id = target.assignment_id
+    if assignment_id is None or not (total_delta or completed_delta):
+        return
+    connection.execute(
+        table.update()
+        .where(table.c.id == assignment_id)
+        .values(
+            steps_total=table.c.steps_total + total_delta,
+            steps_completed=table.c.steps_completed + completed_delta,
+        )
+    )
+    # The UPDATE bypasses the ORM, so a loaded assignment is refreshed once
+    # the flush is over (see _expire_step_counters)
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault("stale_step_counters", set()).add(assignment_id)
+
+
+# ORM-level adds, deletes and edits of steps keep the counters in sync.
+# Bulk/Core statements bypass these and must update the counters themselves.
+@event.listens_for(AssignmentStep, "after_insert")
+def _step_inserted(mapper, connection, target):
+    _bump_step_counters(connection, target, 1, 1 if target.is_completed else 0)
+
+
+@event.listens_for(AssignmentStep, "after_delete")
+def _step_deleted(mapper, connection, target):
+    _bump_step_counters(connection, target, -1, -1 if target.is_completed else 0)
+
+
+@event.listens_for(AssignmentStep, "after_update")
+def _step_updated(mapper, connection, target):
+    history = inspect(target).attrs.is_completed.history
+    if history.has_changes() and history.deleted:
+        was, now = bool(history.deleted[0]), bool(target.is_completed)
+        if was != now:
+            _bump_step_counters(connection, target, 0, 1 if now else -1)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expire_step_counters(session, flush_context):
+    """Expire the counters of assignments whose steps changed in this flush"""
+    stale = session.info.pop("stale_step_counters", None)
+    if not stale:
+        return
+    mapper = inspect(MeasureAssignment)
+    for assignment_id in stale:
+        assignment = session.identity_map.get(mapper.identity_key_from_primary_key((assignment_id,)))
+        if assignment is not None:
+            session.expire(assignment, ["steps_total", "steps_completed", "status"])
+
+
 # ---------- Attachment ----------
 class Attachment(TimestampMixin, db.Model):
     __tablename__ = "attachments"
@@ -339,7 +554,7 @@ class Step(TimestampMixin, db.Model):
     measure_id = db.Column(db.Integer, db.ForeignKey('measures.id'), nullable=False)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    order = db.Column(db.Integer, default=0)
+    order = db.Column(db.Integer, default=order_at_end('steps', 'measure_id'))
     
     # Relationship to parent measure
     measure = db.relationship('Measure', back_populates='step_items')
@@ -518,4 +733,16 @@ class SystemSettings(TimestampMixin, db.Model):
             db.session.commit()
         return settings
 
+# ---------- Server-side sessions ----------
+class ServerSession(db.Model):
+    """Session data when SESSION_BACKEND=database (see app/sessions.py)"""
+    __tablename__ = "server_sessions"
+
+    id = db.Column(db.String(64), primary_key=True)  # random id from the cookie
+    data = db.Column(db.Text, nullable=False)         # Flask tagged-JSON payload
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ServerSession {self.id[:8]}… expires={self.expires_at}>"
+
 # ---------- Benchmarking ----------
\ No newline at end of file
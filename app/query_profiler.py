@@ -0,0 +1,138 @@
+"""
+Request-scoped SQL query profiler and N+1 detector
+
+When enabled for a request, every statement the request runs is timed via
+SQLAlchemy's before/after_cursor_execute events and fingerprinted (literal
+values and IN-lists collapsed). After the request:
+
+- a ``Server-Timing`` header reports DB time, query count and app time, so
+  browser dev tools show it next to the request;
+- a structured ``query-profile`` log line is written (WARNING when a
+  statement repeats often enough to look like an N+1 lazy load);
+- ``X-Query-Count`` carries the raw count for scripts such as
+  check_query_budgets.py.
+
+Profiling is on for every request when QUERY_PROFILER_ENABLED is set, and
+for individual requests from admins that send the ``X-Profile-Queries``
+header. Otherwise the cost is one context lookup per query.
+"""
+import json
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from flask import Flask, g, has_app_context, request
+from flask_login import current_user
+from sqlalchemy import event
+
+PROFILE_HEADER = 'X-Profile-Queries'
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)|\bIN\s*\((?:\s*%\(\w+\)s\s*,?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement text with literals and IN-lists collapsed, for grouping repeats"""
+    text = _LITERALS.sub('?', statement)
+    text = _IN_LISTS.sub('IN (...)', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+class QueryProfile:
+    """Queries recorded for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.db_seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Dict]:
+        """SELECTs issued at least ``threshold`` times, most frequent first"""
+        return [
+            {'count': n, 'statement': stmt[:200]}
+            for stmt, n in self.fingerprints.most_common()
+            if n >= threshold and stmt.upper().startswith('SELECT')
+        ]
+
+
+def _active_profile() -> Optional[QueryProfile]:
+    return g.get('_query_profile') if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile() is not None:
+        conn.info.setdefault('query_profile_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile()
+    started = conn.info.get('query_profile_started')
+    if profile is not None and started:
+        profile.record(statement, time.perf_counter() - started.pop())
+
+
+def _profiling_requested(app: Flask) -> bool:
+    if app.config.get('QUERY_PROFILER_ENABLED'):
+        return True
+    if PROFILE_HEADER not in request.headers:
+        return False
+    return current_user.is_authenticated and getattr(current_user, 'role', '') == 'admin'
+
+
+def setup_query_profiler(app: Flask) -> None:
+    """Attach the cursor listeners and request hooks (call after db.init_app)"""
+    from app.extensions import db
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    threshold = app.config.get('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5)
+
+    @app.before_request
+    def start_query_profile():
+        if request.path.startswith('/static'):
+            return None
+        if _profiling_requested(app):
+            g._query_profile = QueryProfile()
+        return None
+
+    @app.after_request
+    def finish_query_profile(response):
+        profile = g.pop('_query_profile', None)
+        if profile is None:
+            return response
+
+        total_ms = (time.perf_counter() - profile.started) * 1000
+        db_ms = profile.db_seconds * 1000
+        repeated = profile.repeated(threshold)
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.1f};desc="{profile.count} queries", app;dur={max(0.0, total_ms - db_ms):.1f}',
+        )
+        response.headers['X-Query-Count'] = str(profile.count)
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': profile.count,
+            'db_ms': round(db_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'n_plus_one': repeated,
+        }
+        log = app.logger.warning if repeated else app.logger.info
+        log("query-profile %s", json.dumps(record))
+        return response
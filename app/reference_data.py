@@ -0,0 +1,104 @@
+"""
+Cached reference data: dropdown choices and singleton settings
+
+Most admin pages fill a company or measure ``<select>``. Many code paths read
+SystemSettings or NotificationConfig. These tables change rarely, so each
+process keeps the last result in memory, together with the version it was
+loaded at. The version is the row count and latest ``updated_at`` of each
+table, the same table_version() the fragment cache uses. All reference
+tables are checked in one aggregate query, at most once per request (again
+after a commit). Any insert, update or delete therefore shows up on the next
+request in every worker, and there is no TTL to tune.
+
+Choices are ``Choice(id, name)`` tuples rather than ORM objects, so the same
+list can be shared by threads and requests. Settings are read-only snapshots
+with the model's column attributes. Code that changes settings still loads
+the model (``SystemSettings.get_settings()``) and commits it.
+"""
+import threading
+from collections import namedtuple
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import inspect, select
+
+from app.extensions import db
+from app.fragment_cache import table_version
+
+Choice = namedtuple('Choice', 'id name')
+
+REFERENCE_TABLES = ('companies', 'measures', 'system_settings', 'notification_config')
+
+_cache: Dict[str, Tuple[tuple, object]] = {}
+_lock = threading.Lock()
+_snapshot_types: Dict[str, type] = {}
+
+
+def _version(*tables: str) -> tuple:
+    versions = table_version(*REFERENCE_TABLES)
+    return tuple(versions[2 * i:2 * i + 2] for i, name in enumerate(REFERENCE_TABLES) if name in tables)
+
+
+def _cached(name: str, tables: Tuple[str, ...], load: Callable[[], object]):
+    version = _version(*tables)
+    entry = _cache.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    value = load()
+    with _lock:
+        _cache[name] = (version, value)
+    return value
+
+
+def _snapshot(row):
+    """Immutable copy of a model instance's column attributes"""
+    mapper = inspect(row).mapper
+    cls = _snapshot_types.get(mapper.class_.__name__)
+    if cls is None:
+        cls = namedtuple(f"{mapper.class_.__name__}Snapshot", [attr.key for attr in mapper.column_attrs])
+        _snapshot_types[mapper.class_.__name__] = cls
+    return cls(**{attr.key: getattr(row, attr.key) for attr in mapper.column_attrs})
+
+
+def company_choices() -> List[Choice]:
+    """All companies by name, for dropdowns"""
+    from app.models import Company
+
+    def load():
+        rows = db.session.execute(select(Company.id, Company.name).order_by(Company.name.asc()))
+        return [Choice(*row) for row in rows]
+
+    return _cached('companies', ('companies',), load)
+
+
+def measure_choices() -> List[Choice]:
+    """All measures by name, for dropdowns"""
+    from app.models import Measure
+
+    def load():
+        rows = db.session.execute(select(Measure.id, Measure.name).order_by(Measure.name.asc()))
+        return [Choice(*row) for row in rows]
+
+    return _cached('measures', ('measures',), load)
+
+
+def settings_snapshot():
+    """Read-only SystemSettings; creates the singleton row if missing"""
+    from app.models import SystemSettings
+
+    return _cached('system_settings', ('system_settings',),
+                   lambda: _snapshot(SystemSettings.get_settings()))
+
+
+def notification_config_snapshot():
+    """Read-only NotificationConfig; creates the singleton row if missing"""
+    from app.models import NotificationConfig
+
+    def load():
+        cfg = db.session.get(NotificationConfig, 1)
+        if cfg is None:
+            cfg = NotificationConfig(id=1)  # defaults
+            db.session.add(cfg)
+            db.session.commit()
+        return _snapshot(cfg)
+
+    return _cached('notification_config', ('notification_config',), load)
@@ -20,7 +20,12 @@ from flask_login import login_required, current_user
 from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash
 
+from app.database import READ_BIND, reads_from_replica
 from app.extensions import db
+from app.fragment_cache import Deferred
+from app.http_cache import conditional_page
+from app.metrics import track_job
+from app.reference_data import company_choices, measure_choices, settings_snapshot
 from app.models import (
     User,
     Company,
@@ -32,6 +37,8 @@ from app.models import (
     AssistanceRequest,
     Notification,
     SystemSettings,
+    normalize_status,
+    status_from_counts,
 )
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -63,17 +70,16 @@ def dashboard():
     per_page = 10
     
     overdue_count = db.session.query(MeasureAssignment).filter(
-        MeasureAssignment.due_at.isnot(None),
-        MeasureAssignment.due_at < now,
-        MeasureAssignment.status != "Completed"
+        MeasureAssignment.overdue_filter(now.date())
     ).count()
+    status_counts = MeasureAssignment.status_counts()
     stats = {
         "companies": db.session.query(Company).count(),
         "measures": db.session.query(Measure).count(),
-        "not_started": db.session.query(MeasureAssignment).filter_by(status="Not Started").count(),
-        "in_progress": db.session.query(MeasureAssignment).filter_by(status="In Progress").count(),
-        "needs_assistance": db.session.query(MeasureAssignment).filter_by(status="Needs Assistance").count(),
-        "completed": db.session.query(MeasureAssignment).filter_by(status="Completed").count(),
+        "not_started": status_counts["Not Started"],
+        "in_progress": status_counts["In Progress"],
+        "needs_assistance": status_counts["Needs Assistance"],
+        "completed": status_counts["Completed"],
         "overdue": overdue_count,
     }
     
@@ -82,15 +88,12 @@ def dashboard():
         MeasureAssignment.query.options(
             joinedload(MeasureAssignment.company),
             joinedload(MeasureAssignment.measure),
-            joinedload(MeasureAssignment.steps),
         )
         .order_by(MeasureAssignment.created_at.desc())
         .paginate(page=page, per_page=per_page, error_out=False)
     )
     
-    overdue = [
-        a for a in recent_pagination.items if a.due_at and a.status != "Completed" and a.due_at < now
-    ]
+    overdue = [a for a in recent_pagination.items if a.is_overdue]
     return render_template("admin/dashboard.html", stats=stats, recent=recent_pagination, overdue=overdue, now=now)
 
 
@@ -109,8 +112,9 @@ def measure_history():
     date_from = request.args.get("date_from", type=str)
     date_to = request.args.get("date_to", type=str)
 
+    # History includes unassigned (soft-deleted) rows
     q = (
-        db.session.query(MeasureAssignment)
+        MeasureAssignment.query.with_deleted()
         .join(Company, MeasureAssignment.company_id == Company.id)
         .join(Measure, MeasureAssignment.measure_id == Measure.id)
     )
@@ -142,8 +146,8 @@ def measure_history():
 
     pagination = q.order_by(MeasureAssignment.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
     assignments = pagination.items
-    companies = Company.query.order_by(Company.name.asc()).all()
-    measures = Measure.query.order_by(Measure.name.asc()).all()
+    companies = company_choices()
+    measures = measure_choices()
 
     return render_template(
         "admin/measure_history.html",
@@ -163,6 +167,7 @@ def measure_history():
 
 @admin_bp.route("/measures/history/export", methods=["GET"])
 @login_required
+@reads_from_replica
 def measure_history_export():
     company_id = request.args.get("company_id", type=int)
     measure_id = request.args.get("measure_id", type=int)
@@ -170,8 +175,9 @@ def measure_history_export():
     date_from = request.args.get("date_from", type=str)
     date_to = request.args.get("date_to", type=str)
 
+    # History includes unassigned (soft-deleted) rows
     q = (
-        db.session.query(MeasureAssignment)
+        MeasureAssignment.query.with_deleted()
         .join(Company, MeasureAssignment.company_id == Company.id)
         .join(Measure, MeasureAssignment.measure_id == Measure.id)
     )
@@ -212,10 +218,8 @@ def measure_history_export():
                 "Updated At": getattr(a, "updated_at", None).isoformat()
                 if getattr(a, "updated_at", None)
                 else "",
-                "Completed Steps": sum(
-                    1 for s in getattr(a, "steps", []) if getattr(s, "is_completed", False)
-                ),
-                "Total Steps": len(getattr(a, "steps", [])),
+                "Completed Steps": a.steps_completed,
+                "Total Steps": a.steps_total,
             }
         )
 
@@ -315,92 +319,47 @@ def companies():
                 flash("Passwords do not match.", "warning")
                 return redirect(url_for("admin.companies"))
 
-            # duplicates
-            if Company.query.filter_by(name=name).first():
-                flash("A company with that name already exists.", "warning")
-                return redirect(url_for("admin.companies"))
-            if User.query.filter_by(email=login_email).first():
-                flash("That login email is already in use.", "warning")
+            # create company, login user and assignments (with steps) in one transaction
+            from app.utils.assignments import onboard_companies
+            result = onboard_companies([{
+                "name": name,
+                "region": region,
+                "industry_category": industry,
+                "tech_resources": tech,
+                "human_resources": human,
+                "membership": membership,
+                "phone": phone,
+                "login_email": login_email,
+                "login_password": login_password,
+                "measures": measure_ids,
+            }])
+            if result["errors"]:
+                db.session.rollback()
+                flash(result["errors"][0]["error"], "warning")
                 return redirect(url_for("admin.companies"))
 
-            # create company
-            c = Company(
-                name=name,
-                region=region or None,
-                industry_category=industry or None,
-                tech_resources=tech or None,
-                human_resources=human or None,
-                membership=membership or None,
-                phone=phone or None,
-            )
-            db.session.add(c)
-            db.session.flush()  # get c.id
-
-            # create the company user
-            u = User(
-                email=login_email,
-                password=generate_password_hash(login_password),
-                role="company",
-                is_active=True,
-                company_id=c.id,
-            )
-            db.session.add(u)
+            created = result["created"][0]
+            for mid in created["skipped_measures"]:
+                current_app.logger.warning(f"Skipping invalid measure ID: {mid} during company creation")
 
-            # assign measures immediately (optional)
-            for mid in measure_ids:
-                m = Measure.query.get(int(mid))
-                if not m:
-                    current_app.logger.warning(f"Skipping invalid measure ID: {mid} during company creation")
-                    continue
-
-                # compute due_at from measure defaults (safe)
-                due_at = None
-                m_timeframe = getattr(m, "default_timeframe_date", None)
-                m_duration = getattr(m, "default_duration_days", None)
-                if m_timeframe:
-                    try:
-                        due_at = datetime.combine(m_timeframe, datetime.max.time())
-                    except Exception:
-                        due_at = None
-                elif m_duration:
-                    try:
-                        due_at = datetime.utcnow() + timedelta(days=int(m_duration))
-                    except Exception:
-                        due_at = None
-
-                a = MeasureAssignment(
-                    company_id=c.id,
-                    measure_id=m.id,
-                    status="Not Started",  # progress only when steps begin
-                    created_at=datetime.utcnow(),
-                    urgency=getattr(m, "default_urgency", None) or 1,
-                    target=m.target,
-                    departments=m.departments,
-                    responsible=m.responsible,
-                    participants=m.participants,
-                    due_at=due_at,
-                )
-                db.session.add(a)
-
-            db.session.commit()
-            
-            # Log activity
+            # Log activity in the same transaction
             from app.utils.activity_logger import log_create
-            log_create('company', c.id, c.name, {
-                'user_email': u.email,
+            log_create('company', created["company_id"], name, {
+                'user_email': login_email,
                 'region': region,
-                'measures_assigned': len(measure_ids)
-            })
+                'measures_assigned': len(created["assignment_ids"]),
+                'assignment_ids': created["assignment_ids"],
+            }, commit=False)
+            db.session.commit()
             
-            msg = f"Company '{c.name}' created and login {u.email} registered."
-            if measure_ids:
-                msg += f" {len(measure_ids)} measure(s) assigned."
+            msg = f"Company '{name}' created and login {login_email} registered."
+            if created["assignment_ids"]:
+                msg += f" {len(created['assignment_ids'])} measure(s) assigned."
             flash(msg, "success")
             return redirect(url_for("admin.companies"))
 
         companies = Company.query.order_by(Company.name.asc()).all()
-        measures = Measure.query.order_by(Measure.name.asc()).all()
-        return render_template("admin/companies.html", companies=companies, measures=measures)
+        return render_template("admin/companies.html", companies=companies, measures=measure_choices())
     except Exception as e:
         db.session.rollback()
         flash(f"An error occurred: {str(e)}", "danger")
@@ -420,9 +379,9 @@ def proceed_to_measures(company_id: int):
 @admin_bp.route("/measures", methods=["GET"])
 @login_required
 def measures():
-    measures = Measure.query.options(joinedload(Measure.steps)).order_by(Measure.name.asc()).all()
-    companies = Company.query.order_by(Company.name.asc()).all()
-    return render_template("admin/measures.html", measures=measures, companies=companies)
+    # Only loaded if the measures list fragment is not cached
+    measures = Deferred(Measure.query.options(joinedload(Measure.steps)).order_by(Measure.name.asc()).all)
+    return render_template("admin/measures.html", measures=measures, companies=company_choices())
 
 
 @admin_bp.route("/measures/new", methods=["POST"])
@@ -498,11 +457,9 @@ def assign_measure():
             flash("Missing required fields for assignment.", "danger")
             return redirect(url_for("admin.measures"))
         
-        # Check if measure is already assigned to this company (excluding soft-deleted)
+        # Check if measure is already assigned to this company (soft-deleted rows are excluded)
         existing = MeasureAssignment.query.filter_by(
             measure_id=measure_id, company_id=company_id
-        ).filter(
-            MeasureAssignment.deleted_at.is_(None)
         ).first()
         if existing:
             flash(f"This measure is already assigned to this company.", "warning")
@@ -639,7 +596,7 @@ def company_benchmarking_history():
     
     # Get unique years and companies for filter dropdowns
     all_years = db.session.query(CompanyBenchmark.data_year).distinct().order_by(CompanyBenchmark.data_year.desc()).all()
-    all_companies = Company.query.order_by(Company.name).all()
+    all_companies = company_choices()
     
     return render_template(
         "admin/company_benchmarking_history.html",
@@ -741,12 +698,30 @@ def assistance_queue():
               .all())
 
     # Get all companies for the reminder form
-    companies = Company.query.order_by(Company.name).all()
+    companies = company_choices()
 
     return render_template("admin/assistance.html", open_reqs=open_reqs, recent=recent, companies=companies)
 
 
 
+def _status_to_restore(assignment, prev_status):
+    """
+    The status an assignment goes back to once its assistance request is resolved
+
+    Requests saved before statuses were normalized may hold legacy or unknown
+    values; those are replaced by the status the step progress implies, as the
+    normalizing migration did, instead of failing the request.
+    """
+    try:
+        return normalize_status(prev_status or "In Progress")
+    except ValueError:
+        current_app.logger.warning(
+            "Assistance request for assignment %s has unknown previous status %r; using step progress",
+            assignment.id, prev_status,
+        )
+        return status_from_counts(assignment.steps_total or 0, assignment.steps_completed or 0)
+
+
 @admin_bp.route("/assistance/<int:req_id>/decide", methods=["POST"])
 @login_required
 def assistance_decide(req_id: int):
@@ -772,7 +747,7 @@ def assistance_decide(req_id: int):
 
     if action == "resolved":
         # Revert assignment back to its prior status (or In Progress)
-        a.status = req.prev_status or "In Progress"
+        a.status = _status_to_restore(a, req.prev_status)
         req.decision = "resolved"
 
         # Company-side notification: assistance resolved
@@ -870,17 +845,12 @@ def send_measure_reminder():
         # Add progress summary if requested
         progress_summary = ""
         if include_progress:
-            # Exclude soft-deleted assignments from progress calculation
-            assignments = MeasureAssignment.query.filter_by(
-                company_id=company_id
-            ).filter(
-                MeasureAssignment.deleted_at.is_(None)
-            ).all()
-            total = len(assignments)
-            completed = sum(1 for a in assignments if a.status == "Completed")
-            in_progress = sum(1 for a in assignments if a.status == "In Progress")
-            not_started = sum(1 for a in assignments if a.status == "Not Started")
-            needs_assistance = sum(1 for a in assignments if a.status == "Needs Assistance")
+            counts = MeasureAssignment.status_counts(MeasureAssignment.company_id == company_id)
+            total = sum(counts.values())
+            completed = counts["Completed"]
+            in_progress = counts["In Progress"]
+            not_started = counts["Not Started"]
+            needs_assistance = counts["Needs Assistance"]
             
             progress_summary = f"\n\nYour Current Progress:\n"
             progress_summary += f"- Total Measures: {total}\n"
@@ -960,12 +930,7 @@ def api_company_measures(company_id):
         return {"success": False, "error": "Unauthorized"}, 403
     
     try:
-        # Exclude soft-deleted assignments from API
-        assignments = MeasureAssignment.query.filter_by(
-            company_id=company_id
-        ).filter(
-            MeasureAssignment.deleted_at.is_(None)
-        ).all()
+        assignments = MeasureAssignment.query.filter_by(company_id=company_id).all()
         measures = []
         for a in assignments:
             if a.measure:
@@ -993,179 +958,20 @@ def company_measures_wizard(company_id: int):
         return render_template("admin/company_measures_wizard.html", company=company)
 
     try:
+        from app.utils.assignments import bulk_assign, parse_measure_specs
+
         # Extract measures from form data - handles nested structure including steps
-        measures_data = {}
-        for key, value in request.form.items():
-            # Parse nested field names like measures[0][name] and measures[0][steps][0][title]
-            if key.startswith('measures[') and ']' in key:
-                parts = key.split('[')
-                if len(parts) >= 3:
-                    index = parts[1].rstrip(']')
-                    
-                    # Initialize dict for this measure if needed
-                    if index not in measures_data:
-                        measures_data[index] = {}
-                    
-                    # Check if this is a step field (measures[0][steps][0][title])
-                    if len(parts) >= 5 and parts[2].rstrip(']') == 'steps':
-                        step_index = parts[3].rstrip(']')
-                        step_field = parts[4].rstrip(']')
-                        
-                        # Initialize steps dict if needed
-                        if 'steps' not in measures_data[index]:
-                            measures_data[index]['steps'] = {}
-                        if step_index not in measures_data[index]['steps']:
-                            measures_data[index]['steps'][step_index] = {}
-                        
-                        # Store the step field value
-                        measures_data[index]['steps'][step_index][step_field] = value
-                    else:
-                        # Regular field (not a step)
-                        field = parts[2].rstrip(']')
-                        measures_data[index][field] = value
+        specs = parse_measure_specs(request.form)
 
         # Log received data for debugging
-        current_app.logger.info(f"Received measures wizard data - count: {len(measures_data)}")
-        
-        created_count = 0
-        assigned_count = 0
-        created_assignment_ids = []  # Track IDs for redirect to details page
-
-        # Process each measure in the form
-        for index, data in measures_data.items():
-            # Skip if required fields are missing
-            if 'name' not in data or not data['name'].strip():
-                continue
-
-            name = data['name'].strip()
-            current_app.logger.debug(f"Processing measure {index}: {name}")
-            
-            # Extract fields with defaults for missing values
-            description = data.get('measure_detail', '').strip() or None
-            target = data.get('target', '').strip() or None
-            departments = data.get('departments', '').strip() or None
-            responsible = data.get('responsible', '').strip() or None
-            participants = data.get('participants', '').strip() or None
-
-            # Parse numeric fields
-            try:
-                urgency = int(data.get('urgency')) if data.get('urgency') else 1
-            except (ValueError, TypeError):
-                urgency = 1
+        current_app.logger.info(f"Received measures wizard data - count: {len(specs)}")
 
-            # Parse date fields
-            start_date = None
-            if data.get('start_date'):
-                try:
-                    start_date = datetime.fromisoformat(data.get('start_date').strip()).date()
-                except Exception:
-                    start_date = None
-            
-            end_date = None
-            if data.get('end_date'):
-                try:
-                    end_date = datetime.fromisoformat(data.get('end_date').strip()).date()
-                except Exception:
-                    end_date = None
-
-            # Get steps (handled differently in the form)
-            step_lines = []
-            if 'steps' in data and isinstance(data['steps'], dict):
-                for step_idx, step_data in data['steps'].items():
-                    if 'title' in step_data and step_data['title'].strip():
-                        step_lines.append(step_data['title'].strip())
-
-            # Find or create measure by name
-            m = Measure.query.filter_by(name=name).first()
-            measure_is_new = False  # Track if we created this measure
-            
-            if not m:
-                current_app.logger.info(f"Creating new measure: {name}")
-                measure_is_new = True
-                # Create measure with the fields that exist in the model
-                m = Measure(
-                    name=name,
-                    measure_detail=description,
-                    target=target,
-                    departments=departments,
-                    responsible=responsible,
-                    participants=participants,
-                    start_date=start_date,
-                    end_date=end_date,
-                )
-                
-                db.session.add(m)
-                db.session.flush()  # Get the ID
-                created_count += 1
-
-                # Add default steps to the measure
-                for idx, line in enumerate(step_lines):
-                    db.session.add(MeasureStep(measure_id=m.id, title=line, step=idx))
-
-            # Create assignment for this company
-            current_app.logger.info(f"Creating assignment for measure: {name} (ID: {m.id}) to company: {company.name}")
-            
-            # For NEW measures from form data, use provided dates and company-specific details
-            # For EXISTING measures, use defaults and leave company-specific fields empty
-            if measure_is_new:  # New measure just created from form
-                # Use the form data (already parsed above)
-                assignment_start = start_date if start_date else datetime.utcnow().date()
-                assignment_end = end_date if end_date else (datetime.utcnow() + timedelta(days=30)).date()
-                assignment_departments = departments
-                assignment_responsible = responsible
-                assignment_participants = participants
-            else:  # Existing measure being assigned - needs company-specific details
-                # Use default dates, leave company-specific fields empty for admin to fill
-                assignment_start = datetime.utcnow().date()
-                assignment_end = (datetime.utcnow() + timedelta(days=30)).date()
-                assignment_departments = None
-                assignment_responsible = None
-                assignment_participants = None
-            
-            a = MeasureAssignment(
-                company_id=company.id,
-                measure_id=m.id,
-                status="Not Started",
-                created_at=datetime.utcnow(),
-                urgency=urgency,
-                target=m.target,  # Keep target (it's measure-specific, not company-specific)
-                departments=assignment_departments,
-                responsible=assignment_responsible,
-                participants=assignment_participants,
-                start_date=assignment_start,
-                end_date=assignment_end,
-            )
+        # Resolve/create measures and create assignments + steps in a handful of statements
+        result = bulk_assign(company, specs)
+        created_count = result['created_measures']
+        created_assignment_ids = result['assignment_ids']  # Track IDs for redirect to details page
+        assigned_count = len(created_assignment_ids)
 
-            # Set due_at from end_date
-            if assignment_end:
-                try:
-                    a.due_at = datetime.combine(assignment_end, datetime.max.time())
-                except Exception:
-                    a.due_at = None
-
-            db.session.add(a)
-            db.session.flush()  # Get the ID
-
-            # Clone default steps from measure into this assignment
-            defaults = (
-                MeasureStep.query.filter_by(measure_id=m.id)
-                .order_by(MeasureStep.step.asc())  # Changed from order_index to step
-                .all()
-            )
-            for idx, s in enumerate(defaults):
-                db.session.add(
-                    AssignmentStep(
-                        assignment_id=a.id,
-                        title=s.title,
-                        step=idx,
-                        is_completed=False,
-                    )
-                )
-            assigned_count += 1
-            created_assignment_ids.append(a.id)  # Track this assignment
-            current_app.logger.info(f"Assignment created with ID: {a.id}")
-
-        # Always commit at the end, not inside the loop
         db.session.commit()
         current_app.logger.info(f"Wizard complete: Created {created_count} measures, assigned {assigned_count}")
 
@@ -1233,62 +1039,44 @@ def save_assignment_details():
     """Save company-specific details for assignments."""
     from flask import session
     
+    from app.utils.assignments import bulk_update_details, parse_detail_rows
+    
     try:
         company_id = request.form.get("company_id", type=int)
-        assignment_ids = request.form.getlist("assignment_ids[]")
+        rows = parse_detail_rows(request.form)
         
-        if not company_id or not assignment_ids:
+        if not company_id or not rows:
             flash("Missing required data.", "danger")
             return redirect(url_for("admin.measures"))
         
         company = Company.query.get_or_404(company_id)
-        updated_count = 0
-        
-        # Update each assignment with its specific details
-        for assignment_id in assignment_ids:
-            assignment = MeasureAssignment.query.get(int(assignment_id))
-            if not assignment:
-                continue
-            
-            # Get the form data for this specific assignment
-            responsible = request.form.get(f"responsible_{assignment_id}", "").strip() or None
-            departments = request.form.get(f"departments_{assignment_id}", "").strip() or None
-            participants = request.form.get(f"participants_{assignment_id}", "").strip() or None
-            start_date_str = request.form.get(f"start_date_{assignment_id}", "").strip()
-            end_date_str = request.form.get(f"end_date_{assignment_id}", "").strip()
-            
-            # Update assignment
-            assignment.responsible = responsible
-            assignment.departments = departments
-            assignment.participants = participants
-            
-            # Parse and update dates
-            if start_date_str:
-                try:
-                    assignment.start_date = datetime.fromisoformat(start_date_str).date()
-                except Exception:
-                    pass
-            
-            if end_date_str:
-                try:
-                    assignment.end_date = datetime.fromisoformat(end_date_str).date()
-                    # Also update due_at
-                    assignment.due_at = datetime.combine(assignment.end_date, datetime.max.time())
-                except Exception:
-                    pass
-            
-            updated_count += 1
         
+        # Load, validate and update all rows in one pass
+        updated_count, errors = bulk_update_details(company_id, rows)
         db.session.commit()
         
+        if errors:
+            for err in errors:
+                label = err['measure'] or f"Assignment #{err['id']}"
+                flash(f"{label}: {err['error']}", "warning")
+            
+            # Keep the failed rows pending so they can be corrected
+            session['pending_assignment_ids'] = [
+                e['id'] for e in errors if e['measure']
+            ]
+            if updated_count:
+                flash(f"Updated {updated_count} assignment(s) for {company.name}.", "success")
+            if session['pending_assignment_ids']:
+                return redirect(url_for("admin.complete_assignment_details"))
+        else:
+            flash(
+                f"Successfully updated {updated_count} assignment(s) for {company.name}.",
+                "success"
+            )
+        
         # Clear session data
         session.pop('pending_assignment_ids', None)
         session.pop('pending_company_id', None)
-        
-        flash(
-            f"Successfully updated {updated_count} assignment(s) for {company.name}.",
-            "success"
-        )
         return redirect(url_for("admin.measures"))
         
     except Exception as e:
@@ -1306,7 +1094,7 @@ def save_assignment_details():
 def unassign_measure(assignment_id):
     """Soft-delete an assignment by setting deleted_at timestamp."""
     try:
-        assignment = MeasureAssignment.query.get_or_404(assignment_id)
+        assignment = MeasureAssignment.query.with_deleted().get_or_404(assignment_id)
         
         if assignment.deleted_at:
             flash("This assignment has already been unassigned.", "warning")
@@ -1365,12 +1153,12 @@ def company_profile(company_id):
     # Check if we're in edit mode
     editing = request.args.get('edit', '0') == '1'
     
-    # Exclude soft-deleted assignments from company profile view
-    assignments = MeasureAssignment.query.filter_by(
+    # Only loaded if the Active Measures fragment is not cached
+    assignments = Deferred(MeasureAssignment.query.options(
+        joinedload(MeasureAssignment.measure)
+    ).filter_by(
         company_id=company.id
-    ).filter(
-        MeasureAssignment.deleted_at.is_(None)
-    ).order_by(MeasureAssignment.order.asc()).all()
+    ).order_by(MeasureAssignment.order.asc()).all)
     # Get benchmarking data for this company
     from app.models import CompanyBenchmark
     benchmarks = CompanyBenchmark.query.filter_by(company_id=company.id).order_by(CompanyBenchmark.data_year).all()
@@ -1405,8 +1193,24 @@ def delete_company(company_id):
         return redirect(url_for("admin.companies"))
 
 # --- CRUD for Measures ---
+def _measure_profile_version(measure_id):
+    """What measure_profile.html shows: the measure, its steps, its assignment count"""
+    from sqlalchemy import func
+
+    measure_updated = db.session.query(Measure.updated_at).filter(Measure.id == measure_id).scalar()
+    if measure_updated is None:
+        return None
+    steps = db.session.query(func.count(MeasureStep.id), func.max(MeasureStep.updated_at)) \
+        .filter(MeasureStep.measure_id == measure_id).one()
+    # Counts live assignments only, like measure.active_assignments
+    assigned = db.session.query(func.count(MeasureAssignment.id), func.max(MeasureAssignment.updated_at)) \
+        .filter(MeasureAssignment.measure_id == measure_id).one()
+    return (measure_updated, tuple(steps), tuple(assigned))
+
+
 @admin_bp.route("/measures/<int:measure_id>")
 @login_required
+@conditional_page(_measure_profile_version)
 def measure_profile(measure_id):
     measure = Measure.query.get_or_404(measure_id)
     return render_template("admin/measure_profile.html", measure=measure, now=datetime.utcnow())
@@ -1637,19 +1441,20 @@ def update_assignment_order(company_id):
     if not current_user.is_admin:
         return jsonify({"error": "Access denied"}), 403
     
+    from app.utils.ordering import reorder_from_payload
+
     try:
         data = request.get_json()
-        if not data or 'assignments' not in data:
+        if not data or ('assignments' not in data and 'move' not in data):
             return jsonify({"error": "Invalid data"}), 400
         
-        # Update assignment orders
-        for item in data['assignments']:
-            assignment = MeasureAssignment.query.filter_by(
-                id=item['id'],
-                company_id=company_id
-            ).first()
-            if assignment:
-                assignment.order = item['order']
+        # One UPDATE; the company_id scope is enforced in the same statement
+        payload = data if 'move' in data else data['assignments']
+        updated, expected = reorder_from_payload(MeasureAssignment, payload, scope={'company_id': company_id})
+        if updated != expected:
+            db.session.rollback()
+            return jsonify({"error": "Some assignments do not belong to this company "
+                                     "or the list has changed; reload and try again"}), 400
         
         db.session.commit()
         return jsonify({"success": True, "message": "Assignment order updated"})
@@ -1666,14 +1471,14 @@ def update_measure_order():
     if not current_user.is_admin:
         return jsonify({"error": "Access denied"}), 403
     
-    order_data = request.json
+    from app.utils.ordering import reorder_from_payload
     
     try:
-        for item in order_data:
-            measure = Measure.query.get(item['id'])
-            if measure:
-                measure.order = item['order']
-        
+        updated, expected = reorder_from_payload(Measure, request.json)
+        if updated != expected:
+            db.session.rollback()
+            return jsonify({"error": "Some measures do not exist "
+                                     "or the list has changed; reload and try again"}), 400
         db.session.commit()
         return jsonify({"success": True})
     except Exception as e:
@@ -1687,13 +1492,25 @@ def update_step_order():
     if not current_user.is_admin:
         return jsonify({"error": "Access denied"}), 403
     
-    order_data = request.json
+    from app.utils.ordering import reorder_from_payload
     
     try:
-        for item in order_data:
-            step = Step.query.get(item['id'])
-            if step:
-                step.order = item['order']
+        data = request.get_json()
+        # {"measure_id": 3, "steps": [...]}, {"move": {...}} or a bare list of steps
+        payload = data.get('steps', data) if isinstance(data, dict) and 'move' not in data else data
+        if not payload:
+            return jsonify({"error": "Invalid data"}), 400
+        measure_id = data.get('measure_id') if isinstance(data, dict) else None
+        if measure_id is None:
+            first_id = payload['move']['id'] if isinstance(payload, dict) else payload[0]['id']
+            measure_id = db.session.query(Step.measure_id).filter_by(id=int(first_id)).scalar()
+        
+        # One UPDATE; the measure_id scope is enforced in the same statement
+        updated, expected = reorder_from_payload(Step, payload, scope={'measure_id': int(measure_id or 0)})
+        if updated != expected:
+            db.session.rollback()
+            return jsonify({"error": "Some steps do not belong to this measure "
+                                     "or the list has changed; reload and try again"}), 400
         
         db.session.commit()
         return jsonify({"success": True})
@@ -1709,7 +1526,7 @@ def update_step_order():
 @login_required
 def test_company_email():
     """Send a test email notification to a company."""
-    companies = Company.query.order_by(Company.name).all()
+    companies = company_choices()
     
     if request.method == "POST":
         company_id = request.form.get("company_id", type=int)
@@ -1860,7 +1677,7 @@ def resolve_assistance_notification(notification_id):
     measure_name = getattr(measure, "name", "Measure")
     
     # Update the assistance request and assignment
-    prev_status = assistance_request.prev_status or "In Progress"
+    prev_status = _status_to_restore(assignment, assistance_request.prev_status)
     assignment.status = prev_status
     assistance_request.decision = "resolved"
     assistance_request.decision_notes = notes
@@ -2146,6 +1963,7 @@ def seed_data_endpoint():
 
 @admin_bp.route("/companies/export-benchmarking-data")
 @login_required
+@reads_from_replica
 def export_benchmarking_data():
     """Export benchmarking data as CSV"""
     if getattr(current_user, "role", "") != "admin":
@@ -2258,60 +2076,73 @@ def admin_profile():
 @admin_bp.route("/parse-measure-document", methods=["POST"])
 @login_required
 def parse_measure_document():
-    """Parse uploaded PDF or PowerPoint document to extract measure data"""
+    """Parse uploaded PDF or PowerPoint document(s) to extract measure data"""
     import os
     import tempfile
     from werkzeug.utils import secure_filename
-    from app.utils.document_parser import parse_measure_document as parse_doc
+    from app.utils.document_parser import parse_measure_documents
     
     try:
         if 'document' not in request.files:
             return {'success': False, 'error': 'No file uploaded'}, 400
         
-        file = request.files['document']
-        if file.filename == '':
+        # Several decks may be uploaded at once; they are parsed concurrently
+        files = [f for f in request.files.getlist('document') if f.filename != '']
+        if not files:
             return {'success': False, 'error': 'No file selected'}, 400
         
-        # Get file extension
-        filename = secure_filename(file.filename)
-        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-        
-        if file_ext not in ['pdf', 'ppt', 'pptx', 'doc', 'docx', 'png', 'jpg', 'jpeg', 'webp']:
-            return {'success': False, 'error': 'Unsupported file type. Please upload PDF, PowerPoint, Word, or image files.'}, 400
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}') as tmp_file:
-            file.save(tmp_file.name)
-            tmp_path = tmp_file.name
+        uploads = []
+        for file in files:
+            # Get file extension
+            filename = secure_filename(file.filename)
+            file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+            
+            if file_ext not in ['pdf', 'ppt', 'pptx', 'doc', 'docx', 'png', 'jpg', 'jpeg', 'webp']:
+                return {'success': False, 'error': 'Unsupported file type. Please upload PDF, PowerPoint, Word, or image files.'}, 400
+            uploads.append((file, file_ext))
         
+        tmp_paths = []
         try:
-            # Parse the document (AI-enabled by default if API key is available)
-            result = parse_doc(tmp_path, file_ext, use_ai=True)
+            # Save to temporary files
+            for file, file_ext in uploads:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}') as tmp_file:
+                    file.save(tmp_file.name)
+                    tmp_paths.append((tmp_file.name, file_ext))
+            
+            # Parse the documents (AI-enabled by default if API key is available)
+            results = parse_measure_documents(
+                tmp_paths, use_ai=True,
+                max_measures=current_app.config.get('PARSER_MAX_MEASURES') or None,
+            )
             
             # Convert date objects to strings for JSON serialization
-            measures = result.get('measures', [])
-            for measure in measures:
-                if measure.get('start_date'):
-                    measure['start_date'] = measure['start_date'].isoformat() if hasattr(measure['start_date'], 'isoformat') else measure['start_date']
-                if measure.get('end_date'):
-                    measure['end_date'] = measure['end_date'].isoformat() if hasattr(measure['end_date'], 'isoformat') else measure['end_date']
+            measures = []
+            for result in results:
+                for measure in result.get('measures', []):
+                    if measure.get('start_date'):
+                        measure['start_date'] = measure['start_date'].isoformat() if hasattr(measure['start_date'], 'isoformat') else measure['start_date']
+                    if measure.get('end_date'):
+                        measure['end_date'] = measure['end_date'].isoformat() if hasattr(measure['end_date'], 'isoformat') else measure['end_date']
+                    measures.append(measure)
             
+            errors = [r['error'] for r in results if r.get('error')]
             return {
                 'success': True, 
                 'data': {
                     'measures': measures,
                     'count': len(measures),
-                    'method': result.get('method', 'unknown'),
-                    'error': result.get('error', None)  # Pass error message if any
+                    'method': results[0].get('method', 'unknown'),
+                    'error': '; '.join(errors) if errors else None  # Pass error message if any
                 }
             }, 200
             
         finally:
-            # Clean up temporary file
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
+            # Clean up temporary files
+            for tmp_path, _ in tmp_paths:
+                try:
+                    os.unlink(tmp_path)
+                except:
+                    pass
                 
     except Exception as e:
         current_app.logger.error(f"Error parsing document: {str(e)}")
@@ -2337,7 +2168,7 @@ def parse_pasted_text():
         if os.getenv('OPENAI_API_KEY'):
             try:
                 from app.utils.document_parser import extract_with_ai
-                measures = extract_with_ai(pasted_text, [])
+                measures = extract_with_ai(pasted_text)
                 if measures:
                     # Convert date objects to strings for JSON
                     for measure in measures:
@@ -2529,8 +2360,41 @@ def delete_user(user_id):
         return redirect(url_for('admin.users'))
 
 
+@admin_bp.route("/diagnostics", methods=["GET"])
+@login_required
+def diagnostics():
+    """Row counts, schema state and connection pools (kept off the health probes)"""
+    from sqlalchemy.engine import make_url
+    from app.database import pool_metrics
+    from app.models import ActivityLog
+    from app.routes.health_routes import readiness
+
+    counts = [
+        ("Users", User.query.count()),
+        ("Companies", Company.query.count()),
+        ("Measures", Measure.query.count()),
+        ("Assignments (active)", MeasureAssignment.query.count()),
+        ("Assignments (unassigned)", MeasureAssignment.query.with_deleted()
+            .filter(MeasureAssignment.deleted_at.isnot(None)).count()),
+        ("Assignment steps", AssignmentStep.query.count()),
+        ("Notifications", Notification.query.count()),
+        ("Open assistance requests", AssistanceRequest.query.filter_by(decision="open").count()),
+        ("Activity log entries", ActivityLog.query.count()),
+    ]
+
+    return render_template(
+        "admin/diagnostics.html",
+        counts=counts,
+        readiness=readiness(),
+        pools=pool_metrics(),
+        database_url=make_url(current_app.config["SQLALCHEMY_DATABASE_URI"]).render_as_string(hide_password=True),
+        dialect=db.engine.dialect.name,
+    )
+
+
 @admin_bp.route("/activity-logs", methods=["GET"])
 @login_required
+@reads_from_replica
 def activity_logs():
     """View activity logs - admin only"""
     if not current_user.is_admin:
@@ -2658,7 +2522,8 @@ def send_progress_report_now():
         current_app.logger.info(f"Recipients: {len(admin_emails)} admins, {len(additional_emails)} additional")
         
         # Generate full progress report HTML
-        html_content = generate_progress_report_html()
+        with db.bind_for(READ_BIND):
+            html_content = generate_progress_report_html()
         subject = f"PTSA Tracker Progress Report - {datetime.utcnow().strftime('%B %d, %Y')}"
         
         print(f"Sending to: {', '.join(all_recipients)}", flush=True)
@@ -2750,9 +2615,8 @@ def cron_send_progress_report():
     
     try:
         from app.utils.email_reports import send_progress_report
-        from app.models import SystemSettings
         
-        settings = SystemSettings.get_settings()
+        settings = settings_snapshot()
         
         if not settings.progress_report_enabled:
             return jsonify({"status": "skipped", "message": "Progress reports are disabled"}), 200
@@ -2779,7 +2643,8 @@ def cron_send_progress_report():
             should_send = days_since >= 28 and now.day == settings.progress_report_day
         
         if should_send:
-            success = send_progress_report()
+            with track_job('progress-report'):
+                success = send_progress_report()
             if success:
                 return jsonify({"status": "success", "message": "Progress report sent"}), 200
             else:
@@ -2808,15 +2673,15 @@ def cron_send_reminders():
     
     try:
         from app.utils.email_reports import send_due_date_reminders
-        from app.models import SystemSettings
         
-        settings = SystemSettings.get_settings()
+        settings = settings_snapshot()
         
         if not settings.reminder_email_enabled:
             return jsonify({"status": "skipped", "message": "Reminder emails are disabled"}), 200
         
         # Send reminders (function checks if there are any due)
-        success = send_due_date_reminders()
+        with track_job('due-date-reminders'):
+            success = send_due_date_reminders()
         
         if success:
             return jsonify({"status": "success", "message": "Reminders sent"}), 200
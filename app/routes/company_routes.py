@@ -17,11 +17,14 @@ from flask import (
     abort,
 )
 from flask_login import current_user, login_required
-from sqlalchemy.orm import joinedload
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.utils import secure_filename
 
 from app.extensions import db
+from app.fragment_cache import Deferred, bypass_fragment_cache
 from app.models import MeasureAssignment, AssignmentStep, Attachment, Measure, Company, Step
+from app.models import status_from_counts_sql
 from app.utils.notification_helpers import get_overdue_measures_for_company, create_overdue_notifications
 
 # Optional/soft imports (routes guard if models are missing)
@@ -68,29 +71,6 @@ def _owns_assignment(a: MeasureAssignment) -> bool:
     return a.company_id == getattr(current_user, "company_id", None)
 
 
-def _recalc_assignment_status(a: MeasureAssignment) -> None:
-    """
-    Derive status from steps, BUT never override special states
-    that must persist until admin intervention.
-    """
-    if (a.status or "").strip().lower() in {"needs assistance", "blocked", "on hold"}:
-        return  # preserve special state
-
-    steps = a.steps or []
-    if not steps:
-        a.status = "Not Started"
-        return
-
-    total = len(steps)
-    done = sum(1 for s in steps if s.is_completed)
-    if done == 0:
-        a.status = "Not Started"
-    elif done < total:
-        a.status = "In Progress"
-    else:
-        a.status = "Completed"
-
-
 # ----------------- Views -----------------
 def get_overdue_assignments_for_company(company_id):
     """Get all overdue assignments for a company"""
@@ -99,9 +79,8 @@ def get_overdue_assignments_for_company(company_id):
     
     overdue = MeasureAssignment.query.filter(
         MeasureAssignment.company_id == company_id,
-        MeasureAssignment.due_at < current_time,
-        MeasureAssignment.status.in_(['Not Started', 'In Progress', 'Needs Assistance'])
-    ).order_by(MeasureAssignment.due_at.asc()).all()
+        MeasureAssignment.overdue_filter(current_time.date())
+    ).order_by(MeasureAssignment.effective_due_at.asc()).all()
     
     return overdue
 @company_bp.route("/profile", methods=["GET", "POST"])
@@ -128,11 +107,8 @@ def company_profile():
         # Check if edit mode is requested
         editing = request.args.get('edit', '0') == '1'
         
-        # Exclude soft-deleted assignments
         assignments = MeasureAssignment.query.filter_by(
             company_id=current_user.company_id
-        ).filter(
-            MeasureAssignment.deleted_at.is_(None)
         ).all()
         return render_template("company/company_profile.html", company=company, assignments=assignments, editing=editing)
     except Exception as e:
@@ -169,13 +145,27 @@ def toggle_step(step_id: int):
         if not _owns_assignment(a):
             abort(403)
 
-        step.is_completed = not step.is_completed
-        step.completed_at = datetime.utcnow() if step.is_completed else None
-
-        # Do NOT override Needs Assistance (admin will resolve)
-        if (a.status or "").strip().lower() != "needs assistance":
-            _recalc_assignment_status(a)
-
+        # Flip the step only if nobody else flipped it first, then move the
+        # assignment counter and status in one atomic UPDATE; special states
+        # such as Needs Assistance are preserved by status_from_counts_sql().
+        completed = not step.is_completed
+        flipped = db.session.execute(
+            update(AssignmentStep)
+            .where(AssignmentStep.id == step.id, AssignmentStep.is_completed == step.is_completed)
+            .values(is_completed=completed, completed_at=datetime.utcnow() if completed else None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if flipped:
+            delta = 1 if completed else -1
+            table = MeasureAssignment.__table__
+            db.session.execute(
+                table.update()
+                .where(table.c.id == a.id)
+                .values(
+                    steps_completed=table.c.steps_completed + delta,
+                    status=status_from_counts_sql(table.c.steps_total, table.c.steps_completed + delta),
+                )
+            )
         db.session.commit()
         
         # Log activity
@@ -343,7 +333,7 @@ def request_assistance(assignment_id: int):
         abort(403)
 
     # Ignore if already flagged
-    if (a.status or "").lower() == "needs assistance":
+    if a.status == "Needs Assistance":
         flash("Already marked as 'Needs Assistance'.", "info")
         return redirect(url_for("company.dashboard"))
 
@@ -413,7 +403,12 @@ def notifications():
         return redirect(url_for("company.dashboard"))
     
     # Get notifications for this company
-    db_notifications = Notification.query.filter_by(
+    # selectinload (a relationship load) still shows notifications whose
+    # assignment has since been unassigned
+    db_notifications = Notification.query.options(
+        selectinload(Notification.assignment).joinedload(MeasureAssignment.measure),
+        selectinload(Notification.assignment).joinedload(MeasureAssignment.company),
+    ).filter_by(
         company_id=current_user.company_id
     ).filter(
         Notification.read_at.is_(None)  # Only unread
@@ -434,13 +429,14 @@ def notifications():
     
     # Get overdue assignments for notifications
     now = datetime.utcnow()
-    overdue_assignments = MeasureAssignment.query.filter_by(
+    overdue_assignments = MeasureAssignment.query.options(
+        joinedload(MeasureAssignment.measure),
+        joinedload(MeasureAssignment.company),
+    ).filter_by(
         company_id=current_user.company_id
     ).filter(
-        MeasureAssignment.due_at.isnot(None),
-        MeasureAssignment.due_at < now,
-        MeasureAssignment.status != "Completed"
-    ).all()
+        MeasureAssignment.overdue_filter(now.date())
+    ).order_by(MeasureAssignment.effective_due_at.asc()).all()
     
     # Create notification-like objects for overdue assignments
     overdue_notifications = []
@@ -510,17 +506,18 @@ def mark_all_notifications_read():
 def dashboard():
     from datetime import datetime
     try:
-        # Exclude soft-deleted assignments
-        assignments = MeasureAssignment.query.filter_by(
+        # Only loaded if a dashboard fragment is not cached
+        assignments = Deferred(MeasureAssignment.query.options(
+            joinedload(MeasureAssignment.measure)
+        ).filter_by(
             company_id=current_user.company_id
-        ).filter(
-            MeasureAssignment.deleted_at.is_(None)
-        ).all()
+        ).all)
         return render_template("company/dashboard.html", assignments=assignments, now=datetime.utcnow())
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Dashboard error: {str(e)}")
         flash("An error occurred while loading the dashboard. Please try again.", "danger")
+        bypass_fragment_cache()
         return render_template("company/dashboard.html", assignments=[], now=datetime.utcnow())
 
 
@@ -0,0 +1,94 @@
+"""
+Liveness and readiness probes
+
+Platforms probe every few seconds, so neither probe may cost more as the
+data grows:
+
+- /livez answers without touching the database: the process is up and
+  serving requests.
+- /readyz runs ``SELECT 1`` at most once per READINESS_CACHE_SECONDS per
+  process, and checks once that the schema is at the migration head.
+  /health is kept as an alias for existing deploy configs.
+
+Row counts and other diagnostics live on /admin/diagnostics.
+"""
+import os
+import threading
+import time
+
+from flask import Blueprint, current_app
+from sqlalchemy import text
+
+from app.extensions import db
+
+health_bp = Blueprint('health', __name__)
+
+_state = {'checked_at': None, 'ready': False, 'detail': {}}
+_schema_current = False
+_check_lock = threading.Lock()
+
+
+@health_bp.route('/livez')
+def livez():
+    return {'status': 'alive'}, 200
+
+
+def _migrations_dir() -> str:
+    return os.path.join(os.path.dirname(current_app.root_path), 'migrations')
+
+
+def _check_schema() -> str:
+    """'current', 'unmanaged' (no alembic_version) or the pending head(s)"""
+    global _schema_current
+    if _schema_current:
+        return 'current'
+
+    from app.utils.migration_gate import current_revisions, head_revisions
+
+    current = current_revisions()
+    if not current:
+        # Created with db.create_all() (local dev); nothing to compare
+        return 'unmanaged'
+    heads = head_revisions(_migrations_dir())
+    if current == heads:
+        _schema_current = True  # schemas only move forward; never re-check
+        return 'current'
+    return f"behind: {', '.join(sorted(current))} -> {', '.join(sorted(heads))}"
+
+
+def _refresh() -> None:
+    detail = {}
+    ready = False
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        detail['database'] = 'connected'
+        detail['schema'] = _check_schema()
+        ready = not detail['schema'].startswith('behind')
+    except Exception as e:
+        detail['database'] = 'unavailable'
+        detail['error'] = str(e).splitlines()[0][:200]
+    _state.update(checked_at=time.monotonic(), ready=ready, detail=detail)
+
+
+def readiness() -> dict:
+    """Cached readiness state; at most one thread per process re-checks"""
+    ttl = current_app.config.get('READINESS_CACHE_SECONDS', 5)
+    checked_at = _state['checked_at']
+    if checked_at is None or time.monotonic() - checked_at >= ttl:
+        # Concurrent probes get the previous answer instead of queueing
+        # behind a slow database
+        if _check_lock.acquire(blocking=checked_at is None):
+            try:
+                _refresh()
+            finally:
+                _check_lock.release()
+    return {'ready': _state['ready'], **_state['detail']}
+
+
+@health_bp.route('/readyz')
+@health_bp.route('/health')
+def readyz():
+    state = readiness()
+    status = 'ready' if state.pop('ready') else 'unavailable'
+    return {'status': status, **state}, 200 if status == 'ready' else 503
@@ -9,14 +9,3 @@ def index():
     # Always redirect to login page
     # The login page will redirect authenticated users to their dashboards
     return redirect(url_for('auth.login'))
-
-@main_bp.route('/health')
-def health_check():
-    """Health check endpoint for monitoring"""
-    try:
-        # Test database connectivity
-        from app.extensions import db
-        db.session.execute(db.text('SELECT 1'))
-        return {'status': 'healthy', 'database': 'connected'}, 200
-    except Exception as e:
-        return {'status': 'unhealthy', 'error': str(e)}, 500
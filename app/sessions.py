@@ -0,0 +1,215 @@
+"""
+Optional server-side session storage
+
+By default Flask keeps the whole session in a signed cookie. With
+SESSION_BACKEND set to ``database`` or ``filesystem`` the cookie carries only
+a random session id. The data lives in the ``server_sessions`` table or in
+one file per session under SESSION_FILE_DIR. The filesystem store is shared
+by all gunicorn workers on one host.
+
+The stored record is only rewritten, and the cookie only re-sent, when the
+session changes. The middleware refreshes ``last_activity`` at most every
+SESSION_ACTIVITY_REFRESH_MINUTES, so an active user causes one write per
+interval rather than one per request. The id is rotated whenever the logged-in
+user changes, to guard against session fixation.
+
+``flask purge-sessions`` deletes expired records.
+"""
+import json
+import os
+import re
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from flask import Flask
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import CallbackDict
+
+_SID_RE = re.compile(r'^[A-Za-z0-9_-]{32,64}$')
+
+
+def _new_sid() -> str:
+    return secrets.token_urlsafe(32)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid: str = '', new: bool = False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.initial_user_id = (initial or {}).get('_user_id')
+
+
+class DatabaseSessionStore:
+    """Sessions in the server_sessions table, outside the request's transaction"""
+
+    def _table(self):
+        from app.models import ServerSession
+        return ServerSession.__table__
+
+    def _engine(self):
+        from app.extensions import db
+        return db.engine
+
+    def load(self, sid: str) -> Optional[str]:
+        table = self._table()
+        with self._engine().connect() as conn:
+            return conn.execute(
+                select(table.c.data).where(table.c.id == sid, table.c.expires_at > datetime.utcnow())
+            ).scalar()
+
+    def save(self, sid: str, data: str, expires_at: datetime) -> None:
+        table = self._table()
+        # Own connection and transaction: never commits the view's pending changes
+        with self._engine().begin() as conn:
+            updated = conn.execute(
+                update(table).where(table.c.id == sid).values(data=data, expires_at=expires_at)
+            ).rowcount
+            if not updated:
+                conn.execute(insert(table).values(id=sid, data=data, expires_at=expires_at))
+
+    def delete(self, sid: str) -> None:
+        table = self._table()
+        with self._engine().begin() as conn:
+            conn.execute(delete(table).where(table.c.id == sid))
+
+    def purge(self) -> int:
+        table = self._table()
+        with self._engine().begin() as conn:
+            return conn.execute(delete(table).where(table.c.expires_at <= datetime.utcnow())).rowcount
+
+
+class FileSessionStore:
+    """One JSON file per session; writes are atomic renames"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sid: str) -> str:
+        return os.path.join(self.directory, f"{sid}.json")
+
+    def load(self, sid: str) -> Optional[str]:
+        try:
+            with open(self._path(sid)) as fh:
+                record = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if record.get('expires_at', 0) <= datetime.utcnow().timestamp():
+            return None
+        return record.get('data')
+
+    def save(self, sid: str, data: str, expires_at: datetime) -> None:
+        path = self._path(sid)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump({'data': data, 'expires_at': expires_at.timestamp()}, fh)
+        os.replace(tmp, path)
+
+    def delete(self, sid: str) -> None:
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+    def purge(self) -> int:
+        now = datetime.utcnow().timestamp()
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as fh:
+                    expired = json.load(fh).get('expires_at', 0) <= now
+            except (OSError, ValueError):
+                expired = True
+            if expired:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app: Flask, request) -> ServerSideSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and _SID_RE.match(sid):
+            data = self.store.load(sid)
+            if data is not None:
+                try:
+                    return ServerSideSession(self.serializer.loads(data), sid=sid)
+                except ValueError:
+                    pass
+        return ServerSideSession(sid=_new_sid(), new=True)
+
+    def save_session(self, app: Flask, session: ServerSideSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:  # cleared, e.g. on logout or idle expiry
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not (session.modified or self.should_set_cookie(app, session)):
+            return
+
+        if session.get('_user_id') != session.initial_user_id and not session.new:
+            # Logged-in user changed: move the data to a fresh id
+            self.store.delete(session.sid)
+            session.sid = _new_sid()
+
+        expires = self.get_expiration_time(app, session)
+        stored_until = expires or datetime.utcnow() + app.permanent_session_lifetime
+        self.store.save(session.sid, self.serializer.dumps(dict(session)), stored_until)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=expires,
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def make_store(app: Flask):
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend == 'database':
+        return DatabaseSessionStore()
+    if backend == 'filesystem':
+        return FileSessionStore(app.config['SESSION_FILE_DIR'])
+    return None
+
+
+def setup_sessions(app: Flask) -> None:
+    """Install the server-side session interface unless SESSION_BACKEND=cookie"""
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend == 'cookie':
+        return
+    store = make_store(app)
+    if store is None:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}; use cookie, database or filesystem")
+    app.session_interface = ServerSideSessionInterface(store)
+    app.logger.info("Sessions stored server-side (%s)", backend)
@@ -7,7 +7,7 @@ from app.models import ActivityLog
 
 
 def log_activity(action: str, entity_type: str = None, entity_id: int = None, 
-                 entity_name: str = None, details: dict = None):
+                 entity_name: str = None, details: dict = None, commit: bool = True):
     """
     Log a user activity
     
@@ -17,6 +17,7 @@ def log_activity(action: str, entity_type: str = None, entity_id: int = None,
         entity_id: ID of the entity
         entity_name: Name/title of the entity for reference
         details: Additional details as a dictionary
+        commit: Commit immediately; pass False to join the caller's transaction
     """
     try:
         if not current_user.is_authenticated:
@@ -42,12 +43,14 @@ def log_activity(action: str, entity_type: str = None, entity_id: int = None,
         )
         
         db.session.add(activity)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         
     except Exception as e:
         # Don't let logging errors break the application
         print(f"Error logging activity: {e}")
-        db.session.rollback()
+        if commit:
+            db.session.rollback()
 
 
 def log_login(user_email: str):
@@ -68,14 +71,16 @@ def log_logout(user_email: str):
     )
 
 
-def log_create(entity_type: str, entity_id: int, entity_name: str, details: dict = None):
+def log_create(entity_type: str, entity_id: int, entity_name: str, details: dict = None,
+               commit: bool = True):
     """Log entity creation"""
     log_activity(
         action='create',
         entity_type=entity_type,
         entity_id=entity_id,
         entity_name=entity_name,
-        details=details
+        details=details,
+        commit=commit
     )
 
 
@@ -0,0 +1,311 @@
+"""
+OpenAI extraction client used by the document parser
+
+Long documents are split into chunks that fit the model context, chunks are
+sent concurrently (bounded by a semaphore and a token-bucket rate limiter),
+transient failures are retried with exponential backoff, and the per-chunk
+results are merged into a single list of measures. Identical requests that
+are in flight at the same time are coalesced into one API call.
+
+Configuration (environment):
+    OPENAI_API_KEY           API key (required)
+    OPENAI_BASE_URL          Alternative endpoint, e.g. the local stub server in
+                             check_ai_extraction.py (--serve PORT)
+    AI_EXTRACTION_MODEL      Text model (default gpt-4-turbo-preview)
+    AI_VISION_MODEL          Vision model (default gpt-4-vision-preview)
+    AI_MAX_CONCURRENCY       Concurrent requests per process (default 4)
+    AI_REQUESTS_PER_MINUTE   Request rate limit (default 60)
+    AI_TOKENS_PER_MINUTE     Token rate limit (default 90000)
+    AI_CHUNK_TOKENS          Max document tokens per request (default 6000)
+    AI_MAX_RETRIES           Retries for transient failures (default 3)
+"""
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Rough characters-per-token ratio for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+TEXT_PROMPT = """
+    Extract all improvement measures from the following document text.
+    Return a JSON array of measure objects, where each measure has these fields:
+
+    - name: Measure name/title
+    - measure_detail: Description of the measure
+    - target: Target or objective
+    - departments: Focus area or departments involved
+    - responsible: Person responsible
+    - participants: Comma-separated list of participants
+    - start_date: Start date in YYYY-MM-DD format (if mentioned)
+    - end_date: End date in YYYY-MM-DD format (if mentioned)
+    - steps: Array of step descriptions (Step 1, Step 2, etc.)
+
+    If a field is not found, use null. Parse dates intelligently.
+
+    Document text:
+    """
+
+VISION_PROMPT = """
+    Analyze this image of a business improvement measure document and extract ALL measures.
+    Return a JSON object with a "measures" array, where each measure has these fields:
+
+    - name: Measure name/title
+    - measure_detail: Description of the measure
+    - target: Target or objective
+    - departments: Focus area or departments (e.g., "Process", "Technology")
+    - responsible: Person responsible
+    - participants: Comma-separated list of participants
+    - start_date: Start date in YYYY-MM-DD format (if mentioned)
+    - end_date: End date in YYYY-MM-DD format (if mentioned)
+    - steps: Array of step descriptions (extract "Step 1", "Step 2", etc.)
+
+    Parse all text visible in the image, including tables. If a field is not found, use null.
+    Extract dates intelligently (e.g., "October 30, 2025" -> "2025-10-30").
+    """
+
+SYSTEM_PROMPT = "You are an expert at extracting structured data from business improvement documents. Always return valid JSON."
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for chunking and rate limiting"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate`` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until ``amount`` tokens are available, then take them"""
+        # A single request larger than the bucket would never fit; let it
+        # through once the bucket is full instead of blocking forever.
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into chunks of at most ``max_tokens`` (estimated)
+
+    Chunks break at "Measure N" headers where possible so a measure is not
+    split across requests; oversized sections fall back to paragraph and
+    finally hard character boundaries.
+    """
+    from app.utils.document_parser import MEASURE_HEADER_RE
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text] if text.strip() else []
+
+    starts = [m.start() for m in MEASURE_HEADER_RE.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+    pieces = []
+    for section in sections:
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        for paragraph in section.split("\n\n"):
+            paragraph += "\n\n"
+            while len(paragraph) > max_chars:
+                pieces.append(paragraph[:max_chars])
+                paragraph = paragraph[max_chars:]
+            pieces.append(paragraph)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def merge_measures(results: List[List[Dict]]) -> List[Dict]:
+    """Merge per-chunk results in order, dropping repeated measure names"""
+    merged = []
+    seen = set()
+    for measures in results:
+        for measure in measures:
+            key = (measure.get('name') or '').strip().lower()
+            if key and key in seen:
+                continue
+            if key:
+                seen.add(key)
+            merged.append(measure)
+    return merged
+
+
+def _parse_measures(content: str) -> List[Dict]:
+    result = json.loads(content)
+    if isinstance(result, list):
+        return result
+    if 'measures' in result:
+        return result['measures']
+    return [result]
+
+
+class AIExtractionClient:
+    """Concurrent, rate-limited OpenAI client for measure extraction"""
+
+    # Exceptions worth retrying; resolved lazily so importing this module
+    # does not import openai.
+    RETRYABLE = ('RateLimitError', 'APIConnectionError', 'APITimeoutError', 'InternalServerError')
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: Optional[str] = None, vision_model: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None, chunk_tokens: Optional[int] = None,
+                 max_retries: Optional[int] = None, backoff_base: float = 1.0):
+        from openai import OpenAI
+
+        # Retries are handled here so they also go through the rate limiter
+        self.openai = OpenAI(
+            api_key=api_key or os.getenv('OPENAI_API_KEY'),
+            base_url=base_url or os.getenv('OPENAI_BASE_URL') or None,
+            max_retries=0,
+        )
+        self.model = model or os.getenv('AI_EXTRACTION_MODEL', 'gpt-4-turbo-preview')
+        self.vision_model = vision_model or os.getenv('AI_VISION_MODEL', 'gpt-4-vision-preview')
+        self.max_concurrency = max_concurrency or int(os.getenv('AI_MAX_CONCURRENCY', 4))
+        self.chunk_tokens = chunk_tokens or int(os.getenv('AI_CHUNK_TOKENS', 6000))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('AI_MAX_RETRIES', 3))
+        self.backoff_base = backoff_base
+
+        rpm = requests_per_minute or int(os.getenv('AI_REQUESTS_PER_MINUTE', 60))
+        tpm = tokens_per_minute or int(os.getenv('AI_TOKENS_PER_MINUTE', 90000))
+        self.request_bucket = TokenBucket(rpm / 60.0, max(1, self.max_concurrency))
+        self.token_bucket = TokenBucket(tpm / 60.0, tpm)
+
+        self.semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency * 2,
+                                           thread_name_prefix='ai-extract')
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    # ----- public API -----
+
+    def extract_text(self, text: str) -> List[Dict]:
+        """Extract measures from a document's text, chunking as needed"""
+        return self.extract_texts([text])[0]
+
+    def extract_texts(self, texts: List[str]) -> List[List[Dict]]:
+        """Extract measures from several documents concurrently"""
+        futures = [
+            [self._submit_coalesced(self._text_messages(chunk), self.model, estimate_tokens(chunk))
+             for chunk in chunk_text(text, self.chunk_tokens)]
+            for text in texts
+        ]
+        return [merge_measures([f.result() for f in doc_futures]) for doc_futures in futures]
+
+    def extract_image(self, file_path: str) -> List[Dict]:
+        """Extract measures from an image with the vision model"""
+        with open(file_path, 'rb') as image_file:
+            image_data = base64.b64encode(image_file.read()).decode('utf-8')
+
+        file_ext = file_path.split('.')[-1].lower()
+        mime_type = f"image/{file_ext if file_ext != 'jpg' else 'jpeg'}"
+        messages = [{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": VISION_PROMPT},
+                {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_data}"}},
+            ],
+        }]
+        # Vision requests are billed per image tile, not by base64 length
+        return self._submit_coalesced(messages, self.vision_model, 1500, json_mode=False,
+                                      max_tokens=2000).result()
+
+    # ----- internals -----
+
+    def _text_messages(self, chunk: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": TEXT_PROMPT + "\n\n" + chunk},
+        ]
+
+    def _submit_coalesced(self, messages: List[Dict], model: str, prompt_tokens: int,
+                          json_mode: bool = True, max_tokens: Optional[int] = None) -> Future:
+        """Submit a request, sharing the future with any identical request in flight"""
+        key = hashlib.sha256(json.dumps([model, messages], sort_keys=True).encode()).hexdigest()
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self.executor.submit(self._call, messages, model, prompt_tokens,
+                                          json_mode, max_tokens)
+            self._inflight[key] = future
+
+        def _forget(_):
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+        future.add_done_callback(_forget)
+        return future
+
+    def _call(self, messages: List[Dict], model: str, prompt_tokens: int,
+              json_mode: bool, max_tokens: Optional[int]) -> List[Dict]:
+        import openai
+
+        retryable = tuple(getattr(openai, name) for name in self.RETRYABLE if hasattr(openai, name))
+        kwargs = {'model': model, 'messages': messages, 'temperature': 0.1}
+        if json_mode:
+            kwargs['response_format'] = {"type": "json_object"}
+        if max_tokens:
+            kwargs['max_tokens'] = max_tokens
+
+        attempt = 0
+        while True:
+            self.request_bucket.acquire()
+            self.token_bucket.acquire(prompt_tokens + (max_tokens or 1000))
+            try:
+                with self.semaphore:
+                    response = self.openai.chat.completions.create(**kwargs)
+                return _parse_measures(response.choices[0].message.content)
+            except retryable as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** attempt) * (1 + random.random())
+                print(f"OpenAI request failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+
+_client: Optional[AIExtractionClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ai_client() -> AIExtractionClient:
+    """Process-wide client so concurrency and rate limits are shared across requests"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AIExtractionClient()
+    return _client
@@ -0,0 +1,492 @@
+"""
+Bulk assignment helpers for PTSA Tracker
+
+Set-based replacements for the per-row loops in the admin wizard: measures are
+resolved with one IN query, missing measures and their default steps are
+bulk-inserted, and template steps for every new assignment are copied with a
+single INSERT ... SELECT.
+"""
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, literal, select, false, or_, update
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import AssignmentStep, Company, Measure, MeasureAssignment, MeasureStep, User
+
+
+# measures[0][name] / measures[0][steps][1][title]
+_NESTED_FIELD_RE = re.compile(r'^measures\[([^\]]+)\]\[([^\]]+)\](?:\[([^\]]+)\]\[([^\]]+)\])?$')
+
+
+def parse_measure_specs(form) -> list:
+    """
+    Parse the wizard's nested ``measures[i][field]`` form into a list of specs
+
+    Each spec is a dict of the raw string fields plus ``steps``, a list of
+    step titles. Specs keep the order in which they appear in the form.
+    """
+    specs = {}
+    for key, value in form.items():
+        match = _NESTED_FIELD_RE.match(key)
+        if not match:
+            continue
+        index, field, step_index, step_field = match.groups()
+        spec = specs.setdefault(index, {'steps': {}})
+        if field == 'steps' and step_index is not None:
+            if step_field == 'title':
+                spec['steps'][step_index] = value
+        elif step_index is None:
+            spec[field] = value
+
+    for spec in specs.values():
+        spec['steps'] = [t.strip() for t in spec['steps'].values() if t and t.strip()]
+    return list(specs.values())
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip()).date()
+    except Exception:
+        return None
+
+
+def _clean(value):
+    return (value or '').strip() or None
+
+
+def copy_template_steps(assignment_ids: list, now: datetime = None) -> None:
+    """
+    Copy each assignment's MeasureStep templates into AssignmentStep rows
+
+    Runs as one INSERT ... SELECT; steps are renumbered from 0 in template order.
+    """
+    if not assignment_ids:
+        return
+    now = now or datetime.utcnow()
+    step_number = func.row_number().over(
+        partition_by=MeasureAssignment.id,
+        order_by=(MeasureStep.step.asc(), MeasureStep.id.asc()),
+    ) - 1
+    template_steps = (
+        select(
+            MeasureAssignment.id,
+            MeasureStep.title,
+            step_number,
+            false(),
+            literal(0),
+            literal(now),
+            literal(now),
+        )
+        .join(MeasureStep, MeasureStep.measure_id == MeasureAssignment.measure_id)
+        .where(MeasureAssignment.id.in_(assignment_ids))
+    )
+    db.session.execute(
+        insert(AssignmentStep.__table__).from_select(
+            ['assignment_id', 'title', 'step', 'is_completed', 'order_index', 'created_at', 'updated_at'],
+            template_steps,
+        )
+    )
+    # Core INSERT ... SELECT bypasses the ORM step listeners
+    rebuild_step_counters(assignment_ids)
+
+
+def rebuild_step_counters(assignment_ids: list = None) -> int:
+    """
+    Recount steps_total / steps_completed from AssignmentStep rows
+
+    Used after bulk step inserts and by ``flask rebuild-step-counters`` to
+    repair drift. Only rows whose counters are wrong are rewritten.
+
+    Returns:
+        Number of assignments whose counters changed
+    """
+    total = (
+        select(func.count(AssignmentStep.id))
+        .where(AssignmentStep.assignment_id == MeasureAssignment.id)
+        .scalar_subquery()
+    )
+    completed = (
+        select(func.count(AssignmentStep.id))
+        .where(AssignmentStep.assignment_id == MeasureAssignment.id,
+               AssignmentStep.is_completed.is_(True))
+        .scalar_subquery()
+    )
+    filters = [or_(MeasureAssignment.steps_total != total,
+                   MeasureAssignment.steps_completed != completed)]
+    if assignment_ids is not None:
+        if not assignment_ids:
+            return 0
+        filters.append(MeasureAssignment.id.in_(assignment_ids))
+    return db.session.execute(
+        update(MeasureAssignment)
+        .where(*filters)
+        .values(steps_total=total, steps_completed=completed)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def bulk_assign(company, specs: list, now: datetime = None) -> dict:
+    """
+    Create (where missing) and assign many measures to a company at once
+
+    Args:
+        company: Company receiving the assignments
+        specs: Dicts with ``name`` and optional ``measure_detail``, ``target``,
+            ``departments``, ``responsible``, ``participants``, ``urgency``,
+            ``start_date``, ``end_date`` (ISO strings or dates) and ``steps``
+            (list of step titles, used only when the measure is created)
+        now: Timestamp to use for defaults (mainly for tests)
+
+    Returns:
+        ``{'assignment_ids': [...], 'created_measures': n}`` with ids in spec
+        order. Nothing is committed; the caller owns the transaction.
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+    specs = [s for s in specs if (s.get('name') or '').strip()]
+    if not specs:
+        return {'assignment_ids': [], 'created_measures': 0}
+
+    names = {s['name'].strip() for s in specs}
+    measures = {
+        name: (measure_id, target)
+        for name, measure_id, target in db.session.execute(
+            select(Measure.name, Measure.id, Measure.target).where(Measure.name.in_(names))
+        )
+    }
+
+    # Create missing measures (first spec with a given name defines it)
+    new_specs = {}
+    for spec in specs:
+        name = spec['name'].strip()
+        if name not in measures and name not in new_specs:
+            new_specs[name] = spec
+    created_measures = len(new_specs)
+    if new_specs:
+        rows = db.session.execute(
+            insert(Measure).returning(Measure.id, Measure.name, Measure.target),
+            [
+                {
+                    'name': name,
+                    'measure_detail': _clean(spec.get('measure_detail')),
+                    'target': _clean(spec.get('target')),
+                    'created_at': now,
+                    'updated_at': now,
+                }
+                for name, spec in new_specs.items()
+            ],
+        )
+        for measure_id, name, target in rows:
+            measures[name] = (measure_id, target)
+
+        step_rows = [
+            {'measure_id': measures[name][0], 'title': title, 'step': idx,
+             'created_at': now, 'updated_at': now}
+            for name, spec in new_specs.items()
+            for idx, title in enumerate(spec.get('steps') or [])
+        ]
+        if step_rows:
+            db.session.execute(insert(MeasureStep), step_rows)
+
+    assignment_rows = []
+    for spec in specs:
+        name = spec['name'].strip()
+        measure_id, target = measures[name]
+        is_new = new_specs.pop(name, None) is spec
+
+        try:
+            urgency = int(spec.get('urgency')) if spec.get('urgency') else 1
+        except (ValueError, TypeError):
+            urgency = 1
+
+        start_date = spec.get('start_date')
+        end_date = spec.get('end_date')
+        if isinstance(start_date, str):
+            start_date = _parse_date(start_date)
+        if isinstance(end_date, str):
+            end_date = _parse_date(end_date)
+
+        # New measures take their dates and company-specific details from the
+        # spec; existing measures get default dates and are completed later.
+        if not is_new:
+            start_date = end_date = None
+        start_date = start_date or today
+        end_date = end_date or (now + timedelta(days=30)).date()
+
+        assignment_rows.append({
+            'company_id': company.id,
+            'measure_id': measure_id,
+            'status': 'Not Started',
+            'urgency': urgency,
+            'target': target,
+            'departments': _clean(spec.get('departments')) if is_new else None,
+            'responsible': _clean(spec.get('responsible')) if is_new else None,
+            'participants': _clean(spec.get('participants')) if is_new else None,
+            'start_date': start_date,
+            'end_date': end_date,
+            'due_at': datetime.combine(end_date, datetime.max.time()),
+            'created_at': now,
+            'updated_at': now,
+        })
+
+    assignment_ids = insert_assignments(assignment_rows, now)
+    return {'assignment_ids': assignment_ids, 'created_measures': created_measures}
+
+
+def insert_assignments(rows: list, now: datetime = None) -> list:
+    """Bulk-insert assignment rows and copy their template steps; returns ids in row order"""
+    if not rows:
+        return []
+    assignment_ids = list(db.session.scalars(
+        insert(MeasureAssignment).returning(MeasureAssignment.id, sort_by_parameter_order=True),
+        rows,
+    ))
+    copy_template_steps(assignment_ids, now)
+    return assignment_ids
+
+
+DETAIL_FIELDS = ('responsible', 'departments', 'participants')
+
+
+def parse_detail_rows(form) -> list:
+    """Collect the per-assignment fields posted by complete_assignment_details.html"""
+    rows = []
+    for assignment_id in form.getlist('assignment_ids[]'):
+        row = {'id': assignment_id}
+        for field in DETAIL_FIELDS + ('start_date', 'end_date'):
+            row[field] = form.get(f"{field}_{assignment_id}", "")
+        rows.append(row)
+    return rows
+
+
+def bulk_update_details(company_id: int, rows: list) -> tuple:
+    """
+    Validate and apply company-specific details for many assignments at once
+
+    All target assignments are loaded with one IN query scoped to the company,
+    every row is validated in a single pass, and valid rows are written with
+    ``bulk_update_mappings``.
+
+    Returns:
+        (updated_count, errors) where errors is a list of
+        ``{'id': ..., 'measure': ..., 'error': ...}``. Nothing is committed.
+    """
+    errors = []
+    wanted = {}
+    for row in rows:
+        try:
+            wanted[int(row['id'])] = row
+        except (TypeError, ValueError):
+            errors.append({'id': row.get('id'), 'measure': None, 'error': 'Invalid assignment id'})
+
+    names = dict(db.session.execute(
+        select(MeasureAssignment.id, Measure.name)
+        .join(Measure, Measure.id == MeasureAssignment.measure_id)
+        .where(MeasureAssignment.id.in_(list(wanted)), MeasureAssignment.company_id == company_id)
+    ).all()) if wanted else {}
+
+    dates = {}  # the same date is usually posted for many rows
+
+    def parse(value):
+        if value not in dates:
+            dates[value] = datetime.fromisoformat(value).date()
+        return dates[value]
+
+    now = datetime.utcnow()
+    mappings = []
+    for assignment_id, row in wanted.items():
+        if assignment_id not in names:
+            errors.append({'id': assignment_id, 'measure': None,
+                           'error': 'Assignment not found for this company'})
+            continue
+
+        mapping = {'id': assignment_id, 'updated_at': now}
+        for field in DETAIL_FIELDS:
+            mapping[field] = _clean(row.get(field))
+
+        try:
+            start_str = (row.get('start_date') or '').strip()
+            end_str = (row.get('end_date') or '').strip()
+            if start_str:
+                mapping['start_date'] = parse(start_str)
+            if end_str:
+                mapping['end_date'] = parse(end_str)
+                mapping['due_at'] = datetime.combine(mapping['end_date'], datetime.max.time())
+        except ValueError:
+            errors.append({'id': assignment_id, 'measure': names[assignment_id],
+                           'error': 'Invalid date'})
+            continue
+
+        if mapping.get('start_date') and mapping.get('end_date') and mapping['end_date'] < mapping['start_date']:
+            errors.append({'id': assignment_id, 'measure': names[assignment_id],
+                           'error': 'End date is before start date'})
+            continue
+
+        mappings.append(mapping)
+
+    if mappings:
+        db.session.bulk_update_mappings(MeasureAssignment, mappings)
+    return len(mappings), errors
+
+
+COMPANY_FIELDS = ('region', 'industry_category', 'tech_resources', 'human_resources', 'membership', 'phone')
+
+
+def onboard_companies(rows: list, now: datetime = None) -> dict:
+    """
+    Create companies, their login users and initial measure assignments in bulk
+
+    Args:
+        rows: Dicts with ``name``, ``login_email``, ``login_password``, the
+            optional COMPANY_FIELDS and ``measures`` (measure ids or names)
+        now: Timestamp to use for defaults (mainly for tests)
+
+    Returns:
+        ``{'created': [...], 'errors': [...]}``. Each created entry has
+        ``row``, ``name``, ``company_id``, ``user_id``, ``assignment_ids`` and
+        ``skipped_measures``; each error has ``row``, ``name`` and ``error``.
+        Measures are resolved with one query and assignments plus their step
+        copies are inserted in the same transaction. Nothing is committed.
+    """
+    now = now or datetime.utcnow()
+    errors = []
+    valid = []
+    seen_names, seen_emails = set(), set()
+    for idx, row in enumerate(rows):
+        name = (row.get('name') or '').strip()
+        email = (row.get('login_email') or '').strip().lower()
+        if not name:
+            errors.append({'row': idx, 'name': name, 'error': 'Company name is required.'})
+        elif not email or not (row.get('login_password') or '').strip():
+            errors.append({'row': idx, 'name': name, 'error': 'Login email and password are required.'})
+        elif name in seen_names:
+            errors.append({'row': idx, 'name': name, 'error': 'Duplicate company name in this batch.'})
+        elif email in seen_emails:
+            errors.append({'row': idx, 'name': name, 'error': 'Duplicate login email in this batch.'})
+        else:
+            seen_names.add(name)
+            seen_emails.add(email)
+            valid.append((idx, name, email, row))
+
+    existing_names = set(db.session.scalars(select(Company.name).where(Company.name.in_(seen_names)))) if valid else set()
+    # Stored emails may have any case; compare them lowercased like the batch
+    stored_email = func.lower(User.email)
+    existing_emails = set(db.session.scalars(select(stored_email).where(stored_email.in_(seen_emails)))) if valid else set()
+    accepted = []
+    for idx, name, email, row in valid:
+        if name in existing_names:
+            errors.append({'row': idx, 'name': name, 'error': 'A company with that name already exists.'})
+        elif email in existing_emails:
+            errors.append({'row': idx, 'name': name, 'error': 'That login email is already in use.'})
+        else:
+            accepted.append((idx, name, email, row))
+    if not accepted:
+        return {'created': [], 'errors': errors}
+
+    # Resolve every referenced measure (by id or name) in one query. Ids and
+    # names are keyed apart, so a measure named "12" never shadows measure 12.
+    refs = {str(ref).strip() for _, _, _, row in accepted for ref in (row.get('measures') or []) if str(ref).strip()}
+    ref_ids = {int(ref) for ref in refs if ref.isdigit()}
+    measures_by_ref = {}
+    if refs:
+        for measure_id, measure_name, target in db.session.execute(
+            select(Measure.id, Measure.name, Measure.target)
+            .where(or_(Measure.id.in_(ref_ids), Measure.name.in_(refs)))
+        ):
+            if measure_id in ref_ids:
+                measures_by_ref[('id', measure_id)] = (measure_id, target)
+            if measure_name in refs:
+                measures_by_ref[('name', measure_name)] = (measure_id, target)
+
+    def resolve_measure(ref: str):
+        # A number is a measure id when one exists, otherwise a measure name
+        found = measures_by_ref.get(('id', int(ref))) if ref.isdigit() else None
+        return found or measures_by_ref.get(('name', ref))
+
+    company_ids = list(db.session.scalars(
+        insert(Company).returning(Company.id, sort_by_parameter_order=True),
+        [
+            dict({f: (row.get(f) or '').strip() or None for f in COMPANY_FIELDS},
+                 name=name, created_at=now, updated_at=now)
+            for _, name, _, row in accepted
+        ],
+    ))
+    user_ids = list(db.session.scalars(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [
+            {'email': email, 'password': generate_password_hash(row['login_password'].strip()),
+             'role': 'company', 'is_active': True, 'company_id': company_id,
+             'created_at': now, 'updated_at': now}
+            for (_, _, email, row), company_id in zip(accepted, company_ids)
+        ],
+    ))
+
+    created = []
+    assignment_rows = []
+    for (idx, name, _, row), company_id, user_id in zip(accepted, company_ids, user_ids):
+        entry = {'row': idx, 'name': name, 'company_id': company_id, 'user_id': user_id,
+                 'assignment_ids': [], 'skipped_measures': []}
+        assigned = set()
+        for ref in row.get('measures') or []:
+            ref = str(ref).strip()
+            if not ref:
+                continue
+            measure = resolve_measure(ref)
+            if measure is None:
+                entry['skipped_measures'].append(ref)
+                continue
+            measure_id, target = measure
+            if measure_id in assigned:
+                continue
+            assigned.add(measure_id)
+            assignment_rows.append({
+                'company_id': company_id,
+                'measure_id': measure_id,
+                'status': 'Not Started',  # progress only when steps begin
+                'urgency': 1,
+                'target': target,
+                'created_at': now,
+                'updated_at': now,
+            })
+        created.append(entry)
+
+    assignment_ids = iter(insert_assignments(assignment_rows, now))
+    by_company = {entry['company_id']: entry for entry in created}
+    for row in assignment_rows:
+        by_company[row['company_id']]['assignment_ids'].append(next(assignment_ids))
+
+    return {'created': created, 'errors': errors}
+
+
+def read_onboarding_file(path: str) -> list:
+    """
+    Read onboarding rows from a .csv or .xlsx file
+
+    The header row names the columns (name, login_email, login_password,
+    region, industry_category, tech_resources, human_resources, membership,
+    phone, measures); ``measures`` holds ids or names separated by ';'.
+    """
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(path, read_only=True, data_only=True).active
+        values = sheet.iter_rows(values_only=True)
+        header = [str(h or '').strip().lower() for h in next(values, [])]
+        records = [dict(zip(header, ('' if v is None else str(v) for v in r))) for r in values]
+    else:
+        import csv
+
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            records = [{(k or '').strip().lower(): v or '' for k, v in r.items()} for r in csv.DictReader(fh)]
+
+    rows = []
+    for record in records:
+        if not any((v or '').strip() for v in record.values()):
+            continue
+        record['measures'] = [m.strip() for m in (record.get('measures') or '').split(';') if m.strip()]
+        rows.append(record)
+    return rows
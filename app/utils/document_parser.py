@@ -2,17 +2,34 @@
 Document parser for extracting measure data from PDF and PowerPoint files
 Supports both pattern matching and AI-powered extraction
 """
+import multiprocessing
 import os
 import re
-import base64
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
-from typing import Dict, List, Optional
-from PyPDF2 import PdfReader
-from pptx import Presentation
-from io import BytesIO
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
+# PyPDF2 and python-pptx are imported inside the functions that read those
+# formats, so the text extractors (and the AI client's chunker) stay cheap to import.
 
-def parse_measure_document(file_path: str, file_type: str, use_ai: bool = True) -> Dict:
+
+# Upper bound on decoded image bytes kept in memory for a single document.
+# Images are only needed by the AI path, so anything beyond this is dropped.
+MAX_IMAGE_BYTES = int(os.getenv('PARSER_MAX_IMAGE_BYTES', 20 * 1024 * 1024))
+
+# OCR settings for scanned PDF pages (pages with no extractable text).
+# OCR_MAX_WORKERS is the size of each process's OCR pool (see _ocr_pool).
+OCR_DPI = int(os.getenv('PARSER_OCR_DPI', 300))
+OCR_MAX_WORKERS = int(os.getenv('PARSER_OCR_MAX_WORKERS', 0)) or (os.cpu_count() or 1)
+
+MEASURE_HEADER_RE = re.compile(r'Measure\s+(\d+)[:\s]+', re.IGNORECASE)
+
+
+def parse_measure_document(file_path: str, file_type: str, use_ai: bool = True,
+                           max_measures: Optional[int] = None) -> Dict:
     """
     Parse a PDF, PowerPoint, Word, or image file and extract measure information
     
@@ -20,17 +37,21 @@ def parse_measure_document(file_path: str, file_type: str, use_ai: bool = True)
         file_path: Path to the uploaded file
         file_type: 'pdf', 'pptx', 'docx', 'doc', 'png', 'jpg', 'jpeg', 'webp'
         use_ai: Whether to use AI-powered extraction (requires OPENAI_API_KEY)
+        max_measures: Return at most this many measures; pattern matching
+            also stops reading the document once it has found them
     
     Returns:
         Dictionary with extracted measure data (can contain multiple measures)
     """
+    ai_enabled = bool(use_ai and os.getenv('OPENAI_API_KEY'))
+
     # Handle image files
     if file_type in ['png', 'jpg', 'jpeg', 'webp']:
-        if use_ai and os.getenv('OPENAI_API_KEY'):
+        if ai_enabled:
             try:
                 measures = parse_image_with_vision(file_path)
                 if measures:
-                    return {'measures': measures, 'method': 'ai_vision'}
+                    return {'measures': measures[:max_measures], 'method': 'ai_vision'}
             except Exception as e:
                 print(f"AI Vision extraction failed, trying Tesseract OCR: {e}")
                 # Fall back to Tesseract OCR
@@ -40,7 +61,7 @@ def parse_measure_document(file_path: str, file_type: str, use_ai: bool = True)
         try:
             text = extract_text_from_image_ocr(file_path)
             if text:
-                measures = extract_multiple_measures(text)
+                measures = extract_multiple_measures(text, max_measures=max_measures)
                 return {'measures': measures, 'method': 'tesseract_ocr'}
             else:
                 return {'measures': [], 'method': 'error', 'error': 'No text extracted from image'}
@@ -54,114 +75,236 @@ def parse_measure_document(file_path: str, file_type: str, use_ai: bool = True)
                 }
             return {'measures': [], 'method': 'error', 'error': f'OCR failed: {str(e)}'}
     
-    # Handle PDF/PowerPoint/Word
+    # PDFs without AI never need the full text or any image data, so stream
+    # pages straight into the pattern matcher and stop as soon as possible.
+    if file_type == 'pdf' and not ai_enabled:
+        measures = extract_multiple_measures(iter_pdf_pages(file_path), max_measures=max_measures)
+        return {'measures': measures, 'method': 'pattern_matching'}
+    
+    # Handle PDF/PowerPoint/Word. The AI extraction is text-only, so no
+    # embedded images are decoded on either path.
     if file_type == 'pdf':
-        text, images = parse_pdf(file_path)
+        text, _ = parse_pdf(file_path, include_images=False)
     elif file_type in ['pptx', 'ppt']:
-        text, images = parse_powerpoint(file_path)
+        text, _ = parse_powerpoint(file_path, include_images=False)
     elif file_type in ['docx', 'doc']:
-        text, images = parse_word(file_path)
+        text, _ = parse_word(file_path, include_images=False)
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
     
     # Try AI extraction first if enabled and API key is available
-    if use_ai and os.getenv('OPENAI_API_KEY'):
+    if ai_enabled:
         try:
-            measures = extract_with_ai(text, images)
+            measures = extract_with_ai(text)
             if measures:
-                return {'measures': measures, 'method': 'ai'}
+                return {'measures': measures[:max_measures], 'method': 'ai'}
         except Exception as e:
             print(f"AI extraction failed, falling back to pattern matching: {e}")
     
     # Fallback to pattern matching
-    measures = extract_multiple_measures(text)
+    measures = extract_multiple_measures(text, max_measures=max_measures)
     return {'measures': measures, 'method': 'pattern_matching'}
 
 
-def parse_pdf(file_path: str) -> tuple:
-    """Extract text and images from PDF"""
+def iter_pdf_pages(file_path: str, ocr: bool = True) -> Iterator[str]:
+    """
+    Yield the text of each PDF page lazily, one page at a time
+    
+    Pages with no extractable text (scanned pages) are rasterized and OCR'd
+    on the shared OCR pool when ``ocr`` is set and Tesseract is available.
+    Each scanned page is submitted as soon as it is seen, so OCR overlaps
+    with reading the rest of the document. Results are yielded in page order.
+    """
+    from PyPDF2 import PdfReader
+
     reader = PdfReader(file_path)
-    text = ""
-    images = []
+    ocr = ocr and _ocr_available()
+    pending = deque()  # page texts, or futures for pages being OCR'd
+    
+    def ready():
+        while pending and (isinstance(pending[0], str) or pending[0].done()):
+            yield _page_result(pending.popleft(), file_path)
+    
+    try:
+        for number, page in enumerate(reader.pages, start=1):
+            text = page.extract_text() or ""
+            if ocr and not text.strip():
+                pending.append(_ocr_pool().submit(_ocr_pdf_page, file_path, number, OCR_DPI))
+            else:
+                pending.append(text)
+            yield from ready()
+            # Bound the read-ahead so an early stop leaves little work behind
+            if len(pending) >= OCR_MAX_WORKERS * 4:
+                yield _page_result(pending.popleft(), file_path)
+        while pending:
+            yield _page_result(pending.popleft(), file_path)
+    finally:
+        for item in pending:
+            if isinstance(item, Future):
+                item.cancel()
+
+
+def _page_result(item: Union[str, Future], file_path: str) -> str:
+    if isinstance(item, str):
+        return item
+    try:
+        return item.result()
+    except Exception as e:
+        print(f"OCR failed for a page of {file_path}: {e}")
+        return ""
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _ocr_pool() -> ProcessPoolExecutor:
+    """
+    The process's OCR pool, created on first use
+    
+    Pool processes are started with ``spawn``: forking a web worker would
+    copy its threads (gthread) or its monkey-patched runtime (gevent) into
+    the child. OCR_MAX_WORKERS caps the pool per web worker; gunicorn.conf.py
+    divides the CPUs between workers.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_MAX_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _ocr_pdf_page(file_path: str, page_number: int, dpi: int) -> str:
+    """Rasterize a single PDF page and run Tesseract on it (process pool worker)"""
+    import pytesseract
+    from pdf2image import convert_from_path
+    
+    images = convert_from_path(file_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    return "\n".join(pytesseract.image_to_string(image) for image in images).strip()
+
+
+@lru_cache(maxsize=1)
+def _ocr_available() -> bool:
+    """Whether pytesseract, pdf2image and the Tesseract binary are all usable"""
+    try:
+        import pytesseract
+        import pdf2image  # noqa: F401
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def iter_pdf_images(file_path: str, max_bytes: int = MAX_IMAGE_BYTES) -> Iterator[Dict]:
+    """
+    Yield decoded images from a PDF until max_bytes of image data have been produced
     
-    # Extract text from all pages
+    Image streams are only decoded when the generator is consumed, so callers
+    that never need images never pay for them.
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(file_path)
+    total = 0
     for page in reader.pages:
-        text += page.extract_text() + "\n"
-        
-        # Extract images from page
         try:
-            if '/XObject' in page['/Resources']:
-                xObject = page['/Resources']['/XObject'].get_object()
-                for obj in xObject:
-                    if xObject[obj]['/Subtype'] == '/Image':
-                        try:
-                            size = (xObject[obj]['/Width'], xObject[obj]['/Height'])
-                            data = xObject[obj].get_data()
-                            images.append({'data': data, 'size': size})
-                        except:
-                            pass
-        except:
-            pass
-    
+            resources = page['/Resources']
+            if '/XObject' not in resources:
+                continue
+            xObject = resources['/XObject'].get_object()
+        except Exception:
+            continue
+        
+        for obj in xObject:
+            try:
+                if xObject[obj]['/Subtype'] != '/Image':
+                    continue
+                size = (xObject[obj]['/Width'], xObject[obj]['/Height'])
+                data = xObject[obj].get_data()
+            except Exception:
+                continue
+            
+            total += len(data)
+            if total > max_bytes:
+                return
+            yield {'data': data, 'size': size}
+
+
+def parse_pdf(file_path: str, include_images: bool = True,
+              max_image_bytes: int = MAX_IMAGE_BYTES) -> tuple:
+    """Extract text and (optionally) images from PDF"""
+    text = "\n".join(iter_pdf_pages(file_path))
+    images = list(iter_pdf_images(file_path, max_image_bytes)) if include_images else []
     return text, images
 
 
-def parse_powerpoint(file_path: str) -> tuple:
-    """Extract text and images from PowerPoint"""
+def parse_powerpoint(file_path: str, include_images: bool = True,
+                     max_image_bytes: int = MAX_IMAGE_BYTES) -> tuple:
+    """Extract text and (optionally) images from PowerPoint"""
+    from pptx import Presentation
+
     prs = Presentation(file_path)
-    text = ""
+    parts = []
     images = []
+    image_bytes_total = 0
     
     # Extract text and images from all slides
     for slide in prs.slides:
         for shape in slide.shapes:
             if hasattr(shape, "text"):
-                text += shape.text + "\n"
+                parts.append(shape.text + "\n")
             
             # Extract images
-            if hasattr(shape, "image"):
+            if include_images and hasattr(shape, "image"):
                 try:
-                    image = shape.image
-                    image_bytes = image.blob
-                    images.append({'data': image_bytes, 'size': None})
+                    image_bytes = shape.image.blob
+                    if image_bytes_total + len(image_bytes) <= max_image_bytes:
+                        image_bytes_total += len(image_bytes)
+                        images.append({'data': image_bytes, 'size': None})
                 except:
                     pass
     
-    return text, images
+    return "".join(parts), images
 
 
-def parse_word(file_path: str) -> tuple:
-    """Extract text and images from Word document"""
+def parse_word(file_path: str, include_images: bool = True,
+               max_image_bytes: int = MAX_IMAGE_BYTES) -> tuple:
+    """Extract text and (optionally) images from Word document"""
     from docx import Document
     
     doc = Document(file_path)
-    text = ""
+    parts = []
     images = []
     
     # Extract text from paragraphs
     for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
+        parts.append(paragraph.text + "\n")
     
     # Extract text from tables
     for table in doc.tables:
         for row in table.rows:
             for cell in row.cells:
-                text += cell.text + "\t"
-            text += "\n"
+                parts.append(cell.text + "\t")
+            parts.append("\n")
     
     # Extract images (if any)
-    try:
-        for rel in doc.part.rels.values():
-            if "image" in rel.target_ref:
-                try:
-                    image_data = rel.target_part.blob
-                    images.append({'data': image_data, 'size': None})
-                except:
-                    pass
-    except:
-        pass
+    if include_images:
+        image_bytes_total = 0
+        try:
+            for rel in doc.part.rels.values():
+                if "image" in rel.target_ref:
+                    try:
+                        image_data = rel.target_part.blob
+                        if image_bytes_total + len(image_data) <= max_image_bytes:
+                            image_bytes_total += len(image_data)
+                            images.append({'data': image_data, 'size': None})
+                    except:
+                        pass
+        except:
+            pass
     
-    return text, images
+    return "".join(parts), images
 
 
 def extract_text_from_image_ocr(file_path: str) -> str:
@@ -202,190 +345,173 @@ def parse_image_with_vision(file_path: str) -> List[Dict]:
     Returns:
         List of measures extracted from the image
     """
-    from openai import OpenAI
-    
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
-    # Read and encode image
-    with open(file_path, 'rb') as image_file:
-        image_data = base64.b64encode(image_file.read()).decode('utf-8')
-    
-    # Determine image format from file extension
-    file_ext = file_path.split('.')[-1].lower()
-    mime_type = f"image/{file_ext if file_ext != 'jpg' else 'jpeg'}"
-    
-    prompt = """
-    Analyze this image of a business improvement measure document and extract ALL measures.
-    Return a JSON object with a "measures" array, where each measure has these fields:
-    
-    - name: Measure name/title
-    - measure_detail: Description of the measure
-    - target: Target or objective
-    - departments: Focus area or departments (e.g., "Process", "Technology")
-    - responsible: Person responsible
-    - participants: Comma-separated list of participants
-    - start_date: Start date in YYYY-MM-DD format (if mentioned)
-    - end_date: End date in YYYY-MM-DD format (if mentioned)
-    - steps: Array of step descriptions (extract "Step 1", "Step 2", etc.)
-    
-    Parse all text visible in the image, including tables. If a field is not found, use null.
-    Extract dates intelligently (e.g., "October 30, 2025" -> "2025-10-30").
-    """
+    from app.utils.ai_extraction import get_ai_client
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-vision-preview",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{image_data}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=2000,
-            temperature=0.1
-        )
-        
-        import json
-        result = json.loads(response.choices[0].message.content)
-        
-        # Handle different response formats
-        if 'measures' in result:
-            measures = result['measures']
-        elif isinstance(result, list):
-            measures = result
-        else:
-            measures = [result]
-        
-        # Convert date strings to date objects
-        for measure in measures:
-            if measure.get('start_date'):
-                try:
-                    measure['start_date'] = datetime.fromisoformat(measure['start_date']).date()
-                except:
-                    measure['start_date'] = parse_date(measure['start_date'])
-            
-            if measure.get('end_date'):
-                try:
-                    measure['end_date'] = datetime.fromisoformat(measure['end_date']).date()
-                except:
-                    measure['end_date'] = parse_date(measure['end_date'])
-        
-        return measures
-        
+        return _convert_measure_dates(get_ai_client().extract_image(file_path))
     except Exception as e:
         print(f"OpenAI Vision API error: {e}")
         raise
 
 
-def extract_with_ai(text: str, images: List[Dict]) -> List[Dict]:
+def extract_with_ai(text: str) -> List[Dict]:
     """
     Use OpenAI API to extract measure data from text
     Returns a list of measures (supports multiple measures in one document)
-    """
-    from openai import OpenAI
-    
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
-    prompt = """
-    Extract all improvement measures from the following document text. 
-    Return a JSON array of measure objects, where each measure has these fields:
-    
-    - name: Measure name/title
-    - measure_detail: Description of the measure
-    - target: Target or objective
-    - departments: Focus area or departments involved
-    - responsible: Person responsible
-    - participants: Comma-separated list of participants
-    - start_date: Start date in YYYY-MM-DD format (if mentioned)
-    - end_date: End date in YYYY-MM-DD format (if mentioned)
-    - steps: Array of step descriptions (Step 1, Step 2, etc.)
     
-    If a field is not found, use null. Parse dates intelligently.
-    
-    Document text:
+    Long documents are chunked and sent concurrently by the shared
+    AIExtractionClient, which also applies rate limiting and retries.
     """
+    from app.utils.ai_extraction import get_ai_client
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are an expert at extracting structured data from business improvement documents. Always return valid JSON."},
-                {"role": "user", "content": prompt + "\n\n" + text}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1
-        )
-        
-        import json
-        result = json.loads(response.choices[0].message.content)
-        
-        # Handle different possible response formats
-        if 'measures' in result:
-            measures = result['measures']
-        elif isinstance(result, list):
-            measures = result
-        else:
-            # Assume it's a single measure
-            measures = [result]
-        
-        # Convert date strings to date objects
-        for measure in measures:
-            if measure.get('start_date'):
-                try:
-                    measure['start_date'] = datetime.fromisoformat(measure['start_date']).date()
-                except:
-                    measure['start_date'] = parse_date(measure['start_date'])
-            
-            if measure.get('end_date'):
-                try:
-                    measure['end_date'] = datetime.fromisoformat(measure['end_date']).date()
-                except:
-                    measure['end_date'] = parse_date(measure['end_date'])
-        
-        return measures
-        
+        return _convert_measure_dates(get_ai_client().extract_text(text))
     except Exception as e:
         print(f"OpenAI API error: {e}")
         return []
 
 
-def extract_multiple_measures(text: str) -> List[Dict]:
+def parse_measure_documents(files: List[tuple], use_ai: bool = True,
+                            max_measures: Optional[int] = None) -> List[Dict]:
+    """
+    Parse several documents concurrently
+    
+    Args:
+        files: List of (file_path, file_type) tuples
+        use_ai: Whether to use AI-powered extraction
+        max_measures: Most measures to take from each document
+    
+    Returns:
+        One parse_measure_document() result per file, in the same order
+    """
+    if len(files) <= 1 or not (use_ai and os.getenv('OPENAI_API_KEY')):
+        return [parse_measure_document(path, file_type, use_ai=use_ai, max_measures=max_measures)
+                for path, file_type in files]
+    
+    # AI calls dominate; the shared client still bounds total concurrency
+    workers = min(len(files), int(os.getenv('AI_MAX_CONCURRENCY', 4)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_measure_document, path, file_type, use_ai, max_measures)
+                   for path, file_type in files]
+        return [future.result() for future in futures]
+
+
+def _convert_measure_dates(measures: List[Dict]) -> List[Dict]:
+    """Convert date strings returned by the AI into date objects"""
+    for measure in measures:
+        if measure.get('start_date'):
+            try:
+                measure['start_date'] = datetime.fromisoformat(measure['start_date']).date()
+            except:
+                measure['start_date'] = parse_date(measure['start_date'])
+        
+        if measure.get('end_date'):
+            try:
+                measure['end_date'] = datetime.fromisoformat(measure['end_date']).date()
+            except:
+                measure['end_date'] = parse_date(measure['end_date'])
+    
+    return measures
+
+
+def extract_multiple_measures(text: Union[str, Iterable[str]],
+                              max_measures: Optional[int] = None) -> List[Dict]:
     """
     Extract multiple measures from text using pattern matching
     Looks for "Measure 1", "Measure 2", etc. to split the document
+    
+    ``text`` may also be an iterable of page texts (see ``iter_pdf_pages``).
+    Pages are consumed lazily: a section is extracted as soon as the next
+    "Measure N" header is seen, and reading stops once ``max_measures``
+    measures have been found.
     """
-    measures = []
+    if isinstance(text, str):
+        pages, separator = [text], ""
+    else:
+        pages, separator = text, "\n"
     
-    # Try to split by measure numbers
-    measure_pattern = r'Measure\s+(\d+)[:\s]+'
-    splits = list(re.finditer(measure_pattern, text, re.IGNORECASE))
-    
-    if len(splits) > 1:
-        # Multiple measures found
-        for i, match in enumerate(splits):
-            start = match.start()
-            end = splits[i + 1].start() if i + 1 < len(splits) else len(text)
-            measure_text = text[start:end]
-            measure_data = extract_measure_data(measure_text)
+    measures = []
+    buffer = ""
+    headers = []  # offsets of "Measure N" headers within buffer
+    
+    for page in pages:
+        # Only rescan the tail of the buffer; a header may straddle pages.
+        scan_from = max(len(buffer) - 32, headers[-1] + 1 if headers else 0, 0)
+        buffer += page + separator
+        headers = [h for h in headers if h < scan_from]
+        headers += [m.start() for m in MEASURE_HEADER_RE.finditer(buffer, scan_from)]
+        if len(headers) < 2:
+            continue
+        
+        # Every section except the last is complete; the last may continue
+        # on the next page.
+        for start, end in zip(headers, headers[1:]):
+            measure_data = extract_measure_data(buffer[start:end])
             if measure_data.get('name'):
                 measures.append(measure_data)
-    else:
-        # Single measure or no clear separation
-        measure_data = extract_measure_data(text)
-        if measure_data.get('name'):
-            measures.append(measure_data)
+                if max_measures and len(measures) >= max_measures:
+                    return measures
+        buffer = buffer[headers[-1]:]
+        headers = [0]
+    
+    # Trailing section, or the whole text when there was no clear separation
+    measure_data = extract_measure_data(buffer)
+    if measure_data.get('name'):
+        measures.append(measure_data)
     
     return measures
 
 
+# Field headers recognised by extract_measure_data(). A header starts a
+# line and its colon is optional, as in "Step 1 Map process"; the "\b"
+# keeps lines such as "Timeline agreed" or "Targeted areas" from matching.
+# "Description:" and "Step N:" are also accepted mid-line, but only with a
+# colon, because PDF text extraction often runs "Focus area: X
+# Description: Y" or "Target: X Step 1: Y" together and prose must not be
+# split on a bare word.
+FIELD_HEADER_RE = re.compile(
+    r'(?:^[ \t]*|[ \t]+(?=(?:Description|Step\s+\d+)[ \t]*:))'
+    r'(?:(?P<measure>Measure\s+\d+)\b[ \t]*[:\-]?'
+    r'|(?:(?P<focus>Focus\s+area)'
+    r'|(?P<description>Description)'
+    r'|(?P<responsible>Responsible)'
+    r'|(?P<participants>Participants)'
+    r'|(?P<time>Time)'
+    r'|(?P<target>Target)'
+    r'|(?P<step>Step\s+\d+)'
+    r'|(?P<steps>Steps))\b[ \t]*:?)',
+    re.IGNORECASE | re.MULTILINE,
+)
+PARAGRAPH_BREAK_RE = re.compile(r'\n[ \t]*\n')
+# A description runs on until one of these headers starts a line, so steps
+# written indented or mid-line inside it stay part of it
+DESCRIPTION_END_FIELDS = ('responsible', 'participants', 'time', 'target', 'step')
+
+
+def split_measure_sections(text: str) -> List[tuple]:
+    """
+    Split measure text into sections in a single regex pass
+    
+    Returns ``(field, header_start, value_start, value_end)`` tuples, where
+    ``field`` is the name of the header group that matched (e.g. 'target',
+    'step') and the value is the raw text up to the next header.
+    """
+    sections = []
+    matches = list(FIELD_HEADER_RE.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append((match.lastgroup, match.start(), match.end(), end))
+    return sections
+
+
+def _starts_line(text: str, position: int) -> bool:
+    return (position == 0 or text[position - 1] == '\n') and text[position:position + 1] not in (' ', '\t')
+
+
+def _first_line(value: str) -> str:
+    return value.strip().split('\n', 1)[0].strip()
+
+
 def extract_measure_data(text: str) -> Dict:
     """
     Extract structured measure data from text using pattern matching
@@ -399,6 +525,11 @@ def extract_measure_data(text: str) -> Dict:
     - Time/Date: [date]
     - Target: [text]
     - Steps: Step 1, Step 2, etc.
+    
+    The text is tokenized once by FIELD_HEADER_RE; the first section of each
+    kind wins, and every "Step N" section becomes a step. As in the original
+    per-field extractor, a description ends only at a field header that
+    starts a line (DESCRIPTION_END_FIELDS).
     """
     data = {
         'name': '',
@@ -412,75 +543,49 @@ def extract_measure_data(text: str) -> Dict:
         'steps': []
     }
     
-    # Extract measure name (usually first line or after "Measure")
-    measure_match = re.search(r'Measure\s+\d+\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
-    if measure_match:
-        data['name'] = measure_match.group(1).strip()
-    else:
-        # Try to get first non-empty line
-        lines = [l.strip() for l in text.split('\n') if l.strip()]
-        if lines:
-            data['name'] = lines[0]
-    
-    # Extract focus area / departments
-    focus_match = re.search(r'Focus\s+area\s*:?\s*(.+?)(?:\n|Description)', text, re.IGNORECASE)
-    if focus_match:
-        data['departments'] = focus_match.group(1).strip()
-    
-    # Extract description
-    desc_match = re.search(r'Description\s*:?\s*(.+?)(?:\n(?:Responsible|Participants|Time|Target|Step)|$)', text, re.IGNORECASE | re.DOTALL)
-    if desc_match:
-        data['measure_detail'] = desc_match.group(1).strip()
-    
-    # Extract responsible person
-    resp_match = re.search(r'Responsible\s*:?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
-    if resp_match:
-        data['responsible'] = resp_match.group(1).strip()
-    
-    # Extract participants
-    part_match = re.search(r'Participants\s*:?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
-    if part_match:
-        data['participants'] = part_match.group(1).strip()
-    
-    # Extract target
-    target_match = re.search(r'Target\s*:?\s*(.+?)(?:\n|Step)', text, re.IGNORECASE | re.DOTALL)
-    if target_match:
-        data['target'] = target_match.group(1).strip()
-    
-    # Extract date/time
-    time_match = re.search(r'Time\s*:?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
-    if time_match:
-        date_str = time_match.group(1).strip()
-        # Try to parse date
-        parsed_date = parse_date(date_str)
-        if parsed_date:
-            data['end_date'] = parsed_date
-    
-    # Extract steps
-    steps = extract_steps(text)
-    data['steps'] = steps
+    fields = {}
+    sections = split_measure_sections(text)
+    for i, (field, _, value_start, value_end) in enumerate(sections):
+        value = text[value_start:value_end]
+        if field == 'step':
+            # A blank line ends a step, as does the next header
+            step_text = ' '.join(PARAGRAPH_BREAK_RE.split(value.strip(), 1)[0].split())
+            if step_text:
+                data['steps'].append(step_text)
+        elif field == 'description' and field not in fields:
+            value_end = next(
+                (start for later, start, _, _ in sections[i + 1:]
+                 if later in DESCRIPTION_END_FIELDS and _starts_line(text, start)),
+                len(text),
+            )
+            fields[field] = text[value_start:value_end]
+        elif field not in fields:
+            fields[field] = value
+    
+    # Measure name (usually after "Measure N", otherwise the first line)
+    if 'measure' in fields:
+        data['name'] = _first_line(fields['measure'])
+    if not data['name']:
+        data['name'] = _first_line(text)
+    
+    if 'focus' in fields:
+        data['departments'] = _first_line(fields['focus'])
+    if 'description' in fields:
+        data['measure_detail'] = fields['description'].strip()
+    if 'responsible' in fields:
+        data['responsible'] = _first_line(fields['responsible'])
+    if 'participants' in fields:
+        data['participants'] = _first_line(fields['participants'])
+    if 'target' in fields:
+        data['target'] = _first_line(fields['target'])
+    
+    # Date/time
+    if 'time' in fields:
+        data['end_date'] = parse_date(_first_line(fields['time']))
     
     return data
 
 
-def extract_steps(text: str) -> List[str]:
-    """Extract step titles from text"""
-    steps = []
-    
-    # Pattern: Step 1, Step 2, etc.
-    step_pattern = r'Step\s+\d+\s*:?\s*(.+?)(?=\nStep\s+\d+|\n\n|$)'
-    matches = re.finditer(step_pattern, text, re.IGNORECASE | re.DOTALL)
-    
-    for match in matches:
-        step_text = match.group(1).strip()
-        # Clean up step text (remove extra whitespace, newlines)
-        step_text = ' '.join(step_text.split())
-        if step_text:
-            steps.append(step_text)
-    
-    return steps
-
-
 def parse_date(date_str: str) -> Optional[datetime]:
     """
     Try to parse a date string in various formats
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from flask import current_app, render_template_string
 from flask_mail import Message as MailMessage
 from app.extensions import db, mail
+from app.reference_data import settings_snapshot
 from app.models import (
     User, Company, MeasureAssignment, AssistanceRequest, SystemSettings
 )
@@ -16,7 +17,7 @@ def get_admin_emails():
 
 def get_additional_report_emails():
     """Get additional email addresses for progress reports from settings"""
-    settings = SystemSettings.get_settings()
+    settings = settings_snapshot()
     if not settings.progress_report_additional_emails:
         return []
     
@@ -33,17 +34,20 @@ def generate_progress_report_html():
     companies = Company.query.order_by(Company.name).all()
     
     # Calculate overall statistics
-    total_assignments = MeasureAssignment.query.count()
-    completed = MeasureAssignment.query.filter_by(status='Completed').count()
-    in_progress = MeasureAssignment.query.filter_by(status='In Progress').count()
-    not_started = MeasureAssignment.query.filter_by(status='Not Started').count()
-    needs_assistance = MeasureAssignment.query.filter_by(status='Needs Assistance').count()
+    status_counts = MeasureAssignment.status_counts()
+    total_assignments = sum(status_counts.values())
+    completed = status_counts['Completed']
+    in_progress = status_counts['In Progress']
+    not_started = status_counts['Not Started']
+    needs_assistance = status_counts['Needs Assistance']
     
-    overdue = MeasureAssignment.query.filter(
-        MeasureAssignment.due_at.isnot(None),
-        MeasureAssignment.due_at < now,
-        MeasureAssignment.status != 'Completed'
-    ).count()
+    overdue = MeasureAssignment.query.filter(MeasureAssignment.overdue_filter(now.date())).count()
+    overdue_by_company = dict(
+        db.session.query(MeasureAssignment.company_id, db.func.count(MeasureAssignment.id))
+        .filter(MeasureAssignment.overdue_filter(now.date()))
+        .group_by(MeasureAssignment.company_id)
+        .all()
+    )
     
     # Get recent assistance requests (last 7 days)
     week_ago = now - timedelta(days=7)
@@ -52,20 +56,25 @@ def generate_progress_report_html():
         AssistanceRequest.decision == 'open'
     ).count()
     
-    # Company-level statistics
+    # Company-level statistics from one (company_id, status) grouped query
+    counts_by_company = {}
+    for company_id, status, count in (
+        db.session.query(MeasureAssignment.company_id, MeasureAssignment.status,
+                         db.func.count(MeasureAssignment.id))
+        .group_by(MeasureAssignment.company_id, MeasureAssignment.status)
+    ):
+        counts_by_company.setdefault(company_id, {})[status] = count
+
     company_stats = []
     for company in companies:
-        assignments = MeasureAssignment.query.filter_by(company_id=company.id).all()
-        if not assignments:
+        counts = counts_by_company.get(company.id)
+        if not counts:
             continue
         
-        company_completed = sum(1 for a in assignments if a.status == 'Completed')
-        company_total = len(assignments)
-        company_overdue = sum(
-            1 for a in assignments 
-            if a.due_at and a.due_at < now and a.status != 'Completed'
-        )
-        company_assistance = sum(1 for a in assignments if a.status == 'Needs Assistance')
+        company_completed = counts.get('Completed', 0)
+        company_total = sum(counts.values())
+        company_overdue = overdue_by_company.get(company.id, 0)
+        company_assistance = counts.get('Needs Assistance', 0)
         
         completion_rate = (company_completed / company_total * 100) if company_total > 0 else 0
         
@@ -73,8 +82,8 @@ def generate_progress_report_html():
             'name': company.name,
             'total': company_total,
             'completed': company_completed,
-            'in_progress': sum(1 for a in assignments if a.status == 'In Progress'),
-            'not_started': sum(1 for a in assignments if a.status == 'Not Started'),
+            'in_progress': counts.get('In Progress', 0),
+            'not_started': counts.get('Not Started', 0),
             'overdue': company_overdue,
             'needs_assistance': company_assistance,
             'completion_rate': completion_rate
@@ -471,7 +480,7 @@ def send_assistance_notification(assistance_request):
         current_app.logger.warning("Mail not configured, cannot send assistance notification")
         return False
     
-    settings = SystemSettings.get_settings()
+    settings = settings_snapshot()
     
     if not settings.assistance_email_enabled:
         current_app.logger.info("Assistance email notifications are disabled")
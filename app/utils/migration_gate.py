@@ -0,0 +1,137 @@
+"""
+One-shot migration gate for application startup
+
+Every gunicorn worker imports wsgi.py, so startup work must be cheap when the
+schema is already current. ensure_schema() compares the database's Alembic
+revision with the migration scripts' head in a single query; only when they
+differ does it take a cross-process lock (PostgreSQL advisory lock, or a file
+lock next to a SQLite database), re-check, and run the upgrade. Other workers
+block on the lock and then find the schema current.
+"""
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Set
+
+from sqlalchemy import text
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_lock ("PTSA")
+ADVISORY_LOCK_KEY = 0x50545341
+
+
+class StartupTimer:
+    """Log how long each startup phase takes, plus a total"""
+
+    def __init__(self, log: logging.Logger = logger):
+        self.log = log
+        self.started = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.phases.append((name, elapsed))
+            self.log.info(f"⏱️  {name}: {elapsed:.0f} ms")
+
+    def summary(self) -> None:
+        total = (time.perf_counter() - self.started) * 1000
+        breakdown = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases)
+        self.log.info(f"⏱️  Startup finished in {total:.0f} ms (pid {os.getpid()}): {breakdown}")
+
+
+def head_revisions(migrations_dir: str) -> Set[str]:
+    """Head revision(s) of the migration scripts (reads files, no DB access)"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option('script_location', migrations_dir)
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def current_revisions() -> Set[str]:
+    """Revision(s) recorded in alembic_version; empty if the table does not exist"""
+    try:
+        with db.engine.connect() as conn:
+            return {row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version"))}
+    except Exception:
+        return set()
+
+
+@contextmanager
+def migration_lock():
+    """Serialize migrations across processes sharing the database"""
+    engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': ADVISORY_LOCK_KEY})
+        return
+
+    if engine.dialect.name == 'sqlite':
+        try:
+            import fcntl
+        except ImportError:  # Windows dev servers run a single process
+            yield
+            return
+        database = engine.url.database
+        if database and database != ':memory:':
+            lock_path = f"{database}.migrate.lock"
+        else:
+            lock_path = os.path.join(tempfile.gettempdir(), 'ptsa-migrate.lock')
+        os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+        with open(lock_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+
+    yield
+
+
+def ensure_schema(migrations_dir: str, on_migrated: Optional[Callable[[], None]] = None) -> bool:
+    """
+    Upgrade the database to head unless it is already there
+
+    Args:
+        migrations_dir: Path to the Flask-Migrate migrations directory
+        on_migrated: Run while still holding the lock after an upgrade, for
+            one-off schema repairs and data backfills
+
+    Returns:
+        True if this process ran the upgrade, False if the schema was current.
+    """
+    heads = head_revisions(migrations_dir)
+    if current_revisions() == heads:
+        logger.info(f"✓ Database schema current ({', '.join(sorted(heads))}); skipping migrations")
+        return False
+
+    with migration_lock():
+        # Another process may have finished migrating while we waited
+        if current_revisions() == heads:
+            logger.info("✓ Database schema migrated by another process")
+            return False
+
+        from flask_migrate import upgrade as flask_upgrade
+
+        logger.info(f"Running migrations from: {migrations_dir}")
+        flask_upgrade(directory=migrations_dir)
+        logger.info("✓ Database migrations applied")
+        if on_migrated:
+            on_migrated()
+        return True
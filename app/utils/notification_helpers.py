@@ -10,9 +10,8 @@ def get_overdue_measures_for_company(company_id):
     
     overdue_assignments = MeasureAssignment.query.filter(
         MeasureAssignment.company_id == company_id,
-        MeasureAssignment.due_at < datetime.utcnow(),
-        MeasureAssignment.status.in_(['Not Started', 'In Progress', 'Needs Assistance'])
-    ).order_by(MeasureAssignment.due_at.asc()).all()
+        MeasureAssignment.overdue_filter(datetime.utcnow().date())
+    ).order_by(MeasureAssignment.effective_due_at.asc()).all()
     
     return overdue_assignments
 
@@ -28,7 +27,7 @@ def create_overdue_notifications(company_id):
         notification = {
             'id': f"overdue_{assignment.id}",
             'title': f"Overdue: {assignment.measure.name}",
-            'message': f"This measure was due on {assignment.due_at.strftime('%Y-%m-%d')}",
+            'message': f"This measure was due on {assignment.effective_due_at.strftime('%Y-%m-%d')}",
             'type': 'overdue',
             'assignment': assignment,
             'due_at': assignment.due_at,
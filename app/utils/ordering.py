@@ -0,0 +1,167 @@
+"""
+Drag-and-drop ordering helpers for PTSA Tracker
+
+Orders are stored as integers spaced ORDER_GAP apart, so moving one item
+between two neighbours only rewrites that item's key. A full reordering is
+applied with a single ``UPDATE ... SET order = CASE id WHEN ... END`` whose
+WHERE clause also enforces the scope (e.g. the owning company). New rows get
+a key after the last row of their scope (order_at_end()), so they appear at
+the end of a list that has already been reordered.
+"""
+from sqlalchemy import and_, case, column as sql_column, func, or_, select, table as sql_table, update
+
+from app.extensions import db
+
+ORDER_GAP = 1024
+
+
+def _scope_filters(model, scope: dict):
+    return [getattr(model, column) == value for column, value in (scope or {}).items()]
+
+
+def order_at_end(table_name: str, scope_column: str = None, column: str = 'order'):
+    """
+    Column default that puts a new row ORDER_GAP after the last row of its scope
+
+    ``scope_column`` is the column a list is ordered within (e.g. 'measure_id'
+    for steps); without it the whole table is one list. The first row of a
+    scope gets 0, like the first position posted by the drag-and-drop UIs.
+    Rows inserted by one statement (a flush or a bulk insert) follow each
+    other in row order, at one query per scope.
+    """
+    table = sql_table(table_name, *[sql_column(name) for name in filter(None, (column, scope_column))])
+
+    def default(context):
+        scope = context.get_current_parameters()[scope_column] if scope_column else None
+        assigned = context.__dict__.setdefault('_order_at_end', {})
+        key = assigned.get((table_name, scope))
+        if key is None:
+            stmt = select(func.coalesce(func.max(table.c[column]) + ORDER_GAP, 0))
+            if scope_column:
+                stmt = stmt.where(table.c[scope_column] == scope)
+            key = context.connection.scalar(stmt)
+        else:
+            key += ORDER_GAP
+        assigned[(table_name, scope)] = key
+        return key
+
+    return default
+
+
+def apply_order(model, orders: dict, scope: dict = None, column: str = 'order') -> int:
+    """
+    Apply a complete ordering in one UPDATE statement
+
+    Args:
+        model: Mapped class with an integer ordering column
+        orders: Mapping of id -> position as posted by the client; each
+            position is stored as ``position * ORDER_GAP`` so later single
+            moves fit between neighbours
+        scope: Column values every row must match, e.g. ``{'company_id': 3}``
+        column: Name of the ordering column
+
+    Returns:
+        Number of rows updated; rows outside the scope are never touched, so a
+        count lower than ``len(orders)`` means some ids were not in scope.
+    """
+    if not orders:
+        return 0
+    stmt = (
+        update(model)
+        .where(model.id.in_(list(orders)), *_scope_filters(model, scope))
+        .values({column: case({item_id: position * ORDER_GAP for item_id, position in orders.items()},
+                              value=model.id)})
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).rowcount
+
+
+def move_item(model, item_id: int, after_id: int = None, before_id: int = None,
+              scope: dict = None, column: str = 'order') -> int:
+    """
+    Move one item between two neighbours, touching only that row when possible
+
+    ``after_id`` is the item that should precede it and ``before_id`` the item
+    that should follow it (either may be None at the ends of the list). Both
+    must be in the item's scope and next to each other in the current order
+    (ties on the ordering column are broken by id); a move computed from a
+    stale list is refused rather than guessed at. When there is no integer
+    gap left between the neighbours the whole scope is renumbered with
+    apply_order().
+
+    Returns:
+        Number of rows updated (0 if an item is not in scope or the
+        neighbours are not adjacent).
+    """
+    order_col = func.coalesce(getattr(model, column), 0)
+    filters = _scope_filters(model, scope)
+    neighbour_ids = [i for i in (item_id, after_id, before_id) if i is not None]
+    if len(set(neighbour_ids)) != len(neighbour_ids) or len(neighbour_ids) < 2:
+        return 0
+    keys = dict(db.session.execute(
+        select(model.id, order_col).where(model.id.in_(neighbour_ids), *filters)
+    ).all())
+    if any(i not in keys for i in neighbour_ids):
+        return 0
+
+    prev_key = keys[after_id] if after_id is not None else None
+    next_key = keys[before_id] if before_id is not None else None
+    if prev_key is not None and next_key is not None and \
+            (prev_key, after_id) >= (next_key, before_id):
+        return 0
+
+    # Nothing else in the scope may sit between the two neighbours
+    between = [model.id != item_id, *filters]
+    if after_id is not None:
+        between.append(or_(order_col > prev_key, and_(order_col == prev_key, model.id > after_id)))
+    if before_id is not None:
+        between.append(or_(order_col < next_key, and_(order_col == next_key, model.id < before_id)))
+    if db.session.scalar(select(model.id).where(*between).limit(1)) is not None:
+        return 0
+
+    if prev_key is None:
+        new_key = next_key - ORDER_GAP
+    elif next_key is None:
+        new_key = prev_key + ORDER_GAP
+    elif prev_key + 1 < next_key:
+        new_key = (prev_key + next_key) // 2
+    else:
+        new_key = None
+
+    if new_key is not None:
+        return db.session.execute(
+            update(model)
+            .where(model.id == item_id, *filters)
+            .values({column: new_key})
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    # No room between the neighbours: renumber the whole scope once
+    ids = [i for i in db.session.scalars(
+        select(model.id).where(*filters).order_by(order_col, model.id)
+    ) if i != item_id]
+    ids.insert(ids.index(after_id) + 1, item_id)
+    return apply_order(model, {i: pos for pos, i in enumerate(ids)}, scope, column)
+
+
+def reorder_from_payload(model, payload, scope: dict = None, column: str = 'order') -> tuple:
+    """
+    Apply a reorder request posted by the drag-and-drop UIs
+
+    Accepts either a full list ``[{"id": 1, "order": 0}, ...]`` or a single
+    move ``{"move": {"id": 5, "after_id": 2, "before_id": 9}}``.
+
+    Returns:
+        (rows_updated, rows_expected)
+    """
+    if isinstance(payload, dict) and 'move' in payload:
+        move = payload['move']
+        updated = move_item(model, int(move['id']),
+                            after_id=int(move['after_id']) if move.get('after_id') is not None else None,
+                            before_id=int(move['before_id']) if move.get('before_id') is not None else None,
+                            scope=scope, column=column)
+        # A move that needed a renumbering updates the whole scope
+        return min(updated, 1), 1
+
+    orders = {int(item['id']): int(item['order']) for item in payload}
+    return apply_order(model, orders, scope, column), len(orders)
@@ -4,6 +4,8 @@ from flask import current_app
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Email, To, Content
 
+from app.metrics import track_email
+
 
 def send_email_via_sendgrid(subject, recipients, html_content, sender=None):
     """
@@ -55,7 +57,8 @@ def send_email_via_sendgrid(subject, recipients, html_content, sender=None):
         print("[SendGrid] Creating API client...", flush=True)
         sg = SendGridAPIClient(api_key)
         print("[SendGrid] Sending message via API...", flush=True)
-        response = sg.send(message)
+        with track_email('sendgrid'):
+            response = sg.send(message)
         
         # Log response
         print(f"[SendGrid] API response status: {response.status_code}", flush=True)
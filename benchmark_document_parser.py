@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Benchmark the measure field extractor used by the document parser.
+
+Builds a synthetic document with N measures and compares the original
+per-field regex extractor with the single-pass tokenizer in
+app.utils.document_parser, for both speed and output parity. A set of
+hand-written edge cases (headers run together on one line, indented steps,
+words that merely start like a header) is checked as well.
+
+Usage: python benchmark_document_parser.py [--measures 500] [--repeat 5]
+"""
+
+import argparse
+import re
+import sys
+import time
+
+from app.utils.document_parser import extract_measure_data, parse_date, MEASURE_HEADER_RE
+
+
+def legacy_extract_measure_data(text):
+    """The original extractor: one re.search per field over the full text"""
+    data = {
+        'name': '',
+        'measure_detail': '',
+        'target': '',
+        'departments': '',
+        'responsible': '',
+        'participants': '',
+        'start_date': None,
+        'end_date': None,
+        'steps': []
+    }
+
+    measure_match = re.search(r'Measure\s+\d+\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
+    if measure_match:
+        data['name'] = measure_match.group(1).strip()
+    else:
+        lines = [l.strip() for l in text.split('\n') if l.strip()]
+        if lines:
+            data['name'] = lines[0]
+
+    focus_match = re.search(r'Focus\s+area\s*:?\s*(.+?)(?:\n|Description)', text, re.IGNORECASE)
+    if focus_match:
+        data['departments'] = focus_match.group(1).strip()
+
+    desc_match = re.search(r'Description\s*:?\s*(.+?)(?:\n(?:Responsible|Participants|Time|Target|Step)|$)', text, re.IGNORECASE | re.DOTALL)
+    if desc_match:
+        data['measure_detail'] = desc_match.group(1).strip()
+
+    resp_match = re.search(r'Responsible\s*:?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
+    if resp_match:
+        data['responsible'] = resp_match.group(1).strip()
+
+    part_match = re.search(r'Participants\s*:?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
+    if part_match:
+        data['participants'] = part_match.group(1).strip()
+
+    target_match = re.search(r'Target\s*:?\s*(.+?)(?:\n|Step)', text, re.IGNORECASE | re.DOTALL)
+    if target_match:
+        data['target'] = target_match.group(1).strip()
+
+    time_match = re.search(r'Time\s*:?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
+    if time_match:
+        parsed_date = parse_date(time_match.group(1).strip())
+        if parsed_date:
+            data['end_date'] = parsed_date
+
+    step_pattern = r'Step\s+\d+\s*:?\s*(.+?)(?=\nStep\s+\d+|\n\n|$)'
+    for match in re.finditer(step_pattern, text, re.IGNORECASE | re.DOTALL):
+        step_text = ' '.join(match.group(1).strip().split())
+        if step_text:
+            data['steps'].append(step_text)
+
+    return data
+
+
+def build_document(measure_count):
+    """Build a synthetic multi-measure document resembling parsed PDF text"""
+    parts = ["PTSA Improvement Measures\nGenerated for benchmarking\n\n"]
+    for i in range(1, measure_count + 1):
+        # Every third measure leaves out the colons, as some templates do
+        c = "" if i % 3 == 0 else ":"
+        parts.append(
+            f"Measure {i}{c} Improve process {i}\n"
+            f"Focus area{c} {'Process' if i % 2 else 'Technology'}\n"
+            f"Description{c} Reduce lead duration for tool family {i}.\n"
+            f"Standardise set-up sheets across all machines.\n"
+            f"Responsible{c} Manager {i}\n"
+            f"Participants{c} Engineer {i}, Artisan {i}, Apprentice {i}\n"
+            f"Time{c} October {1 + i % 28}, 2025\n"
+            f"Target{c} {10 + i % 50}% reduction in set-up duration\n"
+            f"Step 1{c} Map the current process for line {i}\n"
+            f"Step 2{c} Identify bottlenecks\n"
+            f"Step 3{c} Implement and review\n\n"
+        )
+    return "".join(parts)
+
+
+# (label, text, expected fields, whether the legacy extractor agrees)
+EDGE_CASES = [
+    (
+        "step run into the target line",
+        "Measure 1: Cut stock\nTarget: reduce stock Step 1: go\n",
+        {'target': 'reduce stock', 'steps': ['go']},
+        True,
+    ),
+    (
+        "steps run into the target line",
+        "Measure 2: Cut stock\nTarget: reduce stock Step 1: count Step 2: sell\n",
+        {'target': 'reduce stock', 'steps': ['count', 'sell']},
+        False,  # the legacy step pattern swallows "Step 2: sell" into step 1
+    ),
+    (
+        "indented step inside the description",
+        "Measure 3: Kanban\nDescription: Introduce kanban cards\n  Step 1: label the bins\n"
+        "Responsible: Ann\n",
+        {'measure_detail': 'Introduce kanban cards\n  Step 1: label the bins', 'responsible': 'Ann'},
+        True,
+    ),
+    (
+        "step mid-line in the description",
+        "Measure 4: Kanban\nDescription: Introduce kanban cards Step 1: label the bins\n"
+        "Responsible: Ann\n",
+        {'measure_detail': 'Introduce kanban cards Step 1: label the bins', 'responsible': 'Ann'},
+        True,
+    ),
+    (
+        "description run into the focus area line",
+        "Measure 5: 5S\nFocus area: Process Description: Sort the tool room\nResponsible: Ann\n",
+        {'departments': 'Process', 'measure_detail': 'Sort the tool room'},
+        True,
+    ),
+    (
+        "steps without colons",
+        "Measure 6: Rollout\nStep 1 Map process\nStep 2 Train staff\n",
+        {'steps': ['Map process', 'Train staff']},
+        True,
+    ),
+    (
+        "fields without colons",
+        "Measure 7 Rollout\nFocus area Process\nDescription Cut waste\nResponsible Ann\n",
+        {'name': 'Rollout', 'departments': 'Process', 'measure_detail': 'Cut waste',
+         'responsible': 'Ann'},
+        True,
+    ),
+    (
+        "words that only begin like a header",
+        "Measure 8: Rollout\nDescription: Plan the rollout.\nTimeline agreed with the plant\n"
+        "Targeted areas are the stores\nResponsible: Ann\n",
+        {'measure_detail': 'Plan the rollout.\nTimeline agreed with the plant\nTargeted areas are the stores',
+         'target': ''},
+        False,  # the legacy extractor ends the description at "Timeline" and reads "ed areas..." as the target
+    ),
+]
+
+
+def check_edge_cases():
+    """Return the number of edge cases the extractor gets wrong"""
+    failures = 0
+    for label, text, expected, legacy_agrees in EDGE_CASES:
+        extractors = [('new', extract_measure_data)]
+        if legacy_agrees:
+            extractors.append(('legacy', legacy_extract_measure_data))
+        for name, extractor in extractors:
+            result = extractor(text)
+            wrong = {key: result[key] for key, value in expected.items() if result[key] != value}
+            if wrong:
+                if name == 'new':
+                    failures += 1
+                print(f"❌ {label} ({name} extractor): got {wrong!r}, expected "
+                      f"{ {key: expected[key] for key in wrong}!r}")
+    return failures
+
+
+def split_sections(text):
+    """Split a document into per-measure texts the same way the parser does"""
+    splits = list(MEASURE_HEADER_RE.finditer(text))
+    return [
+        text[match.start():(splits[i + 1].start() if i + 1 < len(splits) else len(text))]
+        for i, match in enumerate(splits)
+    ]
+
+
+def time_extractor(extractor, sections, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for section in sections:
+            extractor(section)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--measures', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    document = build_document(args.measures)
+    sections = split_sections(document)
+    print(f"📄 Synthetic document: {args.measures} measures, {len(document):,} characters")
+
+    mismatches = 0
+    for section in sections:
+        legacy = legacy_extract_measure_data(section)
+        current = extract_measure_data(section)
+        if legacy != current:
+            mismatches += 1
+            if mismatches <= 3:
+                print("❌ Mismatch:")
+                for key in legacy:
+                    if legacy[key] != current[key]:
+                        print(f"   {key}: legacy={legacy[key]!r} new={current[key]!r}")
+
+    edge_failures = check_edge_cases()
+
+    legacy_time = time_extractor(legacy_extract_measure_data, sections, args.repeat)
+    current_time = time_extractor(extract_measure_data, sections, args.repeat)
+
+    print(f"⏱️  Legacy extractor:      {legacy_time * 1000:8.1f} ms")
+    print(f"⏱️  Single-pass extractor: {current_time * 1000:8.1f} ms")
+    print(f"🚀 Speed-up: {legacy_time / current_time:.1f}x")
+    if mismatches:
+        print(f"❌ {mismatches} of {len(sections)} measures differ")
+    if edge_failures:
+        print(f"❌ {edge_failures} of {len(EDGE_CASES)} edge cases fail")
+    if mismatches or edge_failures:
+        return 1
+    print(f"✅ All {len(sections)} measures and {len(EDGE_CASES)} edge cases match")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request session overhead for the session configurations
+
+Logs a user in through the test client, then issues N authenticated GETs to
+a trivial view so that session handling is most of the work. For each
+configuration it reports:
+
+- how many responses carried a Set-Cookie header;
+- the mean Set-Cookie bytes per response;
+- the mean time spent in save_session (signing, serializing, storing);
+- the mean request time.
+
+Configurations:
+
+    legacy      the old behaviour: last_activity rewritten on every request
+                and SESSION_REFRESH_EACH_REQUEST on
+    cookie      signed cookie, activity refreshed every few minutes
+    database    server-side, server_sessions table
+    filesystem  server-side, one file per session
+
+Usage: python benchmark_sessions.py [--requests 500] [--modes legacy,cookie,database,filesystem]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+workdir = tempfile.mkdtemp(prefix='ptsa-sessions-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'ptsa.db')}"
+os.environ.pop('DATABASE_READ_URL', None)
+
+from flask_login import login_required  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+MODES = {
+    'legacy': {'SESSION_BACKEND': 'cookie', 'SESSION_ACTIVITY_REFRESH_MINUTES': 0,
+               'SESSION_REFRESH_EACH_REQUEST': True},
+    'cookie': {'SESSION_BACKEND': 'cookie'},
+    'database': {'SESSION_BACKEND': 'database'},
+    'filesystem': {'SESSION_BACKEND': 'filesystem',
+                   'SESSION_FILE_DIR': os.path.join(workdir, 'sessions')},
+}
+
+
+def build_app(overrides):
+    for key in ('SESSION_BACKEND', 'SESSION_FILE_DIR'):
+        if key in overrides:
+            os.environ[key] = str(overrides[key])
+        else:
+            os.environ.pop(key, None)
+    # Config classes read the environment at import time
+    for name in [m for m in sys.modules if m == 'app.config']:
+        del sys.modules[name]
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+
+    app = create_app()
+    app.config.update({k: v for k, v in overrides.items() if k not in ('SESSION_BACKEND', 'SESSION_FILE_DIR')})
+
+    @app.route('/_bench')
+    @login_required
+    def bench():
+        return 'ok'
+
+    with app.app_context():
+        db.create_all()
+        if not User.query.filter_by(email='bench@example.com').first():
+            db.session.add(User(email='bench@example.com', password=generate_password_hash('bench'),
+                                role='company'))
+            db.session.commit()
+    return app
+
+
+def run(mode, requests):
+    app = build_app(MODES[mode])
+    interface = app.session_interface
+    save_times = []
+    original_save = interface.save_session
+
+    def timed_save(app_, session, response):
+        started = time.perf_counter()
+        try:
+            return original_save(app_, session, response)
+        finally:
+            save_times.append(time.perf_counter() - started)
+
+    interface.save_session = timed_save
+
+    client = app.test_client()
+    login = client.post('/auth/login', data={'email': 'bench@example.com', 'password': 'bench'})
+    if login.status_code not in (200, 302):
+        raise SystemExit(f"{mode}: login failed with {login.status_code}")
+    save_times.clear()
+
+    with_cookie = 0
+    cookie_bytes = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/_bench')
+        if response.status_code != 200:
+            raise SystemExit(f"{mode}: /_bench returned {response.status_code}")
+        headers = response.headers.getlist('Set-Cookie')
+        if headers:
+            with_cookie += 1
+            cookie_bytes += sum(len('Set-Cookie: ') + len(h) + 2 for h in headers)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'with_cookie': with_cookie,
+        'cookie_bytes': cookie_bytes / requests,
+        'save_us': sum(save_times) / len(save_times) * 1e6 if save_times else 0.0,
+        'request_us': elapsed / requests * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--modes', default=','.join(MODES))
+    args = parser.parse_args()
+
+    modes = [m for m in args.modes.split(',') if m]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+
+    print(f"🔨 {args.requests} authenticated requests per mode")
+    results = [(mode, run(mode, args.requests)) for mode in modes]
+
+    print()
+    print(f"{'mode':<12} {'Set-Cookie':>11} {'bytes/resp':>11} {'save µs':>9} {'request µs':>11}")
+    for mode, r in results:
+        print(f"{mode:<12} {r['with_cookie']:>11} {r['cookie_bytes']:>11.1f} "
+              f"{r['save_us']:>9.1f} {r['request_us']:>11.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
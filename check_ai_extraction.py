@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Check the AI extraction client against a local stub of the OpenAI API
+
+Starts a small HTTP server that answers /v1/chat/completions the way OpenAI
+does. It returns one measure for every "Measure N: name" line in the prompt,
+plus an "Overview" measure that every chunk repeats. It can be told to fail
+the next requests with given status codes, and it records each request it
+sees. AIExtractionClient is pointed at it with base_url and the checks cover:
+
+- chunking: a long document is sent as several requests;
+- merging: the results come back in document order with repeats dropped;
+- coalescing: identical requests in flight at once cost one API call;
+- retries: 429 and 5xx answers are retried until the retry budget runs out;
+- throttling: the request rate limit and the concurrency cap are honoured,
+  and TokenBucket blocks for as long as its rate requires.
+
+Usage: python check_ai_extraction.py
+       python check_ai_extraction.py --serve 8765   # stub only, for manual
+                                                     # runs with OPENAI_BASE_URL
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils.ai_extraction import AIExtractionClient, TokenBucket
+
+MEASURE_LINE_RE = re.compile(r'^Measure\s+\d+\s*:\s*(.+)$', re.MULTILINE)
+
+
+class StubOpenAI(ThreadingHTTPServer):
+    """OpenAI chat completions stand-in with scripted failures"""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, delay: float = 0.0):
+        super().__init__(('127.0.0.1', port), StubHandler)
+        self.delay = delay
+        self.failures = []  # status codes for the next requests, in order
+        self.requests = []  # (monotonic time, prompt) of every request
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def reset(self, failures=(), delay: float = 0.0) -> None:
+        with self.lock:
+            self.failures = list(failures)
+            self.requests = []
+            self.max_active = 0
+            self.delay = delay
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        prompt = payload['messages'][-1]['content']
+        with server.lock:
+            server.requests.append((time.monotonic(), prompt))
+            status = server.failures.pop(0) if server.failures else 200
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            if status != 200:
+                self._reply(status, {'error': {'message': f'stub error {status}', 'type': 'stub'}})
+                return
+            measures = [{'name': 'Overview'}] + [
+                {'name': name.strip()} for name in MEASURE_LINE_RE.findall(prompt)
+            ]
+            self._reply(200, {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': payload.get('model'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': json.dumps({'measures': measures})},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+            })
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+def build_document(measure_count: int) -> str:
+    return "".join(
+        f"Measure {i}: Improve line {i}\n"
+        f"Description: {'Reduce set-up time across the line. ' * 10}\n"
+        f"Step 1: Map the process\n\n"
+        for i in range(1, measure_count + 1)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="only run the stub server on PORT until interrupted")
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        server = StubOpenAI(args.serve)
+        print(f"Stub OpenAI API on {server.base_url} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    server = StubOpenAI()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    failures = []
+
+    def check(label, ok):
+        print(f"{'✅' if ok else '❌'} {label}")
+        if not ok:
+            failures.append(label)
+
+    def client(**kwargs):
+        options = dict(api_key='stub', base_url=server.base_url, max_concurrency=4,
+                       requests_per_minute=6000, tokens_per_minute=10_000_000,
+                       chunk_tokens=300, max_retries=3, backoff_base=0.01)
+        options.update(kwargs)
+        return AIExtractionClient(**options)
+
+    document = build_document(8)
+    expected = ['Overview'] + [f'Improve line {i}' for i in range(1, 9)]
+
+    # Chunking and merging
+    server.reset()
+    names = [m['name'] for m in client().extract_text(document)]
+    check(f"long document sent in {len(server.requests)} chunks", len(server.requests) > 1)
+    check("every measure is sent exactly once",
+          sorted(MEASURE_LINE_RE.findall("".join(p for _, p in server.requests)))
+          == sorted(expected[1:]))
+    check("merged measures keep document order and drop repeats", names == expected)
+
+    # Coalescing: the same document twice at once costs one set of calls
+    calls_per_document = len(server.requests)
+    server.reset(delay=0.2)
+    first, second = client().extract_texts([document, document])
+    check(f"identical in-flight requests coalesced ({len(server.requests)} calls for 2 documents)",
+          len(server.requests) == calls_per_document and first == second == [{'name': n} for n in expected])
+
+    # Retries on 429 and 5xx
+    short = "Measure 1: Only one\n"
+    for status in (429, 500, 503):
+        server.reset(failures=[status, status])
+        result = client().extract_text(short)
+        check(f"{status} answers are retried", len(server.requests) == 3
+              and [m['name'] for m in result] == ['Overview', 'Only one'])
+
+    server.reset(failures=[500] * 5)
+    try:
+        client(max_retries=2).extract_text(short)
+        gave_up = False
+    except Exception as e:
+        gave_up = type(e).__name__ == 'InternalServerError'
+    check("errors surface once the retry budget is spent",
+          gave_up and len(server.requests) == 3)
+
+    # Throttling: 8 requests at 600/minute with a burst of 2 take >= 0.6 s
+    server.reset()
+    started = time.monotonic()
+    client(max_concurrency=2, requests_per_minute=600).extract_texts(
+        [f"Measure 1: Document {i}\n" for i in range(8)]
+    )
+    elapsed = time.monotonic() - started
+    check(f"request rate limit honoured ({elapsed:.2f}s for 8 requests)", elapsed >= 0.55)
+
+    server.reset(delay=0.1)
+    client(max_concurrency=2).extract_texts([f"Measure 1: Document {i}\n" for i in range(8)])
+    check(f"at most 2 requests in flight (saw {server.max_active})", server.max_active <= 2)
+
+    bucket = TokenBucket(rate=1000, capacity=500)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire(250)
+    elapsed = time.monotonic() - started
+    check(f"token bucket blocks until refilled ({elapsed:.2f}s for 1000 tokens)", 0.45 <= elapsed < 1.5)
+
+    server.shutdown()
+    if failures:
+        print(f"\n❌ {len(failures)} check(s) failed")
+        return 1
+    print("\n✅ All AI extraction checks passed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
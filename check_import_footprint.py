@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Check that importing wsgi does not load the heavy optional libraries
+
+Document parsing, spreadsheet export and SendGrid are only needed by a few
+admin actions, so they must be imported inside those code paths rather than
+at startup. Runs the import in a fresh interpreter so nothing is cached.
+
+Usage: python check_import_footprint.py
+"""
+import subprocess
+import sys
+
+HEAVY_MODULES = ("PyPDF2", "pptx", "openpyxl", "sendgrid", "docx", "pytesseract", "pdf2image", "openai")
+
+CHECK = """
+import sys
+import wsgi
+loaded = [name for name in {modules!r} if name in sys.modules]
+print("LOADED:" + ",".join(loaded))
+"""
+
+
+def check_wsgi_import_footprint():
+    """Importing wsgi must not import any of HEAVY_MODULES"""
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK.format(modules=HEAVY_MODULES)],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    marker = [line for line in result.stdout.splitlines() if line.startswith("LOADED:")]
+    assert marker, result.stdout
+    loaded = [name for name in marker[-1][len("LOADED:"):].split(",") if name]
+    assert not loaded, f"wsgi imported heavy modules at startup: {', '.join(loaded)}"
+
+
+if __name__ == "__main__":
+    try:
+        check_wsgi_import_footprint()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("✅ wsgi starts without importing " + ", ".join(HEAVY_MODULES))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Check that key pages stay within their SQL query budgets
+
+Seeds a throwaway SQLite database, requests each page through the test
+client with the query profiler on, and reads the X-Query-Count header.
+Every page is measured with a small and a larger data set: a page fails if
+it issues more queries than its budget, or if its query count grows with
+the number of assignments (an N+1 lazy load).
+
+Run it after changing a view or template that touches the database, and
+raise a budget here only together with the change that needs it.
+
+Usage: python check_query_budgets.py [-v]
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+workdir = tempfile.mkdtemp(prefix='ptsa-queries-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'ptsa.db')}"
+os.environ.pop('DATABASE_READ_URL', None)
+os.environ['QUERY_PROFILER_ENABLED'] = '1'
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import (  # noqa: E402
+    AssignmentStep, Company, Measure, MeasureAssignment, Notification, User,
+)
+
+# (role, path template, max queries). {company_id} is filled in at run time.
+BUDGETS = [
+    ('company', '/company/dashboard', 5),
+    ('company', '/company/notifications', 6),
+    ('company', '/company/measures', 6),
+    ('admin', '/admin/dashboard', 9),
+    ('admin', '/admin/companies/{company_id}', 6),
+]
+
+
+def seed(company, count):
+    """Add ``count`` assignments (3 steps each) and a notification per assignment"""
+    start = Measure.query.count()
+    for n in range(start, start + count):
+        measure = Measure(name=f"Measure {n}")
+        db.session.add(measure)
+        db.session.flush()
+        assignment = MeasureAssignment(
+            company_id=company.id,
+            measure_id=measure.id,
+            status='In Progress',
+            due_at=datetime.utcnow() + timedelta(days=n - 3),
+        )
+        db.session.add(assignment)
+        db.session.flush()
+        for i in range(3):
+            db.session.add(AssignmentStep(assignment_id=assignment.id, title=f"Step {i}", step=i,
+                                          is_completed=i == 0))
+        db.session.add(Notification(company_id=company.id, assignment_id=assignment.id,
+                                    kind='due_7d', subject=f"Due soon {n}", body="Reminder"))
+    db.session.commit()
+
+
+def measure_counts(app, users, company_id):
+    counts = {}
+    for role, path, _ in BUDGETS:
+        url = path.format(company_id=company_id)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(users[role])
+            session['_fresh'] = True
+            session['last_activity'] = datetime.utcnow().isoformat()
+        response = client.get(url)
+        if response.status_code != 200:
+            counts[path] = None
+            print(f"⚠️  {url} returned {response.status_code}")
+            continue
+        counts[path] = int(response.headers.get('X-Query-Count', 0))
+    return counts
+
+
+def main():
+    verbose = '-v' in sys.argv
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.app_context():
+        db.create_all()
+        company = Company(name='Budget Co')
+        db.session.add(company)
+        db.session.flush()
+        admin = User(email='admin@example.com', password=generate_password_hash('x'), role='admin')
+        member = User(email='member@example.com', password=generate_password_hash('x'),
+                      role='company', company_id=company.id)
+        db.session.add_all([admin, member])
+        db.session.commit()
+        users = {'admin': admin.id, 'company': member.id}
+        company_id = company.id
+
+        seed(company, 2)
+
+    # Requests must run outside the seeding app context: a shared context
+    # would share flask.g, and with it Flask-Login's cached user
+    small = measure_counts(app, users, company_id)
+    with app.app_context():
+        seed(db.session.get(Company, company_id), 8)
+    large = measure_counts(app, users, company_id)
+
+    failures = 0
+    print(f"\n{'page':<34} {'2 rows':>7} {'10 rows':>8} {'budget':>7}")
+    for role, path, budget in BUDGETS:
+        s, l = small[path], large[path]
+        problems = []
+        if s is None or l is None:
+            problems.append("request failed")
+        else:
+            if l > budget:
+                problems.append(f"over budget by {l - budget}")
+            if l > s:
+                problems.append(f"grows with data (+{l - s} queries for 8 more assignments)")
+        failures += bool(problems)
+        mark = '❌' if problems else '✅'
+        print(f"{mark} {path:<32} {str(s):>7} {str(l):>8} {budget:>7}  {'; '.join(problems)}")
+        if verbose and problems:
+            print("   run the page with X-Profile-Queries as an admin to see the repeated statements")
+
+    print(f"\n{'🎉 All pages within budget' if not failures else f'💥 {failures} page(s) failed'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
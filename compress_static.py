@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Write precompressed .gz (and .br, when brotli is installed) copies of the
+CSS, JS and SVG files in app/static
+
+Run once per build, after the code is in place (render-build.sh and the
+Dockerfile do this). The static view serves these files to browsers that
+accept the encoding, so static assets are never compressed per request.
+Does not start the app or touch the database.
+
+Usage: python compress_static.py [--quiet]
+"""
+import os
+import sys
+
+from app.compression import brotli, precompress_static
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+
+
+def main():
+    verbose = '--quiet' not in sys.argv[1:]
+    encodings = 'gzip + brotli' if brotli is not None else 'gzip only (pip install Brotli for .br)'
+    print(f"🗜️  Precompressing {STATIC_FOLDER} ({encodings})")
+    written = precompress_static(STATIC_FOLDER, verbose=verbose)
+    print(f"✅ Wrote {written} precompressed file(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,7 +16,8 @@ echo "   Python version: $(python --version)"
 echo "📁 Files in /app:"
 ls -la /app/
 
-# Test if wsgi module can be imported
+# Test if wsgi module can be imported (this also runs the migration gate once,
+# so the gunicorn workers below skip straight to serving)
 echo "🧪 Testing wsgi import..."
 python -c "import wsgi; print('✅ WSGI import successful')"
 
@@ -37,4 +38,4 @@ echo "✅ Database initialization complete"
 
 # Start Gunicorn with explicit module path
 echo "🌐 Starting web server..."
-exec gunicorn --bind 0.0.0.0:${PORT:-10000} --workers 2 --worker-class sync --timeout 120 --log-level debug wsgi:app
+exec gunicorn -c gunicorn.conf.py --log-level debug wsgi:app
@@ -0,0 +1,144 @@
+"""
+Gunicorn configuration for PTSA Tracker
+
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+Pick a profile with GUNICORN_PROFILE:
+
+    sync     Preforked sync workers with --preload: the app (and wsgi.py's
+             migration gate) is loaded once in the master and shared
+             copy-on-write. One request per worker at a time.
+    gthread  Preloaded workers with GUNICORN_THREADS threads each, so one
+             slow export or document parse no longer blocks a whole worker.
+    gevent   Cooperative greenlets for I/O-heavy traffic (requires gevent to
+             be installed). Not preloaded: gevent must patch before the app
+             is imported.
+
+Worker counts come from the CPU count, capped so that every worker's
+database pool (plus DB_MAX_OVERFLOW) fits in DB_MAX_CONNECTIONS. Set GUNICORN_WORKERS to override.
+
+Environment:
+    GUNICORN_PROFILE      sync | gthread | gevent (default gthread)
+    GUNICORN_WORKERS      Explicit worker count (WEB_CONCURRENCY also honoured)
+    GUNICORN_THREADS      Threads per gthread worker (default 4)
+    GUNICORN_CONNECTIONS  Greenlets per gevent worker (default 100)
+    GUNICORN_TIMEOUT      Worker timeout in seconds (default 120)
+    DB_MAX_CONNECTIONS    Connections this service may hold (default 20)
+    DB_MAX_OVERFLOW       Burst connections per worker (default 2)
+    PORT                  Bind port (default 10000)
+    PARSER_OCR_MAX_WORKERS  OCR processes per worker (default CPUs / workers)
+    PROMETHEUS_MULTIPROC_DIR  Where workers share /metrics snapshots
+                          (default <tmp>/ptsa-metrics; old snapshots are
+                          removed at start, and a directory holding any
+                          other files is refused)
+"""
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+
+PROFILE = os.environ.get("GUNICORN_PROFILE", "gthread").lower()
+# CPUs this process may actually run on (containers often see the host's count)
+CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else multiprocessing.cpu_count()
+DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", 20))
+THREADS = int(os.environ.get("GUNICORN_THREADS", 4))
+# Burst connections each worker may open beyond its pool (see app/database.py)
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 2))
+GEVENT_CONNECTIONS = int(os.environ.get("GUNICORN_CONNECTIONS", 100))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+accesslog = "-"
+
+if PROFILE == "sync":
+    worker_class = "sync"
+    preload_app = True
+    db_pool_size = 1  # one request at a time per worker
+    cpu_workers = 2 * CPUS + 1
+elif PROFILE == "gthread":
+    worker_class = "gthread"
+    threads = THREADS
+    preload_app = True
+    db_pool_size = THREADS
+    cpu_workers = CPUS + 1
+elif PROFILE == "gevent":
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        sys.exit("GUNICORN_PROFILE=gevent needs the 'gevent' package (pip install -r requirements.txt)")
+    worker_class = "gevent"
+    worker_connections = GEVENT_CONNECTIONS
+    preload_app = False
+    # Greenlets queue for a connection instead of each holding one
+    db_pool_size = max(2, min(10, DB_MAX_CONNECTIONS // max(1, CPUS)))
+    cpu_workers = CPUS
+else:
+    sys.exit(f"Unknown GUNICORN_PROFILE {PROFILE!r}; use sync, gthread or gevent")
+
+workers = int(os.environ.get("GUNICORN_WORKERS") or os.environ.get("WEB_CONCURRENCY") or 0) or max(
+    1, min(cpu_workers, DB_MAX_CONNECTIONS // (db_pool_size + DB_MAX_OVERFLOW))
+)
+
+# Sized per process by the app's engine options (see app/database.py)
+os.environ.setdefault("DB_POOL_SIZE", str(db_pool_size))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(DB_MAX_OVERFLOW))
+
+# Each worker's OCR pool gets its share of the CPUs (app/utils/document_parser.py)
+os.environ.setdefault("PARSER_OCR_MAX_WORKERS", str(max(1, CPUS // workers)))
+
+# Workers write metric snapshots here so /metrics can sum them (app/metrics.py)
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "ptsa-metrics"))
+
+
+# Snapshot files written by app/metrics.py: <pid>-<start>.json and the
+# <pid>-<start>.json.<thread>.tmp files they are written through
+METRICS_SNAPSHOT_RE = re.compile(r"\d+-\d+\.json(?:\.\d+\.tmp)?")
+
+
+def on_starting(server):
+    """Start each deploy's counters from zero"""
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    entries = os.listdir(directory)
+    # Only ever clean a directory that holds nothing but metric snapshots,
+    # so a mistyped PROMETHEUS_MULTIPROC_DIR cannot delete unrelated files
+    foreign = [name for name in entries if not METRICS_SNAPSHOT_RE.fullmatch(name)]
+    if foreign:
+        sys.exit(
+            f"PROMETHEUS_MULTIPROC_DIR={directory!r} is not a dedicated metrics directory "
+            f"(it holds {', '.join(sorted(foreign)[:5])}); point it at an empty directory"
+        )
+    for name in entries:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def when_ready(server):
+    server.log.info(
+        "Profile %s: %d %s worker(s)%s, DB pool %s+%s per worker, preload=%s",
+        PROFILE, workers, worker_class,
+        f" x {threads} threads" if worker_class == "gthread" else "",
+        os.environ["DB_POOL_SIZE"], os.environ["DB_MAX_OVERFLOW"], preload_app,
+    )
+
+
+def post_fork(server, worker):
+    """Drop connections and metric samples inherited from the master"""
+    wsgi = sys.modules.get("wsgi")
+    if wsgi is None:  # app not preloaded; nothing was inherited
+        return
+    from app import metrics
+    from app.extensions import db
+
+    metrics.reset()
+
+    with wsgi.app.app_context():
+        for engine in db.engines.values():
+            # close=False leaves the parent's sockets alone instead of
+            # closing them out from under the master
+            engine.dispose(close=False)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Startup import profiler (enabled with PTSA_IMPORT_PROFILE=1)
+
+Records how long each module takes to import, like ``python -X importtime``,
+but from inside the running process so it also works under gunicorn. wsgi.py
+installs it before importing the app and prints the report once startup
+finishes.
+
+This module lives at the project root so installing it does not import the
+``app`` package it is meant to measure.
+
+Usage: PTSA_IMPORT_PROFILE=1 python -c "import wsgi"
+"""
+import importlib.abc
+import sys
+import time
+
+_records = []   # (name, self_seconds, cumulative_seconds, depth) in completion order
+_stack = []     # accumulated child time for each import in progress
+_installed = None
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wrap a module loader and time its exec_module()"""
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        depth = len(_stack)
+        _stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = _stack.pop()
+            if _stack:
+                _stack[-1] += elapsed
+            _records.append((self._name, elapsed - children, elapsed, depth))
+
+    def __getattr__(self, item):
+        # get_source, get_resource_reader, is_package, ...
+        return getattr(self._loader, item)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Meta path hook that wraps the loader chosen by the real finders"""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, fullname)
+            return spec
+        return None
+
+
+def install():
+    """Start recording imports (idempotent)"""
+    global _installed
+    if _installed is None:
+        _installed = _TimingFinder()
+        sys.meta_path.insert(0, _installed)
+
+
+def uninstall():
+    global _installed
+    if _installed is not None:
+        sys.meta_path.remove(_installed)
+        _installed = None
+
+
+def report(top: int = 25, stream=None):
+    """Print the -X importtime style tree followed by the slowest imports"""
+    stream = stream or sys.stderr
+    print("import time: self [us] | cumulative | imported package", file=stream)
+    for name, self_s, cumulative_s, depth in _records:
+        print(f"import time: {self_s * 1e6:9.0f} | {cumulative_s * 1e6:10.0f} | {'  ' * depth}{name}",
+              file=stream)
+
+    total = sum(cumulative for _, _, cumulative, depth in _records if depth == 0)
+    print(f"\n📦 {len(_records)} modules imported in {total * 1000:.0f} ms; "
+          f"slowest {top} by cumulative time:", file=stream)
+    for name, _, cumulative_s, _ in sorted(_records, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"   {cumulative_s * 1000:8.1f} ms  {name}", file=stream)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Load-test the app under each gunicorn profile in gunicorn.conf.py
+
+For every profile, starts ``gunicorn -c gunicorn.conf.py wsgi:app`` on a
+local port, waits for it to answer, hammers the given paths with concurrent
+clients for a fixed duration, stops the server and prints a throughput and
+latency table. Pass --url to test an already running server instead.
+
+Usage:
+    python load_test.py [--profiles sync,gthread,gevent] [--paths /health,/auth/login]
+                        [--concurrency 16] [--duration 15]
+    python load_test.py --url https://staging.example.com --paths /health
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def run_load(base_url, paths, concurrency, duration):
+    """Issue GETs round-robin over paths from ``concurrency`` threads"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            url = base_url + paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                ok = True
+            except urllib.error.HTTPError as e:
+                ok = e.code < 500
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / wall if wall else 0.0,
+        'p50': pct(0.50),
+        'p95': pct(0.95),
+        'p99': pct(0.99),
+    }
+
+
+def wait_until_up(base_url, path, timeout=90, proc=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and (proc is None or proc.poll() is None):
+        try:
+            with urllib.request.urlopen(base_url + path, timeout=5):
+                return True
+        except urllib.error.HTTPError:
+            return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def start_server(profile, port):
+    env = dict(os.environ, GUNICORN_PROFILE=profile, PORT=str(port), GUNICORN_LOG_LEVEL='warning')
+    # A file rather than a pipe: nobody reads the pipe during the run, and a
+    # chatty server would block once its buffer fills
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen(
+        ['gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', os.devnull, 'wsgi:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=log,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    proc.log = log
+    return proc
+
+
+def server_log(proc, limit=2000):
+    proc.log.seek(0)
+    return proc.log.read().decode(errors='replace')[-limit:]
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    proc.log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', default='sync,gthread,gevent')
+    parser.add_argument('--paths', default='/health')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--port', type=int, default=18000)
+    parser.add_argument('--url', help='Test a running server instead of starting gunicorn')
+    args = parser.parse_args()
+
+    paths = [p if p.startswith('/') else '/' + p for p in args.paths.split(',') if p]
+    targets = [(args.url.rstrip('/'), args.url)] if args.url else \
+        [(f"http://127.0.0.1:{args.port}", profile) for profile in args.profiles.split(',') if profile]
+
+    print(f"🔨 {args.concurrency} clients x {args.duration:g}s over {', '.join(paths)}")
+    results = []
+    for base_url, label in targets:
+        proc = None
+        if not args.url:
+            print(f"🚀 Starting gunicorn with profile '{label}'...")
+            proc = start_server(label, args.port)
+            if not wait_until_up(base_url, paths[0], proc=proc):
+                output = server_log(proc)
+                stop_server(proc)
+                print(f"❌ Profile '{label}' did not come up: {output}")
+                continue
+        try:
+            results.append((label, run_load(base_url, paths, args.concurrency, args.duration)))
+        finally:
+            if proc:
+                stop_server(proc)
+
+    print()
+    print(f"{'profile':<12} {'req':>8} {'err':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, r in results:
+        print(f"{label:<12} {r['requests']:>8} {r['errors']:>6} {r['rps']:>9.1f} "
+              f"{r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f}")
+    return 0 if results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""add step progress counters to measure assignments
+
+Revision ID: e8f9g0h1i2j3
+Revises: d7e8f9g0h1i2
+Create Date: 2025-11-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f9g0h1i2j3'
+down_revision = 'd7e8f9g0h1i2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Make migration idempotent - only add columns if they don't exist
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    columns = [c['name'] for c in inspector.get_columns('measure_assignments')]
+
+    with op.batch_alter_table('measure_assignments', schema=None) as batch_op:
+        if 'steps_total' not in columns:
+            batch_op.add_column(sa.Column('steps_total', sa.Integer(), nullable=False, server_default='0'))
+        if 'steps_completed' not in columns:
+            batch_op.add_column(sa.Column('steps_completed', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from existing step rows
+    true_literal = '1' if conn.dialect.name == 'sqlite' else 'true'
+    op.execute(f"""
+        UPDATE measure_assignments SET
+            steps_total = (
+                SELECT COUNT(*) FROM assignment_steps
+                WHERE assignment_steps.assignment_id = measure_assignments.id
+            ),
+            steps_completed = (
+                SELECT COUNT(*) FROM assignment_steps
+                WHERE assignment_steps.assignment_id = measure_assignments.id
+                  AND assignment_steps.is_completed = {true_literal}
+            )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('measure_assignments', schema=None) as batch_op:
+        batch_op.drop_column('steps_completed')
+        batch_op.drop_column('steps_total')
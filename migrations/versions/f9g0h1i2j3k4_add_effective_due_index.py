@@ -0,0 +1,29 @@
+"""add partial index on effective due date of open assignments
+
+Revision ID: f9g0h1i2j3k4
+Revises: e8f9g0h1i2j3
+Create Date: 2025-11-21 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9g0h1i2j3k4'
+down_revision = 'e8f9g0h1i2j3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same expression as MeasureAssignment.effective_due_at so the planner can
+    # use it; both PostgreSQL and SQLite support expression + partial indexes.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_measure_assignments_open_effective_due
+        ON measure_assignments ((coalesce(end_date, date(due_at))))
+        WHERE status != 'Completed'
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_measure_assignments_open_effective_due")
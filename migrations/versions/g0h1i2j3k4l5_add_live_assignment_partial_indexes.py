@@ -0,0 +1,36 @@
+"""add partial indexes over live (not soft-deleted) measure assignments
+
+Revision ID: g0h1i2j3k4l5
+Revises: f9g0h1i2j3k4
+Create Date: 2025-11-22 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'g0h1i2j3k4l5'
+down_revision = 'f9g0h1i2j3k4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every ORM read filters deleted_at IS NULL (see MeasureAssignment.query_class),
+    # so dead rows are kept out of these indexes. Partial indexes work on both
+    # PostgreSQL and SQLite.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_measure_assignments_live_company_status
+        ON measure_assignments (company_id, status)
+        WHERE deleted_at IS NULL
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_measure_assignments_live_due_at
+        ON measure_assignments (due_at)
+        WHERE deleted_at IS NULL
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_measure_assignments_live_due_at")
+    op.execute("DROP INDEX IF EXISTS ix_measure_assignments_live_company_status")
@@ -0,0 +1,100 @@
+"""normalize measure assignment status and add status indexes
+
+Revision ID: h1i2j3k4l5m6
+Revises: g0h1i2j3k4l5
+Create Date: 2025-11-23 09:00:00.000000
+
+"""
+import re
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'h1i2j3k4l5m6'
+down_revision = 'g0h1i2j3k4l5'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with app.models.ASSIGNMENT_STATUSES
+STATUSES = ("Not Started", "In Progress", "Completed", "Needs Assistance", "On Hold", "Blocked")
+CHECK_NAME = 'ck_measure_assignments_status'
+
+
+def upgrade():
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    # 1. Canonical spelling for case/whitespace/underscore variants
+    for status in STATUSES:
+        conn.execute(
+            sa.text(
+                "UPDATE measure_assignments SET status = :status "
+                "WHERE lower(trim(replace(status, '_', ' '))) = :key AND status != :status"
+            ),
+            {'status': status, 'key': status.lower()},
+        )
+
+    # 2. Anything else (NULL, blank, legacy values) is re-derived from step progress
+    conn.execute(
+        sa.text(
+            "UPDATE measure_assignments SET status = CASE "
+            "WHEN steps_total > 0 AND steps_completed >= steps_total THEN 'Completed' "
+            "WHEN steps_completed > 0 THEN 'In Progress' "
+            "ELSE 'Not Started' END "
+            "WHERE status IS NULL OR status NOT IN :statuses"
+        ).bindparams(sa.bindparam('statuses', expanding=True)),
+        {'statuses': list(STATUSES)},
+    )
+
+    # 3. Composite index; (company_id, status) is already covered by the
+    #    partial ix_measure_assignments_live_company_status
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_measure_assignments_status_due_at "
+        "ON measure_assignments (status, due_at)"
+    )
+
+    # 4. Check constraint, as declared in MeasureAssignment.__table_args__.
+    #    SQLite can only add one by rebuilding the table in batch mode.
+    checks = {c['name'] for c in inspector.get_check_constraints('measure_assignments')}
+    if CHECK_NAME not in checks:
+        condition = "status IN (%s)" % ", ".join(f"'{s}'" for s in STATUSES)
+        if conn.dialect.name == 'sqlite':
+            with _preserving_sqlite_indexes(conn):
+                with op.batch_alter_table('measure_assignments', recreate='always') as batch_op:
+                    batch_op.create_check_constraint(CHECK_NAME, condition)
+        else:
+            op.create_check_constraint(CHECK_NAME, 'measure_assignments', condition)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        with _preserving_sqlite_indexes(conn):
+            with op.batch_alter_table('measure_assignments', recreate='always') as batch_op:
+                batch_op.drop_constraint(CHECK_NAME, type_='check')
+    else:
+        op.drop_constraint(CHECK_NAME, 'measure_assignments', type_='check')
+    op.execute("DROP INDEX IF EXISTS ix_measure_assignments_status_due_at")
+
+
+@contextmanager
+def _preserving_sqlite_indexes(conn):
+    """
+    Recreate measure_assignments' indexes after a batch-mode table rebuild
+
+    Batch mode reflects the table to copy it, and reflection skips the
+    expression and partial indexes of earlier revisions. Their original DDL
+    is kept in sqlite_master, so it is replayed once the new table is in place.
+    """
+    ddl = [sql for (sql,) in conn.execute(sa.text(
+        "SELECT sql FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = 'measure_assignments' AND sql IS NOT NULL"
+    ))]
+    yield
+    for sql in ddl:
+        conn.execute(sa.text(re.sub(r'^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(?!IF NOT EXISTS)',
+                                    r'CREATE \1INDEX IF NOT EXISTS ', sql, flags=re.IGNORECASE)))
@@ -0,0 +1,40 @@
+"""add server_sessions table for server-side session storage
+
+Revision ID: i2j3k4l5m6n7
+Revises: h1i2j3k4l5m6
+Create Date: 2025-11-24 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'i2j3k4l5m6n7'
+down_revision = 'h1i2j3k4l5m6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from sqlalchemy import inspect
+    inspector = inspect(op.get_bind())
+
+    # db.create_all() may already have created it
+    if 'server_sessions' not in inspector.get_table_names():
+        op.create_table(
+            'server_sessions',
+            sa.Column('id', sa.String(length=64), nullable=False),
+            sa.Column('data', sa.Text(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_server_sessions_expires_at "
+        "ON server_sessions (expires_at)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_server_sessions_expires_at")
+    op.drop_table('server_sessions')
@@ -6,5 +6,8 @@ set -o errexit
 pip install --upgrade pip
 pip install -r requirements.txt
 
+# Precompressed .gz/.br copies of static assets
+python compress_static.py --quiet
+
 # Run database migrations
 python -c "from app import create_app, db; app = create_app(); app.app_context().push(); db.create_all()"
@@ -17,11 +17,14 @@ echo "Current directory: $(pwd)"
 echo "Python version: $(python --version)"
 echo "================================"
 
-# Run database migrations
-echo "Running database migrations..."
-python -m flask db upgrade
-echo "✓ Migrations complete."
+# Apply pending migrations once, before the workers start. Importing wsgi runs
+# the migration gate (app/utils/migration_gate.py); the workers then find the
+# schema current with a single query and start serving immediately.
+echo "Checking database schema..."
+python -c "import wsgi"
+echo "✓ Schema check complete."
 
 # Start the Gunicorn server
 echo "Starting Gunicorn server..."
-exec gunicorn wsgi:app --bind 0.0.0.0:$PORT --workers 2 --timeout 120
+# Worker profile, counts and preload live in gunicorn.conf.py (GUNICORN_PROFILE)
+exec gunicorn -c gunicorn.conf.py wsgi:app